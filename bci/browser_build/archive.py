@@ -0,0 +1,196 @@
+"""
+Extraction of downloaded browser archives directly into their install folder. File modes are applied while
+extracting, so no recursive chmod is needed afterwards, and tar archives are extracted while they are downloaded.
+"""
+import os
+import bz2
+import logging
+import stat
+import shutil
+import tarfile
+import zipfile
+import threading
+import subprocess
+from contextlib import contextmanager
+
+logger = logging.getLogger("bci")
+
+CHUNK_SIZE = 1024 * 1024
+
+# Multi-threaded bzip2 decompressors, in order of preference
+MULTI_THREADED_BZIP2_EXECUTABLES = ["lbzip2", "pbzip2"]
+
+
+def extract_zip(archive_path: str, folder_path: str, root: str = "", mode_bits: int = 0):
+    """
+    Extracts the zip archive at archive_path into folder_path.
+
+    :param archive_path: path to the zip archive
+    :param folder_path: folder in which the files are extracted
+    :param root: top-level folder of the archive that is stripped from the extracted paths
+    :param mode_bits: permission bits that are added to the mode of every extracted file
+    """
+    with zipfile.ZipFile(archive_path, "r") as zip_file:
+        for info in zip_file.infolist():
+            relative_path = strip_root(info.filename, root)
+            if relative_path is None:
+                continue
+            target_path = get_target_path(folder_path, relative_path)
+            if info.is_dir():
+                os.makedirs(target_path, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            mode = info.external_attr >> 16
+            if stat.S_ISLNK(mode):
+                os.symlink(zip_file.read(info).decode("utf-8"), target_path)
+                continue
+            with zip_file.open(info) as src_file, open(target_path, "wb") as dst_file:
+                shutil.copyfileobj(src_file, dst_file, CHUNK_SIZE)
+            os.chmod(target_path, (stat.S_IMODE(mode) or 0o644) | mode_bits)
+
+
+def extract_tar_stream(file_obj, folder_path: str, compression: str, root: str = "", mode_bits: int = 0,
+                       bzip2_backend=None):
+    """
+    Extracts a tar archive from a non-seekable file object (e.g. a download stream) into folder_path, member by
+    member as the archive is read.
+
+    :param file_obj: file object from which the archive is read
+    :param folder_path: folder in which the files are extracted
+    :param compression: compression of the archive, as supported by tarfile ('bz2', 'gz', 'xz')
+    :param root: top-level folder of the archive that is stripped from the extracted paths
+    :param mode_bits: permission bits that are added to the mode of every extracted file and folder
+    :param bzip2_backend: backend used to decompress bz2 archives, by default the fastest available one
+    """
+    if compression == "bz2":
+        if bzip2_backend is None:
+            bzip2_backend = get_bzip2_backend()
+        with bzip2_backend.decompress(file_obj) as stream:
+            with tarfile.open(fileobj=stream, mode="r|", bufsize=CHUNK_SIZE) as tar_file:
+                extract_tar_members(tar_file, folder_path, root, mode_bits)
+        return
+    with tarfile.open(fileobj=file_obj, mode=f"r|{compression}", bufsize=CHUNK_SIZE) as tar_file:
+        extract_tar_members(tar_file, folder_path, root, mode_bits)
+
+
+def extract_tar_members(tar_file: tarfile.TarFile, folder_path: str, root: str = "", mode_bits: int = 0):
+    for member in tar_file:
+        relative_path = strip_root(member.name, root)
+        if relative_path is None:
+            continue
+        # Raises if the member would be extracted outside folder_path
+        get_target_path(folder_path, relative_path)
+        member.name = relative_path
+        if member.islnk():
+            member.linkname = strip_root(member.linkname, root)
+            if member.linkname is None:
+                raise AttributeError(f"Hard link '{member.name}' points outside of the archive root")
+        if not member.issym():
+            member.mode |= mode_bits
+        tar_file.extract(member, folder_path)
+
+
+def strip_root(path: str, root: str):
+    """
+    Returns the given archive path relative to root, or None if it is root itself or lies outside of it.
+    """
+    while path.startswith("./"):
+        path = path[2:]
+    if not root:
+        return path or None
+    root = root.rstrip("/") + "/"
+    if not path.startswith(root) or path == root:
+        return None
+    return path[len(root):]
+
+
+def get_target_path(folder_path: str, relative_path: str) -> str:
+    target_path = os.path.realpath(os.path.join(folder_path, relative_path))
+    if not target_path.startswith(os.path.realpath(folder_path) + os.sep):
+        raise AttributeError(f"Archive member '{relative_path}' would be extracted outside of '{folder_path}'")
+    return target_path
+
+
+class PythonBzip2Backend:
+    """
+    Single-threaded decompression with the bz2 module.
+    """
+
+    name = "bz2"
+
+    @contextmanager
+    def decompress(self, file_obj):
+        with bz2.BZ2File(file_obj, "rb") as stream:
+            yield stream
+
+
+class ExternalBzip2Backend:
+    """
+    Multi-threaded decompression by an external decompressor (lbzip2 or pbzip2), which reads the compressed
+    stream from stdin while it is fed by a separate thread.
+    """
+
+    def __init__(self, executable: str) -> None:
+        self.name = os.path.basename(executable)
+        self.executable = executable
+
+    @contextmanager
+    def decompress(self, file_obj):
+        try:
+            process = subprocess.Popen([self.executable, "-d", "-c"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+        except OSError:
+            logger.warning(f"Could not start {self.name}, falling back to single-threaded decompression", exc_info=True)
+            with PythonBzip2Backend().decompress(file_obj) as stream:
+                yield stream
+            return
+        feed_errors = []
+
+        def feed():
+            try:
+                shutil.copyfileobj(file_obj, process.stdin, CHUNK_SIZE)
+            except (OSError, ValueError) as e:
+                feed_errors.append(e)
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        try:
+            yield process.stdout
+            # Drain remaining output, so the decompressor can exit
+            while process.stdout.read(CHUNK_SIZE):
+                pass
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            feeder.join()
+            return_code = process.wait()
+            error_output = process.stderr.read().decode("utf-8", errors="replace").strip()
+            process.stdout.close()
+            process.stderr.close()
+        if feed_errors:
+            raise feed_errors[0]
+        if return_code != 0:
+            raise AttributeError(f"{self.name} exited with code {return_code}: {error_output}")
+
+
+def get_bzip2_backends() -> list:
+    """
+    Returns all available bzip2 backends, from fastest to slowest.
+    """
+    backends = []
+    for name in MULTI_THREADED_BZIP2_EXECUTABLES:
+        executable = shutil.which(name)
+        if executable is not None:
+            backends.append(ExternalBzip2Backend(executable))
+    backends.append(PythonBzip2Backend())
+    return backends
+
+
+def get_bzip2_backend():
+    return get_bzip2_backends()[0]
@@ -0,0 +1,101 @@
+"""
+Compares the former install path of downloaded archives (extract to a temporary folder, move file by file, chmod)
+with the streaming extraction of bci.browser_build.archive, on synthetic archives shaped like browser snapshots.
+The streaming extraction of tar.bz2 archives is measured for every available bzip2 backend.
+
+Usage: python -m bci.browser_build.archive_benchmark [--nb-of-files N] [--file-size BYTES] [--repeat R]
+"""
+import os
+import time
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import click
+from bci import cli
+from bci import util
+from bci.browser_build import archive
+
+
+def create_archives(folder_path: str, nb_of_files: int, file_size: int):
+    source_path = os.path.join(folder_path, "source", "browser")
+    for i in range(nb_of_files):
+        file_path = os.path.join(source_path, "lib%i" % (i % 10), "file%i" % i)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as file:
+            # Half random, half compressible, like a binary
+            file.write(os.urandom(file_size // 2) + bytes(file_size - file_size // 2))
+    zip_path = os.path.join(folder_path, "archive.zip")
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for dir_path, _, file_names in os.walk(source_path):
+            for file_name in file_names:
+                file_path = os.path.join(dir_path, file_name)
+                zip_file.write(file_path, os.path.relpath(file_path, os.path.dirname(source_path)))
+    tar_path = os.path.join(folder_path, "archive.tar.bz2")
+    with tarfile.open(tar_path, "w:bz2") as tar_file:
+        tar_file.add(source_path, arcname="browser")
+    return zip_path, tar_path
+
+
+def legacy_zip(zip_path: str, tmp_path: str, install_path: str):
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        zip_ref.extractall(tmp_path)
+    util.safe_move_dir(os.path.join(tmp_path, "browser"), install_path)
+    cli.execute_and_return_status("chmod -R a+x %s" % install_path)
+
+
+def streaming_zip(zip_path: str, _, install_path: str):
+    archive.extract_zip(zip_path, install_path, root="browser", mode_bits=0o111)
+
+
+def legacy_tar(tar_path: str, tmp_path: str, install_path: str):
+    with tarfile.open(tar_path, "r:bz2") as tar_ref:
+        tar_ref.extractall(tmp_path)
+    util.safe_move_dir(os.path.join(tmp_path, "browser"), install_path)
+    cli.execute_and_return_status("chmod -R a+x %s" % install_path)
+    cli.execute_and_return_status("chmod -R a+w %s" % install_path)
+
+
+def get_streaming_tar(bzip2_backend):
+    def streaming_tar(tar_path: str, _, install_path: str):
+        with open(tar_path, "rb") as file:
+            archive.extract_tar_stream(file, install_path, "bz2", root="browser", mode_bits=0o333,
+                                       bzip2_backend=bzip2_backend)
+    return streaming_tar
+
+
+def measure(install_fn, archive_path: str, folder_path: str, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        tmp_path = tempfile.mkdtemp(dir=folder_path)
+        install_path = tempfile.mkdtemp(dir=folder_path)
+        start = time.perf_counter()
+        install_fn(archive_path, tmp_path, install_path)
+        durations.append(time.perf_counter() - start)
+        shutil.rmtree(tmp_path)
+        shutil.rmtree(install_path)
+    return min(durations)
+
+
+@click.command()
+@click.option("--nb-of-files", default=500)
+@click.option("--file-size", default=128 * 1024)
+@click.option("--repeat", default=3)
+def run(nb_of_files, file_size, repeat):
+    with tempfile.TemporaryDirectory() as folder_path:
+        zip_path, tar_path = create_archives(folder_path, nb_of_files, file_size)
+        print(f"{nb_of_files} files of {file_size} bytes, best of {repeat} runs")
+        benchmarks = [
+            ("zip (legacy)", legacy_zip, zip_path),
+            ("zip (streaming)", streaming_zip, zip_path),
+            ("tar.bz2 (legacy)", legacy_tar, tar_path),
+        ]
+        for bzip2_backend in archive.get_bzip2_backends():
+            benchmarks.append((f"tar.bz2 ({bzip2_backend.name})", get_streaming_tar(bzip2_backend), tar_path))
+        for name, install_fn, archive_path in benchmarks:
+            print(f"{name:<24}{measure(install_fn, archive_path, folder_path, repeat):.3f}s")
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    run()
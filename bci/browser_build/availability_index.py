@@ -0,0 +1,39 @@
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+
+
+class AvailabilityIndex:
+    """
+    Sorted array of the (integer) state ids for which a binary is available, answering availability questions with a
+    binary search instead of a round trip per state.
+    """
+
+    def __init__(self, state_ids: Iterable[int]) -> None:
+        self.state_ids = array("i", sorted(set(state_ids)))
+
+    @staticmethod
+    def from_bytes(data: bytes):
+        index = AvailabilityIndex([])
+        index.state_ids.frombytes(data)
+        return index
+
+    def to_bytes(self) -> bytes:
+        return self.state_ids.tobytes()
+
+    def __len__(self) -> int:
+        return len(self.state_ids)
+
+    @property
+    def max_state_id(self) -> int:
+        return self.state_ids[-1] if self.state_ids else -1
+
+    def covers(self, state_id: int) -> bool:
+        """
+        Returns True if the index holds authoritative information on the given state id.
+        """
+        return state_id <= self.max_state_id
+
+    def contains(self, state_id: int) -> bool:
+        i = bisect_left(self.state_ids, state_id)
+        return i < len(self.state_ids) and self.state_ids[i] == state_id
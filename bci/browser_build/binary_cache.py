@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable
+from bci import util
+
+INDEX_FILE_NAME = ".cache_index.json"
+LOCK_FILE_NAME = ".cache.lock"
+INSTALL_LOCK_FOLDER_NAME = ".install-locks"
+TMP_FOLDER_PREFIX = ".tmp-"
+
+
+class BinaryCache:
+    """
+    Size-bounded cache of downloaded browser binaries, shared by all containers that mount the cache folder.
+
+    Every binary is stored in a folder named after the state it was built from. Binaries are installed atomically (into
+    a temporary folder that is renamed into place) and are evicted in least recently used order once the cache exceeds
+    its budget. The index with access times and hit/miss counters is kept next to the binaries and is protected by a
+    file lock, so that concurrent workers keep it consistent. Every state has its own install lock, so that containers
+    requesting the same binary wait for a single install.
+
+    When the cache folder is mounted read-only (as in workers using the shared binary store), binaries are only read:
+    installing, eviction and access bookkeeping are left to the process that owns the store.
+    """
+
+    eviction_grace_period = 30 * 60
+    """
+    Binaries accessed within this number of seconds are never evicted, since they might still be in use.
+    """
+
+    def __init__(self, folder_path: str, budget: int) -> None:
+        """
+        :param folder_path: folder in which the binaries are stored
+        :param budget: maximum number of bytes that the cached binaries should occupy
+        """
+        self.logger = logging.getLogger("bci")
+        self.folder_path = folder_path
+        self.budget = budget
+        os.makedirs(self.folder_path, exist_ok=True)
+        self.read_only = not os.access(self.folder_path, os.W_OK)
+        self.in_use_state_ids = Counter()
+        self.in_use_lock = threading.Lock()
+
+    def contains(self, state_id) -> bool:
+        return os.path.isdir(self.get_entry_path(state_id))
+
+    def get_entry_path(self, state_id) -> str:
+        return os.path.join(self.folder_path, str(state_id))
+
+    def list_state_ids(self) -> list:
+        return [name for name in os.listdir(self.folder_path) if self.is_entry_folder(name)]
+
+    def install(self, state_id, install_fn: Callable[[str], None]) -> bool:
+        """
+        Installs the binary of the given state by calling install_fn with a temporary folder that should be populated
+        with the binary files. The temporary folder is renamed into place when install_fn returns, so that other
+        processes never observe a partially installed binary. If another process is installing the same binary, this
+        call waits for it to finish instead of installing the binary again.
+
+        :return: True if the binary was installed by this call, False if it was already installed
+        """
+        state_id = str(state_id)
+        if self.read_only:
+            raise AttributeError(f"Cannot install binary of {state_id}, the binary store is mounted read-only")
+        with self.install_lock(state_id):
+            if self.contains(state_id):
+                self.logger.debug(f"Binary of {state_id} was already installed by another process")
+                self.touch(state_id)
+                return False
+            tmp_folder_path = os.path.join(self.folder_path, f"{TMP_FOLDER_PREFIX}{state_id}-{uuid.uuid4().hex}")
+            os.makedirs(tmp_folder_path)
+            try:
+                install_fn(tmp_folder_path)
+                size = util.get_folder_size(tmp_folder_path)
+                with self.locked_index() as index:
+                    os.rename(tmp_folder_path, self.get_entry_path(state_id))
+                    index["entries"][state_id] = {"size": size, "last_access": time.time(), "hits": 0}
+                    index["stats"]["misses"] += 1
+            finally:
+                if os.path.exists(tmp_folder_path):
+                    shutil.rmtree(tmp_folder_path, ignore_errors=True)
+        return True
+
+    @contextmanager
+    def install_lock(self, state_id: str):
+        lock_folder_path = os.path.join(self.folder_path, INSTALL_LOCK_FOLDER_NAME)
+        os.makedirs(lock_folder_path, exist_ok=True)
+        with open(os.path.join(lock_folder_path, f"{state_id}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def touch(self, state_id, is_hit=False):
+        """
+        Marks the binary of the given state as recently used.
+        """
+        state_id = str(state_id)
+        if self.read_only:
+            return
+        with self.locked_index() as index:
+            if state_id not in index["entries"]:
+                return
+            index["entries"][state_id]["last_access"] = time.time()
+            if is_hit:
+                index["entries"][state_id]["hits"] += 1
+                index["stats"]["hits"] += 1
+
+    def mark_in_use(self, state_id):
+        """
+        Protects the binary of the given state from eviction by this process until it is released. Workers that mount
+        the cache read-only cannot mark the binaries they use as recently used, so the process that dispatches them
+        marks the binaries in use instead.
+        """
+        with self.in_use_lock:
+            self.in_use_state_ids[str(state_id)] += 1
+
+    def release(self, state_id):
+        with self.in_use_lock:
+            state_id = str(state_id)
+            self.in_use_state_ids[state_id] -= 1
+            if self.in_use_state_ids[state_id] <= 0:
+                del self.in_use_state_ids[state_id]
+
+    def evict(self, protected_state_ids=()):
+        """
+        Removes least recently used binaries until the cache respects its budget. Binaries of the given protected
+        states, binaries that are marked in use and binaries that were accessed recently are kept.
+        """
+        if self.read_only:
+            return
+        with self.in_use_lock:
+            protected_state_ids = set(str(state_id) for state_id in protected_state_ids) | set(self.in_use_state_ids)
+        with self.locked_index() as index:
+            size = sum(entry["size"] for entry in index["entries"].values())
+            entries = sorted(index["entries"].items(), key=lambda item: item[1]["last_access"])
+            for state_id, entry in entries:
+                if size <= self.budget:
+                    break
+                if state_id in protected_state_ids or time.time() - entry["last_access"] < self.eviction_grace_period:
+                    continue
+                self.logger.debug(f"Evicting binary of {state_id} from cache")
+                if util.rmtree(self.get_entry_path(state_id)):
+                    del index["entries"][state_id]
+                    index["stats"]["evictions"] += 1
+                    size -= entry["size"]
+
+    def get_size(self) -> int:
+        with self.locked_index() as index:
+            return sum(entry["size"] for entry in index["entries"].values())
+
+    def get_stats(self) -> dict:
+        with self.locked_index() as index:
+            stats = dict(index["stats"])
+            stats["nb_of_entries"] = len(index["entries"])
+            stats["size"] = sum(entry["size"] for entry in index["entries"].values())
+            return stats
+
+    @contextmanager
+    def locked_index(self):
+        """
+        Yields the cache index while holding the cache lock, the index is written back afterwards. A read-only cache
+        only reads the index.
+        """
+        if self.read_only:
+            yield self._read_index()
+            return
+        with open(os.path.join(self.folder_path, LOCK_FILE_NAME), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                index = self._read_index()
+                yield index
+                self._write_index(index)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self) -> dict:
+        index_path = os.path.join(self.folder_path, INDEX_FILE_NAME)
+        index = {"entries": {}, "stats": {"hits": 0, "misses": 0, "evictions": 0}}
+        if os.path.isfile(index_path):
+            try:
+                with open(index_path, "r") as file:
+                    index = json.load(file)
+            except ValueError:
+                self.logger.warning("Binary cache index is corrupt, rebuilding it")
+        # Reconcile index with the binaries that are actually present
+        state_ids = self.list_state_ids()
+        for state_id in list(index["entries"].keys()):
+            if state_id not in state_ids:
+                del index["entries"][state_id]
+        for state_id in state_ids:
+            if state_id not in index["entries"]:
+                entry_path = self.get_entry_path(state_id)
+                index["entries"][state_id] = {
+                    "size": util.get_folder_size(entry_path),
+                    "last_access": os.path.getmtime(entry_path),
+                    "hits": 0
+                }
+        return index
+
+    def _write_index(self, index: dict):
+        index_path = os.path.join(self.folder_path, INDEX_FILE_NAME)
+        tmp_index_path = f"{index_path}.{uuid.uuid4().hex}"
+        with open(tmp_index_path, "w") as file:
+            json.dump(index, file)
+        os.replace(tmp_index_path, index_path)
+
+    def is_entry_folder(self, name: str) -> bool:
+        return not name.startswith(".") and os.path.isdir(os.path.join(self.folder_path, name))
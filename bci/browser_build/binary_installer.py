@@ -0,0 +1,99 @@
+import logging
+import threading
+from typing import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from bci.browser_build.browser_build import BrowserBuild
+from bci.version_control.version_control import RepoState
+
+
+class BinaryInstaller:
+    """
+    Downloads binaries into the binary cache on a pool of threads, so that the dispatch of a state only waits for the
+    binary of that state while the binaries of other states are downloaded in the background. Requests for a state
+    whose binary is already being downloaded share that download.
+    """
+
+    def __init__(
+            self,
+            browser_build: BrowserBuild,
+            nb_of_threads: int,
+            availability_cb: Callable[[RepoState, bool], None] = None) -> None:
+        """
+        :param browser_build: browser build used to download the binaries
+        :param nb_of_threads: maximum number of binaries that are downloaded at the same time
+        :param availability_cb: called with the availability of every state whose binary is installed or turned out
+            to be unavailable
+        """
+        self.logger = logging.getLogger("bci")
+        self.browser_build = browser_build
+        self.availability_cb = availability_cb
+        self.binary_cache = browser_build.binary_cache
+        self.pool = ThreadPoolExecutor(max_workers=max(1, nb_of_threads), thread_name_prefix="bci_installer")
+        self.futures = {}
+        self.futures_lock = threading.Lock()
+
+    def install(self, state: RepoState) -> Future:
+        """
+        Starts the download of the binary of the given state, unless it is already being downloaded.
+
+        :return: future that results in whether the binary is installed
+        """
+        with self.futures_lock:
+            if state.id not in self.futures:
+                self.futures[state.id] = self.pool.submit(self.download, state)
+            return self.futures[state.id]
+
+    def install_and_wait(self, state: RepoState) -> bool:
+        """
+        Installs the binary of the given state, waiting only for the download of this state.
+
+        :return: True if the binary is installed
+        """
+        if self.browser_build.has_available_snapshot_locally(state.id):
+            self.binary_cache.touch(state.id, is_hit=True)
+            self.report_availability(state, True)
+            return True
+        return self.install(state).result()
+
+    def wait_until_installed(self, state: RepoState):
+        """
+        Blocks until a running download of the given state is finished, without starting a new one.
+        """
+        with self.futures_lock:
+            future = self.futures.get(state.id)
+        if future is not None:
+            future.result()
+
+    def is_installing(self, state: RepoState) -> bool:
+        with self.futures_lock:
+            return state.id in self.futures
+
+    def download(self, state: RepoState) -> bool:
+        try:
+            if not self.browser_build.has_available_snapshot_locally(state.id):
+                if not self.browser_build.has_available_snapshot_online(state.id):
+                    self.logger.info(f"Binary of {state.id} is not available online")
+                    self.report_availability(state, False)
+                    return False
+                self.logger.debug(f"Downloading binary of {state.id}")
+                self.browser_build.download_snapshot(state=state)
+            self.binary_cache.evict(protected_state_ids=[state.id])
+            self.report_availability(state, True)
+            return True
+        except Exception:
+            # The worker will report the build as unavailable
+            self.logger.error(f"Could not install binary of {state.id}", exc_info=True)
+            return False
+        finally:
+            with self.futures_lock:
+                del self.futures[state.id]
+
+    def report_availability(self, state: RepoState, available: bool):
+        if self.availability_cb is not None:
+            self.availability_cb(state, available)
+
+    def shutdown(self):
+        """
+        Stops the pool, downloads that have not started yet are cancelled.
+        """
+        self.pool.shutdown(wait=True, cancel_futures=True)
@@ -3,8 +3,10 @@ import json
 import logging
 from abc import abstractmethod
 from bci import util
+from bci.config import Config
 from bci.version_control.version_control import RepoState
 from bci.browser_build.artisanal_build_manager import ArtisanalBuildManager
+from bci.browser_build.binary_cache import BinaryCache
 
 
 class BrowserBuild:
@@ -19,6 +21,7 @@ class BrowserBuild:
             os.makedirs(bin_folder_path)
         self.bin_folder_path = bin_folder_path
         self.artisanal_bin_folder_path = os.path.join(self.bin_folder_path, "artisanal")
+        self.binary_cache = BinaryCache(os.path.join(self.bin_folder_path, "downloaded"), Config.binary_cache_budget)
 
         if not os.path.isdir(data_folder_path):
             os.makedirs(data_folder_path)
@@ -46,7 +49,7 @@ class BrowserBuild:
 
     def list_downloaded_binaries(self):
         binaries = []
-        for subfolder_path in os.listdir(os.path.join(self.bin_folder_path, "downloaded")):
+        for subfolder_path in self.binary_cache.list_state_ids():
             bin_entry = {}
             bin_entry["id"] = subfolder_path
             binaries.append(bin_entry)
@@ -55,6 +58,12 @@ class BrowserBuild:
     def update_artisanal_binaries_meta_data(self):
         self.artisanal_build_manager.update()
 
+    def refresh_availability_index(self):
+        """
+        Updates the bulk availability information of online binaries, if the browser keeps any. This is only done by
+        the master, workers use the stored information.
+        """
+
     def list_artisanal_binaries(self):
         return self.artisanal_build_manager.get_artisanal_binaries_list()
 
@@ -65,9 +74,9 @@ class BrowserBuild:
     def build(self, state: RepoState):
         # Check cache
         if self.is_built(state):
-            pass
-        # Try to download snapshot
-        elif self.has_available_snapshot_online(state.id):
+            self.binary_cache.touch(state.id, is_hit=True)
+        # Try to download snapshot, unless binaries are installed by the master in a read-only binary store
+        elif not self.binary_cache.read_only and self.has_available_snapshot_online(state.id):
             self.download_snapshot(state=state)
         else:
             return False
@@ -93,6 +102,21 @@ class BrowserBuild:
     def has_available_snapshot_online(self, state_id):
         pass
 
+    def get_available_state_ids(self, state_ids) -> set:
+        """
+        Returns the subset of the given state ids for which a binary is available locally or online, resolved in bulk.
+
+        :param state_ids: ids of the states, a sequence that is iterated over without being copied
+        """
+        local_state_ids = set(self.binary_cache.list_state_ids())
+        local_state_ids.update(binary["folder"] for binary in self.list_artisanal_binaries() if binary["valid"])
+        available_state_ids = set(state_id for state_id in state_ids if str(state_id) in local_state_ids)
+        remaining_state_ids = (state_id for state_id in state_ids if state_id not in available_state_ids)
+        return available_state_ids | self.get_available_state_ids_online(remaining_state_ids)
+
+    def get_available_state_ids_online(self, state_ids) -> set:
+        return set(state_id for state_id in state_ids if self.has_available_snapshot_online(state_id))
+
     def is_built(self, state):
         bin_path = self.get_bin_path(state)
         return bin_path is not None
@@ -137,6 +161,13 @@ class BrowserBuild:
             return os.path.join(self.bin_folder_path, "artisanal", str(build_id))
         return os.path.join(self.bin_folder_path, "downloaded", str(build_id))
 
+    def release_bin_folder(self, build_id):
+        """
+        Signals that the binary is not needed anymore. It is kept in the binary cache, unless it has to be evicted.
+        """
+        self.binary_cache.touch(build_id)
+        self.binary_cache.evict()
+
     def remove_bin_folder(self, build_id):
         path = self.get_bin_folder_path(build_id)
         if path and "artisanal" not in path:
@@ -1,11 +1,12 @@
 import os
-import shutil
-import zipfile
 import re
+from datetime import datetime, timedelta, timezone
 import requests
-from bci import util
 from bci import cli
+from bci.browser_build import archive
 from bci.browser_build.browser_build import BrowserBuild
+from bci.browser_build.downloader import Downloader
+from bci.browser_build.availability_index import AvailabilityIndex
 from bci.version_control.chromium_vc import ChromiumRepo, ChromiumRepoState, ChromiumRepoLineage
 from bci.data_storage.mongodb import MongoDB
 
@@ -17,6 +18,7 @@ class ChromiumBuild(BrowserBuild):
         self.os_name = "Linux_x64"
         self.os_name_short = "linux"
         self.repo = ChromiumRepo(repo_path)
+        self.availability_index = None
 
     def save_browser_binary(self, changeset_id, binary_file):
         binary_file.save(self.get_bin_path_from_id(changeset_id))
@@ -34,7 +36,7 @@ class ChromiumBuild(BrowserBuild):
         full_upper_version = self.get_full_version(upper_version)
         lower_commit_pos = self.get_first_commit_pos(full_lower_version)
         upper_commit_pos = self.get_first_commit_pos(full_upper_version)
-        commit_pos_list = self.get_commit_pos_lineage(lower_commit_pos, upper_commit_pos)
+        commit_positions = self.get_commit_pos_lineage(lower_commit_pos, upper_commit_pos)
         evaluation_targets = None
         if self.only_releases:
             evaluation_targets = []
@@ -46,12 +48,12 @@ class ChromiumBuild(BrowserBuild):
             self.logger.info(f"Boundaries found: {lower_commit_pos} - {upper_commit_pos} (of which to evaluate {len(evaluation_targets)})")
         else:
             self.logger.info(f"Boundaries found: {lower_commit_pos} - {upper_commit_pos} (of which to evaluate all)")
-        return ChromiumRepoLineage(commit_pos_list, evaluation_targets=evaluation_targets)
+        return ChromiumRepoLineage(commit_positions, evaluation_targets=evaluation_targets)
 
     def get_state_lineage_from_commit_positions(self, lower_commit_pos, upper_commit_pos):
-        commit_pos_list = self.get_commit_pos_lineage(lower_commit_pos, upper_commit_pos)
+        commit_positions = self.get_commit_pos_lineage(lower_commit_pos, upper_commit_pos)
         self.logger.info(f"Boundaries found: {lower_commit_pos} - {upper_commit_pos} (of which to evaluate all)")
-        return ChromiumRepoLineage(commit_pos_list)
+        return ChromiumRepoLineage(commit_positions)
 
     def get_full_version(self, version):
         if re.match(r'[0-9]+\.[0-9]+\.[0-9]+', version):
@@ -70,7 +72,89 @@ class ChromiumBuild(BrowserBuild):
 
     # Downloadable binary snapshots
 
+    availability_index_max_age = timedelta(days=1)
+    availability_index_lease_duration = timedelta(hours=1)
+
+    def get_availability_index(self) -> AvailabilityIndex:
+        """
+        Returns the index of all commit positions for which a snapshot is available online, as it was stored in the
+        database. The stored index is used regardless of its age, because only the master rebuilds it (see
+        refresh_availability_index). Commit positions that are not covered by the index are resolved through the
+        per-commit cache.
+        """
+        if self.availability_index is None:
+            stored_index = MongoDB.get_binary_availability_index("chromium")
+            if stored_index is None:
+                self.availability_index = AvailabilityIndex([])
+            else:
+                self.availability_index = AvailabilityIndex.from_bytes(stored_index[0])
+        return self.availability_index
+
+    def refresh_availability_index(self):
+        """
+        Rebuilds the availability index by listing the snapshot bucket, if the stored index is older than
+        availability_index_max_age. A lease in the database makes sure that only one master lists the bucket at a time,
+        the others keep using the stored index.
+        """
+        stored_index = MongoDB.get_binary_availability_index("chromium")
+        if stored_index is not None:
+            packed_commit_positions, ts = stored_index
+            if datetime.now(timezone.utc) - ts.replace(tzinfo=timezone.utc) < self.availability_index_max_age:
+                self.availability_index = AvailabilityIndex.from_bytes(packed_commit_positions)
+                return
+        if not MongoDB.acquire_binary_availability_index_lease("chromium", self.availability_index_lease_duration):
+            self.logger.info("Availability index of Chromium snapshots is being built by another process")
+            self.availability_index = None
+            return
+        try:
+            self.logger.info("Building availability index of Chromium snapshots")
+            availability_index = AvailabilityIndex(self.list_available_snapshots_online())
+            MongoDB.store_binary_availability_index("chromium", availability_index.to_bytes())
+            self.availability_index = availability_index
+            self.logger.info(f"Availability index built ({len(self.availability_index)} snapshots)")
+        except requests.RequestException:
+            self.logger.error("Could not build availability index of Chromium snapshots", exc_info=True)
+            self.availability_index = None
+        finally:
+            MongoDB.release_binary_availability_index_lease("chromium")
+
+    def list_available_snapshots_online(self) -> list:
+        """
+        Returns all commit positions for which a snapshot folder exists in the snapshot bucket.
+        """
+        url = "https://www.googleapis.com/storage/v1/b/chromium-browser-snapshots/o"
+        params = {"delimiter": "/", "prefix": "%s/" % self.os_name, "fields": "prefixes,nextPageToken"}
+        commit_positions = []
+        with requests.Session() as session:
+            while True:
+                req = session.get(url, params=params)
+                req.raise_for_status()
+                data = req.json()
+                for prefix in data.get("prefixes", []):
+                    # Prefixes are formatted as 'Linux_x64/COMMIT_POS/'
+                    commit_pos = prefix.split("/")[1]
+                    if commit_pos.isdigit():
+                        commit_positions.append(int(commit_pos))
+                if "nextPageToken" not in data:
+                    return commit_positions
+                params["pageToken"] = data["nextPageToken"]
+
+    def get_available_state_ids_online(self, state_ids) -> set:
+        availability_index = self.get_availability_index()
+        available_state_ids = set()
+        for state_id in state_ids:
+            commit_pos = int(state_id)
+            if availability_index.covers(commit_pos):
+                if availability_index.contains(commit_pos):
+                    available_state_ids.add(state_id)
+            elif self.has_available_snapshot_online(state_id):
+                available_state_ids.add(state_id)
+        return available_state_ids
+
     def has_available_snapshot_online(self, commit_pos):
+        availability_index = self.get_availability_index()
+        if availability_index.covers(int(commit_pos)):
+            return availability_index.contains(int(commit_pos))
         cached_binary_available_online = MongoDB.has_binary_available_online("chromium", commit_pos)
         if cached_binary_available_online is not None:
             return cached_binary_available_online
@@ -96,48 +180,45 @@ class ChromiumBuild(BrowserBuild):
             "https://www.googleapis.com/download/storage/v1/b/chromium-browser-snapshots/o/%s%%2F%s%%2Fchrome-%s.zip?alt=media"\
             % (self.os_name, commit_pos, self.os_name_short)
         self.logger.info(f"Downloading {commit_pos} from '{url}'")
-        zip_file_path = "/tmp/%s/archive.zip" % commit_pos
-        if os.path.exists(os.path.dirname(zip_file_path)):
-            shutil.rmtree(os.path.dirname(zip_file_path))
-        os.makedirs(os.path.dirname(zip_file_path))
-        with requests.get(url, stream=True) as req:
-            with open(zip_file_path, 'wb') as file:
-                shutil.copyfileobj(req.raw, file)
-        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-            zip_ref.extractall(os.path.dirname(zip_file_path))
-        bin_path = self.get_potential_bin_path(commit_pos)
-        os.makedirs(os.path.dirname(bin_path), exist_ok=True)
-        unzipped_folder_path = os.path.join(os.path.dirname(zip_file_path), "chrome-linux")
-        util.safe_move_dir(unzipped_folder_path, os.path.dirname(bin_path))
-        cli.execute_and_return_status("chmod -R a+x %s" % os.path.dirname(bin_path))
-        # Remove temporary files in /tmp/COMMIT_POS
-        shutil.rmtree(os.path.dirname(zip_file_path))
+
+        def install(folder_path):
+            # The archive is downloaded next to the temporary install folder, so it is never listed as a binary
+            zip_file_path = folder_path + ".zip"
+            try:
+                # Zip archives can only be read once their central directory at the end is downloaded
+                Downloader.get_instance().download(url, zip_file_path)
+                # Executable bits are added while extracting, as was done with chmod -R a+x before
+                archive.extract_zip(zip_file_path, folder_path, root="chrome-linux", mode_bits=0o111)
+            finally:
+                if os.path.exists(zip_file_path):
+                    os.remove(zip_file_path)
+
+        self.binary_cache.install(commit_pos, install)
 
     def post_build_step(self, state):
         pass
 
     @staticmethod
-    def get_commit_pos_lineage(ancestor_commit_pos, descendant_commit_pos):
-        commit_pos_lineage = []
-        for commit_pos in range(int(ancestor_commit_pos), int(descendant_commit_pos) + 1):
-            # if self.has_available_snapshot_online(commit_pos):
-            #    commit_pos_lineage.append(commit_pos)
-            commit_pos_lineage.append(str(commit_pos))
-        return commit_pos_lineage
+    def get_commit_pos_lineage(ancestor_commit_pos, descendant_commit_pos) -> range:
+        return range(int(ancestor_commit_pos), int(descendant_commit_pos) + 1)
 
-    @staticmethod
-    def get_first_commit_pos(version):
+    def get_first_commit_pos(self, version):
         # This version does not have a commit position available online
         if version == "57.0.2987.0":
             # This is just an estimation
             return "444943"
         if version in ChromiumBuild.branch_base_positions:
             return ChromiumBuild.branch_base_positions[version]
+        commit_pos = self.repo.get_branch_base_position(version)
+        if commit_pos is not None:
+            return commit_pos
         url = "https://omahaproxy.appspot.com/deps.json?version=%s" % version
         req = requests.get(url)
         if req.ok:
             data = req.json()
-            return data["chromium_base_position"]
+            commit_pos = data["chromium_base_position"]
+            self.repo.store_branch_base_position(version, commit_pos)
+            return commit_pos
         raise AttributeError("Could not find first commit_pos for '%s' at '%s'" % (version, url))
 
     @staticmethod
@@ -0,0 +1,290 @@
+import os
+import time
+import base64
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+
+CHUNK_SIZE = 1024 * 1024
+
+# Errors after which a download is resumed from the last received byte
+RESUMABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout)
+
+
+class DownloadError(Exception):
+
+    def __init__(self, url: str, message: str):
+        super().__init__()
+        self.message = "Could not download '%s': %s" % (url, message)
+
+    def __str__(self):
+        return self.message
+
+
+class Downloader:
+    """
+    Downloads binaries over a shared connection pool. Interrupted downloads are resumed with HTTP range requests,
+    large files are downloaded in parallel segments, and downloads are verified against their length and, when the
+    server provides one, their MD5 hash.
+    """
+
+    instance = None
+    instance_lock = threading.Lock()
+
+    def __init__(self, nb_of_segments: int = 4, segment_threshold: int = 64 * 1024 ** 2, max_resumes: int = 5,
+                 timeout: int = 60) -> None:
+        """
+        :param nb_of_segments: number of segments that are downloaded in parallel for large files
+        :param segment_threshold: minimum size in bytes of a file to be downloaded in segments
+        :param max_resumes: maximum number of times a download (or segment) is resumed after an error
+        :param timeout: connect and read timeout in seconds
+        """
+        self.logger = logging.getLogger("bci")
+        self.nb_of_segments = nb_of_segments
+        self.segment_threshold = segment_threshold
+        self.max_resumes = max_resumes
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Retries requests that fail before any data is received
+        retry = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=nb_of_segments * 2, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.metrics = []
+        self.metrics_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        # Binaries of different states can be downloaded concurrently
+        with cls.instance_lock:
+            if cls.instance is None:
+                cls.instance = cls()
+            return cls.instance
+
+    def download(self, url: str, file_path: str) -> dict:
+        """
+        Downloads the file at the given url to file_path.
+
+        :return: the metrics of the download
+        """
+        start = time.time()
+        size, supports_ranges, expected_md5 = self.probe(url)
+        resumes = [0]
+        if size is not None and supports_ranges and size >= self.segment_threshold and self.nb_of_segments > 1:
+            nb_of_segments = self.nb_of_segments
+            with open(file_path, "wb") as file:
+                file.truncate(size)
+            segment_size = -(-size // nb_of_segments)
+            segments = [(i * segment_size, min(size, (i + 1) * segment_size) - 1) for i in range(nb_of_segments)]
+            with ThreadPoolExecutor(max_workers=nb_of_segments) as executor:
+                futures = [
+                    executor.submit(self.download_range, url, file_path, first, last, supports_ranges, resumes)
+                    for first, last in segments
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            nb_of_segments = 1
+            with open(file_path, "wb"):
+                pass
+            self.download_range(url, file_path, 0, None if size is None else size - 1, supports_ranges, resumes)
+
+        downloaded_size = os.path.getsize(file_path)
+        if size is not None and downloaded_size != size:
+            raise DownloadError(url, f"expected {size} bytes, but received {downloaded_size}")
+        if expected_md5 is not None and Downloader.get_file_md5(file_path) != expected_md5:
+            raise DownloadError(url, "MD5 hash does not match")
+        return self.add_metrics(url, downloaded_size, time.time() - start, resumes[0], nb_of_segments)
+
+    def open_stream(self, url: str):
+        """
+        Returns a file-like object that reads the file at the given url as it is downloaded, resuming transparently
+        if the connection drops. The length and hash are verified when the end of the file is read.
+        """
+        size, supports_ranges, expected_md5 = self.probe(url)
+        return ResumableStream(self, url, size, supports_ranges, expected_md5)
+
+    def probe(self, url: str):
+        """
+        Requests the first byte of the given url to find out its size, whether range requests are supported, and its
+        expected MD5 hash.
+        """
+        with self.session.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=self.timeout) as response:
+            if not response.ok:
+                raise DownloadError(url, f"status code {response.status_code}")
+            expected_md5 = Downloader.get_expected_md5(response)
+            if response.status_code == 206 and "/" in response.headers.get("Content-Range", ""):
+                size = response.headers["Content-Range"].split("/")[-1]
+                return (int(size) if size.isdigit() else None), True, expected_md5
+            size = response.headers.get("Content-Length")
+            return (int(size) if size is not None and size.isdigit() else None), False, expected_md5
+
+    def download_range(self, url: str, file_path: str, first: int, last: int, supports_ranges: bool, resumes: list):
+        """
+        Writes the bytes first to last (inclusive, or until the end if last is None) of the given url to the same
+        positions in file_path, resuming from the last written byte after connection errors.
+        """
+        position = first
+        tries = 0
+        with open(file_path, "r+b") as file:
+            while last is None or position <= last:
+                headers = {}
+                if supports_ranges:
+                    headers["Range"] = "bytes=%i-%s" % (position, "" if last is None else last)
+                elif position > first:
+                    raise DownloadError(url, "connection dropped and the server does not support resuming")
+                try:
+                    with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                        if not response.ok:
+                            raise DownloadError(url, f"status code {response.status_code}")
+                        if supports_ranges:
+                            Downloader.check_range_response(url, response, position)
+                        file.seek(position)
+                        for chunk in response.iter_content(CHUNK_SIZE):
+                            file.write(chunk)
+                            position += len(chunk)
+                    if last is None:
+                        break
+                    if position <= last:
+                        raise requests.exceptions.ChunkedEncodingError("Response ended prematurely")
+                except RESUMABLE_ERRORS as e:
+                    tries += 1
+                    if tries > self.max_resumes or not supports_ranges:
+                        raise DownloadError(url, str(e)) from e
+                    self.logger.warning(f"Download of '{url}' interrupted at byte {position}, resuming ({e})")
+                    resumes[0] += 1
+
+    @staticmethod
+    def check_range_response(url: str, response, first: int):
+        """
+        Raises a DownloadError unless the given response holds the requested range starting at byte first, so that a
+        server that ignores the Range header (and sends the file from the start) does not corrupt the download.
+        """
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code != 206 or not content_range.startswith("bytes %i-" % first):
+            raise DownloadError(
+                url, f"range request from byte {first} was answered with status code {response.status_code} and "
+                     f"Content-Range '{content_range}'")
+
+    def add_metrics(self, url: str, size: int, duration: float, resumes: int, nb_of_segments: int) -> dict:
+        metrics = {
+            "url": url,
+            "size": size,
+            "duration": duration,
+            "throughput": size / duration if duration > 0 else 0,
+            "resumes": resumes,
+            "segments": nb_of_segments,
+        }
+        with self.metrics_lock:
+            self.metrics.append(metrics)
+        self.logger.info("Downloaded %.1f MB in %.1fs (%.1f MB/s, %i segments, %i resumes)" % (
+            size / 1024 ** 2, duration, metrics["throughput"] / 1024 ** 2, nb_of_segments, resumes))
+        return metrics
+
+    def get_metrics(self) -> list:
+        with self.metrics_lock:
+            return list(self.metrics)
+
+    @staticmethod
+    def get_expected_md5(response):
+        # Google Cloud Storage reports the hashes of the whole object, e.g. 'crc32c=n03x6A==,md5=Ojk9c3dhfxgoKVVHYwFbHQ=='
+        for value in response.headers.get("x-goog-hash", "").split(","):
+            if value.strip().startswith("md5="):
+                return base64.b64decode(value.strip()[len("md5="):]).hex()
+        return None
+
+    @staticmethod
+    def get_file_md5(file_path: str) -> str:
+        md5 = hashlib.md5()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+                md5.update(chunk)
+        return md5.hexdigest()
+
+
+class ResumableStream:
+    """
+    Readable, non-seekable file object over an HTTP download that resumes with a range request when the connection
+    drops.
+    """
+
+    def __init__(self, downloader: Downloader, url: str, size: int, supports_ranges: bool, expected_md5: str):
+        self.downloader = downloader
+        self.url = url
+        self.size = size
+        self.supports_ranges = supports_ranges
+        self.expected_md5 = expected_md5
+        self.md5 = hashlib.md5()
+        self.position = 0
+        self.resumes = 0
+        self.start = time.time()
+        self.response = None
+        self.is_verified = False
+
+    def read(self, size: int = -1) -> bytes:
+        while True:
+            try:
+                if self.response is None:
+                    self.open()
+                data = self.response.raw.read(None if size is None or size < 0 else size, decode_content=True)
+                if not data and size != 0 and self.size is not None and self.position < self.size:
+                    raise requests.exceptions.ChunkedEncodingError("Response ended prematurely")
+                break
+            except RESUMABLE_ERRORS + (Urllib3HTTPError,) as e:
+                self.close()
+                self.resumes += 1
+                if self.resumes > self.downloader.max_resumes or not self.supports_ranges:
+                    raise DownloadError(self.url, str(e)) from e
+                self.downloader.logger.warning(
+                    f"Download of '{self.url}' interrupted at byte {self.position}, resuming ({e})")
+        if data:
+            self.position += len(data)
+            self.md5.update(data)
+        elif not self.is_verified and (size is None or size != 0):
+            self.verify()
+        return data
+
+    def open(self):
+        headers = {"Range": "bytes=%i-" % self.position} if self.position > 0 else {}
+        response = self.downloader.session.get(self.url, headers=headers, stream=True, timeout=self.downloader.timeout)
+        try:
+            if not response.ok:
+                raise DownloadError(self.url, f"status code {response.status_code}")
+            if self.position > 0:
+                Downloader.check_range_response(self.url, response, self.position)
+        except DownloadError:
+            response.close()
+            raise
+        self.response = response
+
+    def finish(self):
+        """
+        Reads the remainder of the file, which consumers of the stream might have left unread, and verifies it.
+        """
+        while not self.is_verified:
+            self.read(CHUNK_SIZE)
+
+    def verify(self):
+        self.is_verified = True
+        if self.size is not None and self.position != self.size:
+            raise DownloadError(self.url, f"expected {self.size} bytes, but received {self.position}")
+        if self.expected_md5 is not None and self.md5.hexdigest() != self.expected_md5:
+            raise DownloadError(self.url, "MD5 hash does not match")
+        self.downloader.add_metrics(self.url, self.position, time.time() - self.start, self.resumes, 1)
+
+    def close(self):
+        if self.response is not None:
+            self.response.close()
+            self.response = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
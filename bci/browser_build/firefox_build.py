@@ -1,11 +1,10 @@
 import os
-import shutil
-import tarfile
 import re
 import requests
-from bci import util
 from bci import cli
+from bci.browser_build import archive
 from bci.browser_build.browser_build import BrowserBuild
+from bci.browser_build.downloader import Downloader
 from bci.version_control.firefox_vc import FirefoxRepo, FirefoxRepoState
 from bci.data_storage.mongodb import MongoDB
 
@@ -82,6 +81,12 @@ class FirefoxBuild(BrowserBuild):
             return True
         return MongoDB.has_binary_available_online("firefox", changeset_id)
 
+    def get_available_state_ids_online(self, state_ids) -> set:
+        if self.only_releases:
+            return set(state_ids)
+        stored_state_ids = set(document["state_id"] for document in MongoDB.get_stored_binary_availability("firefox"))
+        return set(state_id for state_id in state_ids if state_id in stored_state_ids)
+
     def download_snapshot(self, state_id: int = None, state: FirefoxRepoState = None):
         if state is None and state_id is None:
             raise AttributeError("At least the state_id or state is required as a parameter")
@@ -96,31 +101,23 @@ class FirefoxBuild(BrowserBuild):
         else:
             binary_url = MongoDB.get_binary_url("firefox", changeset_id)
         self.logger.debug(f"Downloading {changeset_id} from '{binary_url}'")
-        tar_file_path = "/tmp/%s/archive.tar.bz2" % changeset_id
-        if os.path.exists(os.path.dirname(tar_file_path)):
-            shutil.rmtree(os.path.dirname(tar_file_path))
-        os.makedirs(os.path.dirname(tar_file_path))
-        with requests.get(binary_url, stream=True) as req:
-            with open(tar_file_path, 'wb') as file:
-                shutil.copyfileobj(req.raw, file)
-        with tarfile.open(tar_file_path, "r:bz2") as tar_ref:
-            tar_ref.extractall(os.path.dirname(tar_file_path))
-        bin_path = self.get_potential_bin_path(changeset_id)
-        os.makedirs(os.path.dirname(bin_path), exist_ok=True)
-        unzipped_folder_path = os.path.join(os.path.dirname(tar_file_path), "firefox")
-        util.safe_move_dir(unzipped_folder_path, os.path.dirname(bin_path))
-        cli.execute_and_return_status("chmod -R a+x %s" % os.path.dirname(bin_path))
-        cli.execute_and_return_status("chmod -R a+w %s" % os.path.dirname(bin_path))
-        # Remove temporary files in /tmp/COMMIT_POS
-        shutil.rmtree(os.path.dirname(tar_file_path))
-        # Add policy.json to prevent updating. (this measure is effective from version 60)
-        # https://github.com/mozilla/policy-templates/blob/master/README.md
-        # (For earlier versions, the prefs.js file is used)
-        distributions_path = os.path.join(os.path.dirname(bin_path), "distribution")
-        os.makedirs(distributions_path, exist_ok=True)
-        policies_path = os.path.join(distributions_path, "policies.json")
-        with open(policies_path, "a") as file:
-            file.write('{ "policies": { "DisableAppUpdate": true } }')
+
+        def install(folder_path):
+            # The archive is extracted while it is downloaded, adding the permissions that were set with
+            # chmod -R a+x and chmod -R a+w before
+            with Downloader.get_instance().open_stream(binary_url) as stream:
+                archive.extract_tar_stream(stream, folder_path, "bz2", root="firefox", mode_bits=0o333)
+                stream.finish()
+            # Add policy.json to prevent updating. (this measure is effective from version 60)
+            # https://github.com/mozilla/policy-templates/blob/master/README.md
+            # (For earlier versions, the prefs.js file is used)
+            distributions_path = os.path.join(folder_path, "distribution")
+            os.makedirs(distributions_path, exist_ok=True)
+            policies_path = os.path.join(distributions_path, "policies.json")
+            with open(policies_path, "a") as file:
+                file.write('{ "policies": { "DisableAppUpdate": true } }')
+
+        self.binary_cache.install(changeset_id, install)
 
     def post_build_step(self, state):
         # Save release revision id
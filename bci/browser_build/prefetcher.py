@@ -0,0 +1,65 @@
+import logging
+import threading
+from bci.browser_build.browser_build import BrowserBuild
+from bci.browser_build.binary_installer import BinaryInstaller
+from bci.search_strategy.sequence_strategy import SequenceStrategy
+from bci.version_control.version_control import RepoState
+
+
+class BinaryPrefetcher:
+    """
+    Downloads the binaries of the states that the search strategy is likely to evaluate next into the binary cache,
+    while the current batch of states is being evaluated. The downloads are handed to the binary installer, so that
+    several binaries are downloaded at once and a dispatched state only waits for its own download. Binaries that are
+    no longer upcoming are left to the eviction policy of the binary cache, and nothing is prefetched while the cache
+    is full.
+    """
+
+    interval = 5
+
+    def __init__(self, installer: BinaryInstaller, search_strategy: SequenceStrategy, lookahead: int, skipped_state_ids=()) -> None:
+        """
+        :param installer: installer used to download the binaries
+        :param search_strategy: search strategy that is queried for upcoming states
+        :param lookahead: maximum number of upcoming states to prefetch
+        :param skipped_state_ids: ids of states that will not be handed to a worker (e.g. because they were already evaluated)
+        """
+        self.logger = logging.getLogger("bci")
+        self.installer = installer
+        self.browser_build = installer.browser_build
+        self.binary_cache = installer.binary_cache
+        self.search_strategy = search_strategy
+        self.lookahead = lookahead
+        self.skipped_state_ids = skipped_state_ids
+        self.should_stop = threading.Event()
+        self.thread = threading.Thread(target=self.prefetch_loop)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.should_stop.set()
+        self.thread.join()
+
+    def prefetch_loop(self):
+        while not self.should_stop.wait(self.interval):
+            try:
+                upcoming_states = self.search_strategy.get_upcoming_values(self.lookahead)
+                self.binary_cache.evict(protected_state_ids=[state.id for state in upcoming_states])
+                for state in upcoming_states:
+                    if self.should_stop.is_set():
+                        break
+                    self.prefetch(state)
+            except Exception:
+                self.logger.error("An error occurred while prefetching binaries", exc_info=True)
+
+    def prefetch(self, state: RepoState):
+        if state.id in self.skipped_state_ids or self.installer.is_installing(state):
+            return
+        if self.browser_build.has_available_snapshot_locally(state.id):
+            return
+        if self.binary_cache.get_size() >= self.binary_cache.budget:
+            self.logger.debug(f"Binary cache is full, not prefetching {state.id}")
+            return
+        self.logger.debug(f"Prefetching binary of {state.id}")
+        self.installer.install(state)
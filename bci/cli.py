@@ -5,9 +5,9 @@ import shlex
 logger = logging.getLogger("cli")
 
 
-def execute(command, cwd=None, timeout=None, max_tries=None):
+def execute(command, cwd=None, timeout=None, max_tries=None, env=None):
     if timeout is None and max_tries is None:
-        subprocess.check_output(command.split(" "), cwd=cwd)
+        subprocess.check_output(command.split(" "), cwd=cwd, env=env)
         return True
 
     if timeout is None:
@@ -18,7 +18,7 @@ def execute(command, cwd=None, timeout=None, max_tries=None):
     while tries < max_tries:
         tries += 1
         try:
-            subprocess.check_output(command.split(" "), cwd=cwd, timeout=timeout * 60)
+            subprocess.check_output(command.split(" "), cwd=cwd, timeout=timeout * 60, env=env)
             return True
         except subprocess.TimeoutExpired:
             if logger:
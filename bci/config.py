@@ -10,6 +10,11 @@ class Config:
     evaluation_jar_path = None
     custom_test_folder = None
     custom_page_folder = None
+    binary_cache_budget = 0
+    mech_group_parallelism = 1
+    shared_binary_store = False
+    jar_java_options = []
+    jar_stall_timeout = None
 
     firefox_repo_path = None
     chromium_repo_path = None
@@ -91,6 +96,16 @@ class Config:
         Config.evaluation_jar_path = config["evaluation_jar"]
         Config.custom_test_folder = config["custom_test_folder"]
         Config.custom_page_folder = config["custom_page_folder"]
+        if "binary_cache_budget_gb" in config:
+            Config.binary_cache_budget = int(config["binary_cache_budget_gb"] * 1024 ** 3)
+        if "shared_binary_store" in config:
+            Config.shared_binary_store = bool(config["shared_binary_store"])
+        if "mech_group_parallelism" in config:
+            Config.mech_group_parallelism = int(config["mech_group_parallelism"])
+        if config.get("jar_java_options"):
+            Config.jar_java_options = list(config["jar_java_options"])
+        if config.get("jar_stall_timeout") is not None:
+            Config.jar_stall_timeout = int(config["jar_stall_timeout"])
 
         for browser in browsers:
             if browser not in config:
@@ -0,0 +1,63 @@
+import logging
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+
+class IndexManager:
+    """
+    Declares the indexes of every collection and builds them idempotently, so that the queries issued by MongoDB are
+    covered by an index instead of scanning the collection.
+    """
+
+    result_indexes = [
+        # Equality filters of MongoDB.has_data, MongoDB.get_data and DatabaseParams.to_mongodb_query, in that order.
+        # The additional_cli_options filter ($size/$all) cannot use an index and is applied on the matched documents.
+        IndexModel(
+            [
+                ("state_id", ASCENDING),
+                ("browser_automation", ASCENDING),
+                ("browser_config", ASCENDING),
+                ("mech_group", ASCENDING),
+                ("extension_name", ASCENDING),
+            ],
+            name="state_evaluation_lookup"
+        ),
+    ]
+
+    binary_availability_indexes = [
+        IndexModel([("state_id", ASCENDING)], name="state_id_1"),
+        # MongoDB.get_stored_binary_availability
+        IndexModel([("binary_online", ASCENDING), ("build_id", DESCENDING)], name="online_by_build_id"),
+    ]
+
+    @staticmethod
+    def get_index_models(collection_name: str) -> list:
+        if collection_name.endswith("_binary_availability"):
+            return IndexManager.binary_availability_indexes
+        return IndexManager.result_indexes
+
+    @staticmethod
+    def ensure_indexes(collection):
+        """
+        Builds the declared indexes of the given collection, indexes that already exist are left untouched.
+        """
+        try:
+            collection.create_indexes(IndexManager.get_index_models(collection.name))
+        except OperationFailure:
+            logging.getLogger("bci").error(f"Could not build indexes of collection '{collection.name}'", exc_info=True)
+
+    @staticmethod
+    def get_index_usage(collection) -> list:
+        """
+        Returns the usage of each index of the given collection since it was (re)built, as reported by $indexStats.
+        """
+        return [
+            {
+                "collection": collection.name,
+                "index": stats["name"],
+                "key": dict(stats["key"]),
+                "ops": stats["accesses"]["ops"],
+                "since": str(stats["accesses"]["since"]),
+            }
+            for stats in collection.aggregate([{"$indexStats": {}}])
+        ]
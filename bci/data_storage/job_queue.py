@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+from pymongo import ASCENDING, ReturnDocument
+from bci.data_storage import mongodb
+from bci.params import WorkerParams
+
+
+class JobQueue:
+    """
+    MongoDB-backed queue through which the master hands out evaluation jobs to long-lived worker containers.
+    Every evaluation run uses its own queue id, so that jobs of different runs never mix.
+    """
+
+    collection_name = "worker_jobs"
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    COLLECTED = "collected"
+
+    def __init__(self, queue_id: str):
+        self.queue_id = queue_id
+        self.collection = mongodb.DB[self.collection_name]
+        self.collection.create_index([("queue_id", ASCENDING), ("status", ASCENDING)])
+
+    def push(self, params: WorkerParams):
+        document = {
+            "queue_id": self.queue_id,
+            "status": JobQueue.PENDING,
+            "params": params.to_dict(),
+            "ts": JobQueue.get_timestamp()
+        }
+        return self.collection.insert_one(document).inserted_id
+
+    def push_stop_signals(self, nb_of_workers: int):
+        """
+        Pushes one stop signal per worker, which are handed out only after all pending jobs.
+        """
+        self.collection.insert_many([
+            {
+                "queue_id": self.queue_id,
+                "status": JobQueue.PENDING,
+                "params": None,
+                "ts": JobQueue.get_timestamp()
+            }
+            for _ in range(nb_of_workers)
+        ])
+
+    def pop(self, worker_name: str):
+        """
+        Claims the oldest pending job for the given worker.
+
+        :param worker_name: name of the worker claiming the job
+        :return: None if no job is pending, otherwise a tuple of the job id and its WorkerParams (which are None if the
+        job is a stop signal).
+        """
+        document = self.collection.find_one_and_update(
+            {"queue_id": self.queue_id, "status": JobQueue.PENDING},
+            {"$set": {"status": JobQueue.RUNNING, "worker": worker_name, "started_ts": JobQueue.get_timestamp()}},
+            sort=[("_id", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+        if document is None:
+            return None
+        params = WorkerParams.from_dict(document["params"]) if document["params"] is not None else None
+        return document["_id"], params
+
+    def complete(self, job_id, success: bool):
+        self.collection.update_one(
+            {"_id": job_id},
+            {"$set": {"status": JobQueue.DONE if success else JobQueue.FAILED, "finished_ts": JobQueue.get_timestamp()}}
+        )
+
+    def fail_running_jobs(self, worker_name: str):
+        """
+        Marks the jobs that were claimed by the given worker as failed (e.g. because its container exited unexpectedly).
+        """
+        self.collection.update_many(
+            {"queue_id": self.queue_id, "worker": worker_name, "status": JobQueue.RUNNING, "params": {"$ne": None}},
+            {"$set": {"status": JobQueue.FAILED, "finished_ts": JobQueue.get_timestamp()}}
+        )
+
+    def fail_pending_jobs(self):
+        """
+        Marks all jobs that were not claimed by a worker yet as failed (e.g. because no worker is left to claim them).
+        """
+        self.collection.update_many(
+            {"queue_id": self.queue_id, "status": JobQueue.PENDING, "params": {"$ne": None}},
+            {"$set": {"status": JobQueue.FAILED, "finished_ts": JobQueue.get_timestamp()}}
+        )
+
+    def cancel_pending_jobs(self):
+        """
+        Removes all jobs that were not claimed by a worker yet, including stop signals.
+        """
+        self.collection.delete_many({"queue_id": self.queue_id, "status": JobQueue.PENDING})
+
+    def collect_finished(self) -> list:
+        """
+        Returns the (job id, success) tuples of all jobs that finished since the previous call.
+        """
+        documents = list(self.collection.find(
+            {"queue_id": self.queue_id, "status": {"$in": [JobQueue.DONE, JobQueue.FAILED]}},
+            {"_id": True, "status": True}
+        ))
+        if len(documents) == 0:
+            return []
+        self.collection.update_many(
+            {"_id": {"$in": [document["_id"] for document in documents]}},
+            {"$set": {"status": JobQueue.COLLECTED}}
+        )
+        return [(document["_id"], document["status"] == JobQueue.DONE) for document in documents]
+
+    def remove(self):
+        self.collection.delete_many({"queue_id": self.queue_id})
+
+    @staticmethod
+    def get_timestamp():
+        return str(datetime.now(timezone.utc).replace(microsecond=0))
@@ -1,15 +1,24 @@
 import os
 import logging
-from abc import ABC, abstractmethod
-from datetime import datetime, timezone
+from itertools import islice
+from abc import ABC
+from datetime import datetime, timedelta, timezone
 from pymongo import MongoClient, UpdateOne
-from pymongo.errors import ServerSelectionTimeoutError
-from bci.version_control.version_control import RepoState
+from pymongo.errors import CollectionInvalid, ServerSelectionTimeoutError
+from bci.version_control.version_control import RepoState, StateIdRange
 from bci.params import DatabaseParams
+from bci.data_storage.index_manager import IndexManager
+from bci.data_storage.result_writer import ResultWriter
 
 # pylint: disable=global-statement
 CLIENT = None
 DB = None
+# Collection handles that were validated (and indexed) once, by collection name
+COLLECTIONS = {}
+# Names of the collections that existed when the collection registry was last refreshed
+COLLECTION_NAMES = set()
+# Firefox build ids by state id, these never change once a binary is published
+FIREFOX_BUILD_IDS = {}
 
 
 class MongoDB(ABC):
@@ -19,6 +28,17 @@ class MongoDB(ABC):
         "chromium": "chromium_binary_availability",
         "firefox": "firefox_central_binary_availability"
     }
+    binary_availability_index_collection_name = "binary_availability_index"
+
+    result_lookup_chunk_size = 5000
+    """
+    Maximum number of state ids in the $in list of a single result lookup.
+    """
+
+    data_collection_names = {}
+    """
+    Names of the collections holding evaluation results, by browser name. Should be set by subclasses.
+    """
 
     def __init__(self):
         self.client = CLIENT
@@ -32,7 +52,13 @@ class MongoDB(ABC):
         return cls.instance
 
     @staticmethod
-    def connect():
+    def connect(db_classes=()):
+        """
+        Connects to the database and initializes the collections of the given MongoDB classes, the collections of
+        other classes are initialized on first use.
+
+        :param db_classes: MongoDB classes of the evaluation frameworks that will be used
+        """
         global CLIENT, DB
         if not os.environ['bci_mongo_host'] or \
                 not os.environ['bci_mongo_database'] or \
@@ -59,6 +85,7 @@ class MongoDB(ABC):
         except ServerSelectionTimeoutError as e:
             logging.getLogger("bci").critical("Could not connect to database", exc_info=True)
             raise ServerException from e
+        MongoDB.initialize_collections(db_classes)
 
     @staticmethod
     def disconnect():
@@ -66,6 +93,60 @@ class MongoDB(ABC):
         CLIENT.close()
         CLIENT = None
         DB = None
+        COLLECTIONS.clear()
+        COLLECTION_NAMES.clear()
+
+    @staticmethod
+    def initialize_collections(db_classes=()):
+        """
+        Validates (or creates) the binary availability collections and the data collections of the given MongoDB
+        classes, and creates the indexes the queries rely on, so that this does not have to be done for every query.
+        """
+        MongoDB.refresh_collection_names()
+        collection_names = list(MongoDB.binary_availability_collection_names.values())
+        for db_class in db_classes:
+            collection_names.extend(db_class.data_collection_names.values())
+        for collection_name in collection_names:
+            MongoDB.get_collection(collection_name)
+
+    @staticmethod
+    def refresh_collection_names():
+        COLLECTION_NAMES.clear()
+        COLLECTION_NAMES.update(DB.list_collection_names())
+
+    @staticmethod
+    def get_collection(collection_name: str):
+        """
+        Returns the handle of the given collection. The collection is validated and indexed only the first time its
+        handle is requested, and created if it does not exist yet (e.g. in a fresh database).
+        """
+        if collection_name in COLLECTIONS:
+            return COLLECTIONS[collection_name]
+        if collection_name not in COLLECTION_NAMES:
+            # The collection might have been created after the registry was last refreshed
+            MongoDB.refresh_collection_names()
+            if collection_name not in COLLECTION_NAMES:
+                logging.getLogger("bci").info(f"Creating collection '{collection_name}'")
+                try:
+                    DB.create_collection(collection_name)
+                except CollectionInvalid:
+                    # Another process created the collection in the meantime
+                    pass
+                COLLECTION_NAMES.add(collection_name)
+        collection = DB[collection_name]
+        IndexManager.ensure_indexes(collection)
+        COLLECTIONS[collection_name] = collection
+        return collection
+
+    @staticmethod
+    def get_index_usage() -> list:
+        """
+        Returns the usage statistics of the indexes of all registered collections.
+        """
+        index_usage = []
+        for collection in COLLECTIONS.values():
+            index_usage.extend(IndexManager.get_index_usage(collection))
+        return index_usage
 
     def store_data(self, automation: str, browser_name: str, browser_version: str, driver_version: str, browser_setting: str,
                    extension_name: str, additional_cli_options: list, state: RepoState, mech_group: str, json_data,
@@ -83,7 +164,7 @@ class MongoDB(ABC):
         :param mech_group:
         :param json_data:
         :param is_dirty_evaluation:
-        :return: None
+        :return: the stored document
         """
         collection = self.get_data_collection(browser_name)
 
@@ -121,7 +202,21 @@ class MongoDB(ABC):
         if len(additional_cli_options) > 0:
             document["additional_cli_options"] = additional_cli_options
 
-        collection.insert_one(document)
+        ResultWriter.get_instance().add(collection, document)
+        return document
+
+    @staticmethod
+    def flush_data():
+        """
+        Writes all buffered evaluation data to the database, blocking until it is acknowledged.
+        """
+        if ResultWriter.instance is not None:
+            ResultWriter.instance.flush()
+
+    @staticmethod
+    def close_data_writer():
+        if ResultWriter.instance is not None:
+            ResultWriter.instance.close()
 
     def get_data(
             self, automation: str, browser_name: str, browser_setting: str, extension_name: str,
@@ -145,18 +240,19 @@ class MongoDB(ABC):
         with the given mech_id was not covered in the evaluation.
         """
         collection = self.get_data_collection(browser_name)
-        search_criteria =\
-            {'state_id': int(state.id) if state.id.isdigit() else state.id,
-             'browser_automation': automation,
-             'browser_config': browser_setting,
-             'mech_group': mech_group}
-        if extension_name:
-            search_criteria["extension_name"] = extension_name
-        if len(additional_cli_options) > 0:
-            search_criteria["additional_cli_options"] = {"$size": len(additional_cli_options), "$all": additional_cli_options}
+        search_criteria = MongoDB.get_search_criteria(automation, browser_setting, extension_name, additional_cli_options, state)
+        search_criteria["mech_group"] = mech_group
         document = collection.find_one(search_criteria)
         if document is None:
             raise AttributeError("Could not find document for '%s'" % str(search_criteria))
+        return MongoDB.get_outcome_from_document(document, mech_id, cookie_name)
+
+    @staticmethod
+    def get_outcome_from_document(document: dict, mech_id: str, cookie_name: str):
+        """
+        Returns the outcome of the mechanism associated with the given mech_id in the given result document, as
+        described in get_data.
+        """
         if "results" not in document:
             return None
         if document["results"] is None:
@@ -172,17 +268,39 @@ class MongoDB(ABC):
     def has_data(self, automation: str, browser_name: str, browser_setting: str, extension_name: str,
                  additional_cli_options: str, mech_group: str, state: RepoState):
         collection = self.get_data_collection(browser_name)
+        search_criteria = MongoDB.get_search_criteria(automation, browser_setting, extension_name, additional_cli_options, state)
+        search_criteria["mech_group"] = mech_group
+        document = collection.find_one(search_criteria)
+        return document is not None
+
+    def get_data_per_mech_group(self, automation: str, browser_name: str, browser_setting: str, extension_name: str,
+                                additional_cli_options: list, mech_groups: list, state: RepoState) -> dict:
+        """
+        Returns the result documents of all given mech groups that were already evaluated for the given state, using
+        a single query.
+
+        :return: dictionary of mech group to result document, mech groups that were not evaluated are left out.
+        """
+        collection = self.get_data_collection(browser_name)
+        search_criteria = MongoDB.get_search_criteria(automation, browser_setting, extension_name, additional_cli_options, state)
+        search_criteria["mech_group"] = {"$in": list(mech_groups)}
+        documents = {}
+        for document in collection.find(search_criteria):
+            documents.setdefault(document["mech_group"], document)
+        return documents
+
+    @staticmethod
+    def get_search_criteria(automation: str, browser_setting: str, extension_name: str, additional_cli_options: list,
+                            state: RepoState) -> dict:
         search_criteria =\
             {'state_id': int(state.id) if state.id.isdigit() else state.id,
              'browser_automation': automation,
-             'browser_config': browser_setting,
-             'mech_group': mech_group}
+             'browser_config': browser_setting}
         if extension_name:
             search_criteria["extension_name"] = extension_name
         if len(additional_cli_options) > 0:
             search_criteria["additional_cli_options"] = {"$size": len(additional_cli_options), "$all": additional_cli_options}
-        document = collection.find_one(search_criteria)
-        return document is not None
+        return search_criteria
 
     def get_data_with_params(self, params: DatabaseParams):
         collection = self.get_data_collection(params.browser_name)
@@ -190,17 +308,115 @@ class MongoDB(ABC):
         document = collection.find_one(query)
         if document is None:
             raise AttributeError("Could not find document for '%s'" % str(query))
-        if "results" not in document:
-            return None
-        if document["results"] is None:
+        return MongoDB.get_outcome_from_results(document.get("results"), params)
+
+    @staticmethod
+    def get_outcome_from_results(results: dict, params: DatabaseParams):
+        if results is None:
             return None
-        if params.mech_id not in document["results"]:
+        if params.mech_id not in results:
             return False
-        output_line = document["results"][params.mech_id]
+        return MongoDB.get_outcome_from_output_line(results[params.mech_id], params.cookie_name)
+
+    @staticmethod
+    def get_outcomes_from_results(results_list: list, params: DatabaseParams):
+        """
+        Returns the outcome of every mechanism in the given results (of the mech groups of one state), or None if none
+        of the mech groups has results.
+        """
+        results_list = [results for results in results_list if results is not None]
+        if not results_list:
+            return None
+        outcomes = {}
+        for results in results_list:
+            for mech_id, output_line in results.items():
+                outcomes[mech_id] = MongoDB.get_outcome_from_output_line(output_line, params.cookie_name)
+        return outcomes
 
-        if params.cookie_name is None:
+    @staticmethod
+    def get_outcome_from_output_line(output_line: str, cookie_name: str) -> bool:
+        if cookie_name is None:
             return "true" in output_line
-        return params.cookie_name in output_line
+        return cookie_name in output_line
+
+    def get_outcomes_with_params(self, params: DatabaseParams):
+        """
+        Returns the outcome of every mechanism in the result documents of the state of the given parameters, as
+        described in get_outcomes_from_results.
+        """
+        collection = self.get_data_collection(params.browser_name)
+        query = params.to_mongodb_query()
+        documents = list(collection.find(query))
+        if not documents:
+            raise AttributeError("Could not find document for '%s'" % str(query))
+        return MongoDB.get_outcomes_from_results([document.get("results") for document in documents], params)
+
+    def get_all_data_with_params(self, params: DatabaseParams, state_ids) -> dict:
+        """
+        Returns the outcomes of all given states for which every requested mech group was already evaluated, resolved
+        with a single aggregation instead of a query per state.
+
+        :param params: parameters of the evaluation (the state id of the parameters is ignored)
+        :param state_ids: ids of the states to look up, as described in get_results_per_state
+        :return: dictionary of state id to outcome (which is None if no mech_id is given in the parameters)
+        """
+        outcomes = {}
+        for group in self.get_results_per_state(params, state_ids):
+            outcome = None
+            if params.mech_id is not None:
+                # Prefer the results of the mech group to which the mech_id belongs
+                results_with_mech_id = [results for results in group["results"] if results and params.mech_id in results]
+                results = results_with_mech_id[0] if results_with_mech_id else group["results"][0]
+                outcome = MongoDB.get_outcome_from_results(results, params)
+            outcomes[str(group["_id"])] = outcome
+        return outcomes
+
+    def get_all_outcomes_with_params(self, params: DatabaseParams, state_ids) -> dict:
+        """
+        Returns the outcomes of every mechanism for all given states for which every requested mech group was already
+        evaluated.
+
+        :return: dictionary of state id to the outcomes as described in get_outcomes_from_results
+        """
+        return {
+            str(group["_id"]): MongoDB.get_outcomes_from_results(group["results"], params)
+            for group in self.get_results_per_state(params, state_ids)
+        }
+
+    def get_results_per_state(self, params: DatabaseParams, state_ids):
+        """
+        Yields the results of all mech groups per state, for the given states of which every requested mech group was
+        already evaluated. The states are looked up in chunks, because a single list of all state ids of a long lineage
+        would exceed the maximum size of a BSON document. Consecutively numbered states are looked up with a single
+        range query instead.
+
+        :param state_ids: ids of the states to look up, either an iterable or a StateIdRange
+        """
+        collection = self.get_data_collection(params.browser_name)
+        if isinstance(state_ids, StateIdRange) and state_ids.positions.step == 1:
+            if len(state_ids) == 0:
+                return
+            query = params.to_mongodb_query(state_ids=())
+            query["state_id"] = {"$gte": state_ids.positions[0], "$lte": state_ids.positions[-1]}
+            yield from MongoDB.aggregate_results_per_state(collection, params, query)
+            return
+        state_id_iterator = iter(state_ids)
+        while True:
+            chunk = list(islice(state_id_iterator, self.result_lookup_chunk_size))
+            if not chunk:
+                return
+            query = params.to_mongodb_query(state_ids=chunk)
+            yield from MongoDB.aggregate_results_per_state(collection, params, query)
+
+    @staticmethod
+    def aggregate_results_per_state(collection, params: DatabaseParams, query: dict):
+        pipeline = [
+            {"$match": query},
+            {"$sort": {"_id": 1}},
+            {"$group": {"_id": "$state_id", "nb_of_documents": {"$sum": 1}, "results": {"$push": "$results"}}},
+            {"$match": {"nb_of_documents": len(params.mech_groups)}},
+        ]
+        return collection.aggregate(pipeline, allowDiskUse=True)
 
     def has_all_data_with_params(self, params: DatabaseParams):
         collection = self.get_data_collection(params.browser_name)
@@ -208,16 +424,12 @@ class MongoDB(ABC):
         nb_of_documents = collection.count_documents(query)
         return nb_of_documents == len(params.mech_groups)
 
-    @abstractmethod
     def get_data_collection(self, browser_name: str):
-        pass
+        return MongoDB.get_collection(self.data_collection_names[browser_name])
 
     @staticmethod
     def get_binary_availability_collection(browser_name: str):
-        collection_name = MongoDB.binary_availability_collection_names[browser_name]
-        if collection_name not in DB.collection_names():
-            raise AttributeError("Collection '%s' not found in database" % collection_name)
-        return DB[collection_name]
+        return MongoDB.get_collection(MongoDB.binary_availability_collection_names[browser_name])
 
     # Caching of online binary availability
 
@@ -303,8 +515,66 @@ class MongoDB(ABC):
         if len(bulk_update) > 0:
             collection.bulk_write(bulk_update)
 
+    @staticmethod
+    def get_binary_availability_index(browser: str):
+        """
+        Returns the stored availability index of the given browser as a tuple of its packed state ids and the
+        timestamp at which it was built, or None if no index is stored.
+        """
+        collection = DB[MongoDB.binary_availability_index_collection_name]
+        document = collection.find_one({"browser": browser})
+        if document is None or "state_ids" not in document:
+            return None
+        return document["state_ids"], document["ts"]
+
+    @staticmethod
+    def store_binary_availability_index(browser: str, packed_state_ids: bytes):
+        collection = DB[MongoDB.binary_availability_index_collection_name]
+        collection.update_one(
+            {
+                "browser": browser
+            },
+            {
+                "$set": {
+                    "browser": browser,
+                    "state_ids": packed_state_ids,
+                    "ts": datetime.now(timezone.utc).replace(microsecond=0)
+                }
+            },
+            upsert=True
+        )
+
+    @staticmethod
+    def acquire_binary_availability_index_lease(browser: str, duration: timedelta) -> bool:
+        """
+        Acquires the lease to rebuild the availability index of the given browser, unless another process holds a
+        lease that has not expired yet.
+
+        :return: True if the lease is acquired
+        """
+        collection = DB[MongoDB.binary_availability_index_collection_name]
+        now = datetime.now(timezone.utc)
+        collection.update_one({"browser": browser}, {"$setOnInsert": {"browser": browser}}, upsert=True)
+        document = collection.find_one_and_update(
+            {
+                "browser": browser,
+                "$or": [{"lease_expiration": {"$exists": False}}, {"lease_expiration": {"$lt": now}}]
+            },
+            {
+                "$set": {"lease_expiration": now + duration}
+            }
+        )
+        return document is not None
+
+    @staticmethod
+    def release_binary_availability_index_lease(browser: str):
+        collection = DB[MongoDB.binary_availability_index_collection_name]
+        collection.update_one({"browser": browser}, {"$unset": {"lease_expiration": ""}})
+
     @staticmethod
     def get_build_id_firefox(state_id):
+        if state_id in FIREFOX_BUILD_IDS:
+            return FIREFOX_BUILD_IDS[state_id]
         collection = MongoDB.get_binary_availability_collection("firefox")
 
         result = collection.find_one({
@@ -316,8 +586,11 @@ class MongoDB(ABC):
         # Result can only be None if the binary associated with the state_id is artisanal:
         # This state_id will not be included in the binary_availability_collection and not have a build_id.
         if result is None or len(result) == 0:
-            return None
-        return result["build_id"]
+            build_id = None
+        else:
+            build_id = result["build_id"]
+        FIREFOX_BUILD_IDS[state_id] = build_id
+        return build_id
 
     @staticmethod
     def get_padded_version(version: str):
@@ -0,0 +1,130 @@
+import time
+import logging
+import threading
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ResultWriter:
+    """
+    Write-behind buffer for result documents. Documents are coalesced per collection and written with insert_many,
+    either when the buffer reaches its size threshold, when the flush interval expires, or when flush is called
+    explicitly (which should happen before a worker reports its evaluation as finished).
+    """
+
+    instance = None
+    instance_lock = threading.Lock()
+
+    def __init__(self, flush_interval: float = 5, max_batch_size: int = 100) -> None:
+        """
+        :param flush_interval: maximum number of seconds a document is kept in the buffer
+        :param max_batch_size: number of buffered documents that triggers a flush
+        """
+        self.logger = logging.getLogger("bci")
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.buffer = []
+        self.buffer_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.flush_requested = threading.Event()
+        self.should_stop = threading.Event()
+        self.nb_of_flushes = 0
+        self.nb_of_flushed_documents = 0
+        self.total_flush_latency = 0
+        self.last_flush_latency = 0
+        self.max_queue_depth = 0
+        self.thread = threading.Thread(target=self.flush_loop, daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def get_instance(cls):
+        # Evaluations of different mech groups can request the instance concurrently
+        with cls.instance_lock:
+            if cls.instance is None:
+                cls.instance = cls()
+            return cls.instance
+
+    def add(self, collection, document: dict):
+        with self.buffer_lock:
+            self.buffer.append((collection, document))
+            queue_depth = len(self.buffer)
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+        if queue_depth >= self.max_batch_size:
+            self.flush_requested.set()
+
+    @property
+    def queue_depth(self) -> int:
+        with self.buffer_lock:
+            return len(self.buffer)
+
+    def flush_loop(self):
+        while not self.should_stop.is_set():
+            self.flush_requested.wait(self.flush_interval)
+            self.flush_requested.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.logger.error("Could not flush result documents, retrying at next flush", exc_info=True)
+
+    def flush(self):
+        """
+        Writes all buffered documents and returns once they are acknowledged by the (journaled) database.
+        """
+        with self.flush_lock:
+            with self.buffer_lock:
+                buffered_documents = self.buffer
+                self.buffer = []
+            if not buffered_documents:
+                return
+            start = time.time()
+            documents_per_collection = {}
+            for collection, document in buffered_documents:
+                documents_per_collection.setdefault(collection.name, (collection, []))[1].append(document)
+            try:
+                for collection, documents in documents_per_collection.values():
+                    self.insert_documents(collection, documents)
+            except Exception:
+                with self.buffer_lock:
+                    self.buffer = buffered_documents + self.buffer
+                raise
+            self.last_flush_latency = time.time() - start
+            self.total_flush_latency += self.last_flush_latency
+            self.nb_of_flushes += 1
+            self.nb_of_flushed_documents += len(buffered_documents)
+            self.logger.debug(f"Flushed {len(buffered_documents)} result documents in {self.last_flush_latency:.3f}s")
+
+    @staticmethod
+    def insert_documents(collection, documents: list):
+        durable_collection = collection.with_options(write_concern=WriteConcern(w=1, j=True))
+        try:
+            durable_collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Documents keep the _id assigned during a previous, partially failed, attempt
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+                raise
+
+    def close(self):
+        """
+        Stops the background flushing and writes all remaining documents.
+        """
+        # Documents that are added from now on go to a new instance, which might already replace this one
+        with ResultWriter.instance_lock:
+            if ResultWriter.instance is self:
+                ResultWriter.instance = None
+        self.should_stop.set()
+        self.flush_requested.set()
+        self.thread.join()
+        self.flush()
+        self.logger.debug(f"Result writer closed: {self.get_metrics()}")
+
+    def get_metrics(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "nb_of_flushes": self.nb_of_flushes,
+            "nb_of_flushed_documents": self.nb_of_flushed_documents,
+            "last_flush_latency": self.last_flush_latency,
+            "avg_flush_latency": self.total_flush_latency / self.nb_of_flushes if self.nb_of_flushes else 0,
+        }
@@ -1,4 +1,3 @@
-
 from bci.params import WorkerParams
 
 
@@ -8,5 +7,12 @@ class Container:
         self.params = params
         self.docker_object = docker_object
 
-    def wait_until_done(self):
-        self.docker_object.wait(condition="removed")
+    def wait_until_done(self) -> int:
+        """
+        Blocks until the container has exited and returns its exit code.
+        """
+        result = self.docker_object.wait()
+        return result["StatusCode"]
+
+    def remove(self):
+        self.docker_object.remove(force=True)
@@ -1,94 +1,127 @@
 import logging
 import os
-import time
 import threading
 import docker
 import docker.errors
 from queue import Queue
 from typing import Callable
+from bci.config import Config
 from bci.params import WorkerParams
+from bci.distribution.container import Container
 
 
 class ContainerManager:
     def __init__(self, max_nb_of_containers) -> None:
         self.logger = logging.getLogger("bci")
         self.max_nb_of_containers = max_nb_of_containers
+        # Each id in the pool represents a free slot, taking an id blocks until a worker container has exited
         self.container_id_pool = Queue(maxsize=max_nb_of_containers)
         for i in range(max_nb_of_containers):
             self.container_id_pool.put(i)
+        self.container_threads = []
+        self.container_threads_lock = threading.Lock()
         self.client = docker.from_env()
 
-    def start_container(self, params: WorkerParams, cb: Callable, blocking_wait=True) -> None:
-        while (
-            blocking_wait
-            and self.get_nb_of_running_worker_containers() >= self.max_nb_of_containers
-        ):
-            time.sleep(5)
-        container_id = self.container_id_pool.get()
+    def start_container(self, params: WorkerParams, cb: Callable[[bool], None], blocking_wait=True) -> None:
+        """
+        Runs the evaluation in a new worker container. The callback is called with whether the evaluation succeeded
+        once the container has exited, also when it failed, so that the search strategy is never left waiting.
+        """
+        container_id = self.container_id_pool.get(block=blocking_wait)
         command = f"./worker.sh {self.stringify_params(params)}".split(" ")
 
         def start_container_thread():
             container_name = f"bci_worker_{container_id}"
+            success = False
             try:
-                # Sometimes, it takes a while for Docker to remove the container
-                while True:
-                    # Get all containers with same name
-                    active_containers = self.client.containers.list(
-                        all=True,
-                        ignore_removed=True,
-                        filters={
-                            "name": f"^/{container_name}$"  # The exact name has to match
-                        }
-                    )
-                    # Break loop if no container with same name is active
-                    if not active_containers:
-                        break
-                    # Remove all containers with same name (never higher than 1 in practice)
-                    for container in active_containers:
-                        self.logger.info(f"Removing old container '{container.attrs['Name']}' to start new one")
-                        container.remove(force=True)
-                self.client.containers.run(
-                    "bci_worker",
-                    name=container_name,
-                    hostname=container_name,
-                    shm_size="2gb",
-                    network="bci_net",
-                    mem_limit="1g",  # To prevent one container from consuming multiple gigs of memory (was the case for a Firefox evaluation)
-                    detach=False,
-                    remove=True,
-                    labels=["bci_worker"],
-                    command=command,
-                    environment={
-                        "bci_mongo_host": os.getenv("bci_mongo_host"),
-                        "bci_mongo_database": os.getenv("bci_mongo_database"),
-                        "bci_mongo_username": os.getenv("bci_mongo_username"),
-                        "bci_mongo_password": os.getenv("bci_mongo_password"),
-                    },
-                    volumes=[
-                        os.path.join(os.getenv("host_pwd"), "binaries/chromium/artisanal") + ":/app/binaries/chromium/artisanal",
-                        os.path.join(os.getenv("host_pwd"), "binaries/firefox/artisanal") + ":/app/binaries/firefox/artisanal",
-                        os.path.join(os.getenv("host_pwd"), "drivers/firefox") + ":/app/drivers/firefox",
-                        os.path.join(os.getenv("host_pwd"), "drivers/chromium") + ":/app/drivers/chromium",
-                        os.path.join(os.getenv("host_pwd"), "snapshots") + ":/app/snapshots",
-                        os.path.join(os.getenv("host_pwd"), "extensions/chromium") + ":/app/extensions/chromium",
-                        os.path.join(os.getenv("host_pwd"), "extensions/firefox") + ":/app/extensions/firefox",
-                        os.path.join(os.getenv("host_pwd"), "browser-repos/chromium/src") + ":/browser-repos/chromium",
-                        os.path.join(os.getenv("host_pwd"), "browser-repos/firefox-release") + ":/browser-repos/firefox-release",
-                        os.path.join(os.getenv("host_pwd"), "logs") + ":/app/logs",
-                        "/dev/shm:/dev/shm",
-                    ],
-                )
+                docker_object = self.run_worker_container(container_name, command)
                 self.logger.debug(f"Container '{container_name}' started with command '{command}'")
-                cb()
+                container = Container(params, docker_object)
+                # Blocks until the worker exits, no polling of the Docker daemon required
+                exit_code = container.wait_until_done()
+                container.remove()
+                success = exit_code == 0
+                if not success:
+                    self.logger.error(f"Container '{container_name}' exited with status code {exit_code}")
             except docker.errors.APIError:
                 self.logger.error(f"Could not run container '{container_name}' or container was unexpectedly removed", exc_info=True)
             finally:
-                self.container_id_pool.put(container_id)
+                try:
+                    cb(success)
+                except Exception:
+                    self.logger.error(f"Callback of container '{container_name}' failed", exc_info=True)
+                finally:
+                    self.container_id_pool.put(container_id)
 
         thread = threading.Thread(target=start_container_thread)
+        with self.container_threads_lock:
+            self.container_threads = [t for t in self.container_threads if t.is_alive()]
+            self.container_threads.append(thread)
         thread.start()
-        # To avoid race-condition where more than max containers are started
-        time.sleep(5)
+
+    def run_worker_container(self, container_name: str, command: list):
+        self.remove_old_containers(container_name)
+        return self.client.containers.run(
+            "bci_worker",
+            name=container_name,
+            hostname=container_name,
+            shm_size="2gb",
+            network="bci_net",
+            mem_limit="1g",  # To prevent one container from consuming multiple gigs of memory (was the case for a Firefox evaluation)
+            detach=True,
+            labels=["bci_worker"],
+            command=command,
+            environment=self.get_environment(),
+            volumes=self.get_volumes(),
+        )
+
+    def remove_old_containers(self, container_name: str):
+        # Containers of a previous (interrupted) run might still exist under the same name
+        active_containers = self.client.containers.list(
+            all=True,
+            ignore_removed=True,
+            filters={
+                "name": f"^/{container_name}$"  # The exact name has to match
+            }
+        )
+        # Remove all containers with same name (never higher than 1 in practice)
+        for container in active_containers:
+            self.logger.info(f"Removing old container '{container.attrs['Name']}' to start new one")
+            try:
+                container.remove(force=True)
+            except docker.errors.NotFound:
+                pass
+
+    @staticmethod
+    def get_environment() -> dict:
+        return {
+            "bci_mongo_host": os.getenv("bci_mongo_host"),
+            "bci_mongo_database": os.getenv("bci_mongo_database"),
+            "bci_mongo_username": os.getenv("bci_mongo_username"),
+            "bci_mongo_password": os.getenv("bci_mongo_password"),
+        }
+
+    @staticmethod
+    def get_volumes() -> list:
+        # With a shared binary store, binaries are installed by the master and workers only read them
+        binary_store_mode = ":ro" if Config.shared_binary_store else ""
+        return [
+            os.path.join(os.getenv("host_pwd"), "binaries/chromium/artisanal") + ":/app/binaries/chromium/artisanal",
+            os.path.join(os.getenv("host_pwd"), "binaries/firefox/artisanal") + ":/app/binaries/firefox/artisanal",
+            os.path.join(os.getenv("host_pwd"), "binaries/chromium/downloaded") + ":/app/binaries/chromium/downloaded"
+            + binary_store_mode,
+            os.path.join(os.getenv("host_pwd"), "binaries/firefox/downloaded") + ":/app/binaries/firefox/downloaded"
+            + binary_store_mode,
+            os.path.join(os.getenv("host_pwd"), "drivers/firefox") + ":/app/drivers/firefox",
+            os.path.join(os.getenv("host_pwd"), "drivers/chromium") + ":/app/drivers/chromium",
+            os.path.join(os.getenv("host_pwd"), "snapshots") + ":/app/snapshots",
+            os.path.join(os.getenv("host_pwd"), "extensions/chromium") + ":/app/extensions/chromium",
+            os.path.join(os.getenv("host_pwd"), "extensions/firefox") + ":/app/extensions/firefox",
+            os.path.join(os.getenv("host_pwd"), "browser-repos/chromium/src") + ":/browser-repos/chromium",
+            os.path.join(os.getenv("host_pwd"), "browser-repos/firefox-release") + ":/browser-repos/firefox-release",
+            os.path.join(os.getenv("host_pwd"), "logs") + ":/app/logs",
+            "/dev/shm:/dev/shm",
+        ]
 
     def get_nb_of_running_worker_containers(self):
         return len(self.get_runnning_containers())
@@ -97,10 +130,17 @@ class ContainerManager:
         return self.client.containers.list(filters={"label": "bci_worker", "status": "running"}, ignore_removed=True)
 
     def wait_until_all_containers_are_done(self):
-        while True:
-            if self.get_nb_of_running_worker_containers() == 0:
-                break
-            time.sleep(5)
+        with self.container_threads_lock:
+            threads = list(self.container_threads)
+        for thread in threads:
+            thread.join()
+
+    def shutdown(self):
+        """
+        Releases the resources of the manager when the evaluation run is aborted. Containers that were started run to
+        completion on their own.
+        """
+        pass
 
     @staticmethod
     def stringify_params(params: WorkerParams) -> str:
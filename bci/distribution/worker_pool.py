@@ -0,0 +1,112 @@
+import threading
+import uuid
+import docker.errors
+from typing import Callable
+from bci.params import WorkerParams
+from bci.data_storage.job_queue import JobQueue
+from bci.distribution.container import Container
+from bci.distribution.manager import ContainerManager
+
+
+class WorkerPoolManager(ContainerManager):
+    """
+    Starts a fixed number of worker containers once per evaluation run, which keep pulling jobs from a JobQueue until
+    they are signaled to stop. This avoids the startup overhead of a fresh container for every evaluated state.
+    """
+
+    collect_interval = 1
+
+    def __init__(self, max_nb_of_containers) -> None:
+        super().__init__(max_nb_of_containers)
+        self.job_queue = JobQueue(uuid.uuid4().hex)
+        self.job_callbacks = {}
+        self.job_callbacks_condition = threading.Condition()
+        self.stop_collecting = threading.Event()
+        self.start_workers()
+        # Daemon thread, so that a master that never reaches shutdown does not hang on it
+        self.collector_thread = threading.Thread(target=self.collect_finished_jobs, daemon=True)
+        self.collector_thread.start()
+
+    def start_workers(self):
+        command = f"./worker.sh --job_queue {self.job_queue.queue_id}".split(" ")
+        for i in range(self.max_nb_of_containers):
+            container_name = f"bci_worker_pool_{i}"
+            thread = threading.Thread(target=self.run_persistent_worker, args=(container_name, command))
+            self.container_threads.append(thread)
+            thread.start()
+
+    def run_persistent_worker(self, container_name: str, command: list):
+        try:
+            docker_object = self.run_worker_container(container_name, command)
+            self.logger.debug(f"Persistent worker '{container_name}' started with command '{command}'")
+            container = Container(None, docker_object)
+            exit_code = container.wait_until_done()
+            container.remove()
+            if exit_code != 0:
+                self.logger.error(f"Persistent worker '{container_name}' exited with status code {exit_code}")
+        except docker.errors.APIError:
+            self.logger.error(f"Could not run persistent worker '{container_name}' or container was unexpectedly removed", exc_info=True)
+        finally:
+            # Jobs that were claimed by this worker will never be finished by it
+            self.job_queue.fail_running_jobs(container_name)
+
+    def start_container(self, params: WorkerParams, cb: Callable[[bool], None], blocking_wait=True) -> None:
+        """
+        Hands the evaluation to the worker pool instead of starting a new container. Blocks until a worker is free, so
+        that the search strategy can take the outcomes of earlier evaluations into account.
+        """
+        slot_id = self.container_id_pool.get(block=blocking_wait)
+        with self.job_callbacks_condition:
+            job_id = self.job_queue.push(params)
+            self.job_callbacks[job_id] = (slot_id, cb)
+
+    def collect_finished_jobs(self):
+        while not self.stop_collecting.wait(self.collect_interval):
+            try:
+                if not self.has_live_workers():
+                    # Jobs that are still queued will never be claimed
+                    self.job_queue.fail_pending_jobs()
+                finished_jobs = self.job_queue.collect_finished()
+            except Exception:
+                self.logger.error("Could not collect finished jobs of the worker pool", exc_info=True)
+                continue
+            for job_id, success in finished_jobs:
+                with self.job_callbacks_condition:
+                    if job_id not in self.job_callbacks:
+                        continue
+                    slot_id, cb = self.job_callbacks.pop(job_id)
+                try:
+                    if not success:
+                        self.logger.error(f"Job '{job_id}' failed in worker pool")
+                    cb(success)
+                except Exception:
+                    # A failing callback should not stop the collection of the other jobs
+                    self.logger.error(f"Callback of job '{job_id}' failed", exc_info=True)
+                finally:
+                    self.container_id_pool.put(slot_id)
+                    with self.job_callbacks_condition:
+                        self.job_callbacks_condition.notify_all()
+
+    def has_live_workers(self) -> bool:
+        with self.container_threads_lock:
+            return any(thread.is_alive() for thread in self.container_threads)
+
+    def wait_until_all_containers_are_done(self):
+        with self.job_callbacks_condition:
+            self.job_callbacks_condition.wait_for(lambda: len(self.job_callbacks) == 0)
+        self.stop_workers()
+
+    def shutdown(self):
+        """
+        Stops the worker pool without waiting for the jobs that were not claimed yet, e.g. when the evaluation run
+        failed. Workers finish the job they are running.
+        """
+        self.job_queue.cancel_pending_jobs()
+        self.stop_workers()
+
+    def stop_workers(self):
+        self.job_queue.push_stop_signals(self.max_nb_of_containers)
+        super().wait_until_all_containers_are_done()
+        self.stop_collecting.set()
+        self.collector_thread.join()
+        self.job_queue.remove()
@@ -1,13 +1,13 @@
 import os
 import shutil
-from bci.evaluations.evaluation_framework import EvaluationFramework
+from bci.evaluations.jar_evaluation_framework import JarEvaluationFramework
 from bci.config import Config
 from bci.version_control.version_control import RepoState
 from bci.evaluations.custom.custom_mongodb import CustomMongoDB
 from bci.evaluations.jar_interface import Jar
 
 
-class CustomEvaluationFramework(EvaluationFramework):
+class CustomEvaluationFramework(JarEvaluationFramework):
 
     db_class = CustomMongoDB
 
@@ -65,8 +65,9 @@ class CustomEvaluationFramework(EvaluationFramework):
             browser_binary: str,
             driver_exec: str,
             state: RepoState,
-            cookie_name: str):
-        if not self.has_data(automation, browser, browser_config, extension_name, additional_cli_options, mech_group, state):
+            cookie_name: str,
+            display: str = None):
+        if not self.is_cached(mech_group):
             self.logger.info(f"Starting browser evaluation for {browser} v{browser_version} with driver {driver_exec}")
 
             tries = 0
@@ -75,37 +76,25 @@ class CustomEvaluationFramework(EvaluationFramework):
                 if tries > 0:
                     self.logger.info(f"Evaluation failed; trying again (try {tries})")
                 tries += 1
-                data_folder = self.get_data_path(browser, state, browser_config)
+                data_folder = self.get_data_path(browser, state, browser_config, mech_group)
                 extension_path = self.get_extension_path(browser, extension_name) if extension_name else None
                 Jar.do_automation(automation, browser, browser_version, browser_config, extension_path,
                                   browser_binary, additional_cli_options, driver_exec, data_folder, mech_group,
-                                  custom=True, url_queue=self.tests[mech_group])
+                                  custom=True, url_queue=self.tests[mech_group], display=display)
                 json_data = self.get_data_in_json(data_folder, mech_group)
                 is_dirty = self.is_dirty_evaluation(data_folder)
                 # Remove csv files
                 try:
-                    shutil.rmtree(os.path.dirname(data_folder))
+                    shutil.rmtree(data_folder)
                 except OSError:
                     self.logger.error("Could not remove temporary data folder", exc_info=True)
 
-            self.db_class.get_instance().store_data(automation, browser, browser_version, driver_version, browser_config,
-                                                    extension_name, additional_cli_options, state, mech_group,
-                                                    json_data, is_dirty)
+            document = self.db_class.get_instance().store_data(automation, browser, browser_version, driver_version,
+                                                               browser_config, extension_name, additional_cli_options,
+                                                               state, mech_group, json_data, is_dirty)
+            self.cache_document(document)
 
-        return self.get_data(automation, browser, browser_config, extension_name,
-                             additional_cli_options, mech_group, mech_id, state, cookie_name)
-
-    def has_data(
-            self,
-            automation: str,
-            browser: str,
-            config: str,
-            extension_name: str,
-            additional_cli_options: list,
-            mech_group: str,
-            state: RepoState):
-        return CustomMongoDB.get_instance().has_data(
-            automation, browser, config, extension_name, additional_cli_options, mech_group, state)
+        return self.get_cached_outcome(mech_group, mech_id, cookie_name)
 
     def get_data_in_json(self, data_path, _) -> dict:
         data_file_path = os.path.join(data_path, "custom.csv")
@@ -0,0 +1,58 @@
+import os
+import time
+import atexit
+import logging
+import subprocess
+from queue import Queue
+from contextlib import contextmanager
+
+
+class DisplayPool:
+    """
+    Pool of Xvfb displays, so that browsers evaluated concurrently within one worker do not share a display.
+    Displays are started on first use and are kept alive for the lifetime of the worker.
+    """
+
+    first_display_number = 100
+    screen = "1024x768x16"
+    startup_timeout = 5
+
+    def __init__(self, size: int) -> None:
+        self.logger = logging.getLogger("bci")
+        self.size = size
+        self.displays = Queue()
+        self.processes = []
+        for i in range(size):
+            self.displays.put(":%i" % (self.first_display_number + i))
+        atexit.register(self.stop)
+
+    @contextmanager
+    def acquire(self):
+        """
+        Yields the name of a display that is not used by any other evaluation.
+        """
+        display = self.displays.get()
+        try:
+            self.start_if_needed(display)
+            yield display
+        finally:
+            self.displays.put(display)
+
+    def start_if_needed(self, display: str):
+        socket_path = "/tmp/.X11-unix/X%s" % display[1:]
+        if os.path.exists(socket_path):
+            return
+        self.logger.debug(f"Starting Xvfb on display '{display}'")
+        self.processes.append(subprocess.Popen(
+            ["Xvfb", display, "-screen", "0", self.screen], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        # Wait until the display accepts connections
+        for _ in range(self.startup_timeout * 10):
+            if os.path.exists(socket_path):
+                return
+            time.sleep(0.1)
+        raise AttributeError(f"Xvfb did not start on display '{display}' within {self.startup_timeout} seconds")
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        self.processes = []
@@ -2,12 +2,14 @@ import os
 import csv
 import logging
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
 from bci.data_storage.mongodb import MongoDB
 from bci.config import Config
 from bci.params import DatabaseParams
 from bci.version_control.version_control import RepoState
 from bci.browser_build.browser_build import BrowserBuild, BuildNotAvailableError
+from bci.evaluations.display_pool import DisplayPool
 
 
 class EvaluationFramework(ABC):
@@ -15,6 +17,11 @@ class EvaluationFramework(ABC):
     def __init__(self):
         self.logger = logging.getLogger("bci")
         self.should_stop = False
+        self.cached_documents = {}
+        """
+        Result documents of the current evaluation, by mech group.
+        """
+        self.display_pool = None
 
     def evaluate(
             self,
@@ -28,8 +35,10 @@ class EvaluationFramework(ABC):
             additional_cli_options: list,
             cookie_name=None):
         browser_name = browser_build.browser_name
-        evaluated_mech_groups = [mech_group for mech_group in requested_mech_groups if self.has_data(
-            automation, browser_name, browser_config, extension_file, additional_cli_options, mech_group, state)]
+        # Fetch the results of all requested mech groups at once
+        self.cached_documents = self.get_data_per_mech_group(
+            automation, browser_name, browser_config, extension_file, additional_cli_options, requested_mech_groups, state)
+        evaluated_mech_groups = [mech_group for mech_group in requested_mech_groups if mech_group in self.cached_documents]
         required_mech_groups = [mech_group for mech_group in requested_mech_groups if mech_group not in evaluated_mech_groups]
         self.logger.info("Requested evaluation for %i mech groups [%s], of which %i still require evaluation [%s]" % (
             len(requested_mech_groups),
@@ -39,16 +48,7 @@ class EvaluationFramework(ABC):
 
         # Set states of already evaluated mech groups
         for mech_group in evaluated_mech_groups:
-            result = self.get_data(
-                automation,
-                browser_name,
-                browser_config,
-                extension_file,
-                additional_cli_options,
-                mech_group,
-                mech_id,
-                state,
-                cookie_name)
+            result = self.get_cached_outcome(mech_group, mech_id, cookie_name)
             state.set_evaluation_outcome(result)
 
         # Return if all requested evaluations were found in the cache
@@ -68,43 +68,87 @@ class EvaluationFramework(ABC):
             driver_version = None
             driver_exec = None
 
-        for mech_group in required_mech_groups:
+        evaluation_args = (automation, browser_name, browser_version, driver_version, browser_config, extension_file,
+                           additional_cli_options, mech_id)
+        parallelism = min(Config.mech_group_parallelism, len(required_mech_groups))
+        if parallelism > 1 and self.supports_parallel_evaluation(automation):
+            result = self.evaluate_mech_groups_in_parallel(
+                evaluation_args, required_mech_groups, bin_path, driver_exec, state, cookie_name, parallelism)
+        else:
+            for mech_group in required_mech_groups:
+                if self.should_stop:
+                    # Reset should_stop
+                    self.should_stop = False
+                    # TODO: should return a specific value indicating the evaluation has been stopped by the user
+                    return True
+                result = self.evaluate_mech_group(
+                    evaluation_args, mech_group, bin_path, driver_exec, state, cookie_name)
+        browser_build.release_bin_folder(state.id)
+        return result
+
+    def evaluate_mech_group(self, evaluation_args: tuple, mech_group: str, bin_path: str, driver_exec: str,
+                            state: RepoState, cookie_name: str):
+        try:
+            result = self.perform_specific_evaluation(
+                *evaluation_args, mech_group, bin_path, driver_exec, state, cookie_name)
+            state.set_evaluation_outcome(result)
+            self.logger.info("Evaluation executed for '%s' (%s)" % (state, mech_group))
+        except Exception as e:
+            state.set_evaluation_error(str(e))
+            self.logger.error("An error occurred during evaluation", exc_info=True)
+            traceback.print_exc()
+            result = None
+        return result
+
+    def evaluate_mech_groups_in_parallel(self, evaluation_args: tuple, mech_groups: list, bin_path: str,
+                                         driver_exec: str, state: RepoState, cookie_name: str, parallelism: int):
+        """
+        Evaluates the given mech groups concurrently, each with its own display, profile and data folder.
+        Outcomes are applied to the state in the order of the mech groups, so it ends up as after a sequential
+        evaluation.
+        """
+        if self.display_pool is None or self.display_pool.size < parallelism:
+            self.display_pool = DisplayPool(parallelism)
+        self.logger.info(f"Evaluating {len(mech_groups)} mech groups with a parallelism of {parallelism}")
+
+        def evaluate_with_display(mech_group: str):
             if self.should_stop:
-                # Reset should_stop
-                self.should_stop = False
-                # TODO: should return a specific value indicating the evaluation has been stopped by the user
-                return True
-            try:
-                result = self.perform_specific_evaluation(
-                    automation,
-                    browser_name,
-                    browser_version,
-                    driver_version,
-                    browser_config,
-                    extension_file,
-                    additional_cli_options,
-                    mech_id,
-                    mech_group,
-                    bin_path,
-                    driver_exec,
-                    state,
-                    cookie_name)
+                return None, None
+            with self.display_pool.acquire() as display:
+                try:
+                    result = self.perform_specific_evaluation(
+                        *evaluation_args, mech_group, bin_path, driver_exec, state, cookie_name, display=display)
+                    self.logger.info("Evaluation executed for '%s' (%s)" % (state, mech_group))
+                    return result, None
+                except Exception as e:
+                    self.logger.error("An error occurred during evaluation", exc_info=True)
+                    return None, e
+
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            outcomes = list(executor.map(evaluate_with_display, mech_groups))
+        if self.should_stop:
+            # Reset should_stop
+            self.should_stop = False
+            return True
+        for result, error in outcomes:
+            if error is None:
                 state.set_evaluation_outcome(result)
-                self.logger.info("Evaluation executed for '%s' (%s)" % (state, mech_group))
-            except Exception as e:
-                state.set_evaluation_error(str(e))
-                self.logger.error("An error occurred during evaluation", exc_info=True)
-                traceback.print_exc()
-                result = None
-        browser_build.remove_bin_folder(state.id)
-        return result
+            else:
+                state.set_evaluation_error(str(error))
+        return outcomes[-1][0]
+
+    def supports_parallel_evaluation(self, automation: str) -> bool:
+        """
+        Returns True if multiple mech groups of this framework can safely be evaluated at the same time.
+        """
+        return False
 
     @staticmethod
-    def get_data_path(browser, state, config):
+    def get_data_path(browser, state, config, mech_group):
         if browser == "chromium":
-            data_folder = os.path.join(Config.chromium_data_folder_path, "%s/%s" % (state.id, config))
+            data_folder = os.path.join(Config.chromium_data_folder_path, "%s/%s/%s" % (state.id, config, mech_group))
         elif browser == "firefox":
-            data_folder = os.path.join(Config.firefox_data_folder_path, "%s/%s" % (state.id, config))
+            data_folder = os.path.join(Config.firefox_data_folder_path, "%s/%s/%s" % (state.id, config, mech_group))
         else:
             raise AttributeError("Unknown browser '%s'" % browser)
         if not os.path.exists(data_folder):
@@ -126,7 +170,8 @@ class EvaluationFramework(ABC):
             browser_binary: str,
             driver_exec: str,
             state: RepoState,
-            cookie_name: str):
+            cookie_name: str,
+            display: str = None):
         pass
 
     @property
@@ -163,10 +208,50 @@ class EvaluationFramework(ABC):
         return cls.db_class.get_instance().get_data(automation, browser, browser_config, extension_name,
                                                     additional_cli_options, mech_group, mech_id, state, cookie_name)
 
+    @classmethod
+    def get_data_per_mech_group(
+            cls: MongoDB,
+            automation: str,
+            browser: str,
+            browser_config: str,
+            extension_name: str,
+            additional_cli_options: list,
+            mech_groups: list,
+            state: RepoState) -> dict:
+        return cls.db_class.get_instance().get_data_per_mech_group(
+            automation, browser, browser_config, extension_name, additional_cli_options, mech_groups, state)
+
+    def is_cached(self, mech_group: str) -> bool:
+        return mech_group in self.cached_documents
+
+    def cache_document(self, document: dict):
+        self.cached_documents[document["mech_group"]] = document
+
+    def get_cached_outcome(self, mech_group: str, mech_id: str, cookie_name: str):
+        """
+        Returns the outcome for the given mech_id in the cached result document of the given mech group, without
+        querying the database again.
+        """
+        if mech_group not in self.cached_documents:
+            raise AttributeError("No result document cached for mech group '%s'" % mech_group)
+        return MongoDB.get_outcome_from_document(self.cached_documents[mech_group], mech_id, cookie_name)
+
     @classmethod
     def get_data_with_params(cls, params: DatabaseParams):
         return cls.db_class.get_instance().get_data_with_params(params)
 
+    @classmethod
+    def get_all_data_with_params(cls, params: DatabaseParams, state_ids) -> dict:
+        return cls.db_class.get_instance().get_all_data_with_params(params, state_ids)
+
+    @classmethod
+    def get_outcomes_with_params(cls, params: DatabaseParams):
+        return cls.db_class.get_instance().get_outcomes_with_params(params)
+
+    @classmethod
+    def get_all_outcomes_with_params(cls, params: DatabaseParams, state_ids) -> dict:
+        return cls.db_class.get_instance().get_all_outcomes_with_params(params, state_ids)
+
     @classmethod
     def has_all_data_with_params(cls, params: DatabaseParams):
         return cls.db_class.get_instance().has_all_data_with_params(params)
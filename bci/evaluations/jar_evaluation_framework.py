@@ -0,0 +1,11 @@
+from bci.evaluations.evaluation_framework import EvaluationFramework
+
+
+class JarEvaluationFramework(EvaluationFramework):
+    """
+    Evaluation framework whose evaluations are automated by the evaluation jar.
+    """
+
+    def supports_parallel_evaluation(self, automation: str) -> bool:
+        # Selenium automation of older Chromium versions replaces the shared /usr/bin/google-chrome script
+        return automation == "terminal"
@@ -1,10 +1,14 @@
 import os
+import shutil
 import logging
-from time import sleep
+import threading
 from bci.config import Config
 from bci import cli
+from bci.evaluations.jar_runner import JarRunner
+from bci.evaluations.profile_cache import ProfileCache
 
 logger = logging.getLogger("bci")
+path_lock = threading.Lock()
 
 
 class Jar:
@@ -12,15 +16,15 @@ class Jar:
     @staticmethod
     def do_automation(automation: str, browser: str, browser_version: str, browser_config: str, extension_path: str,
                       browser_binary: str, additional_cli_options: list, driver_exec: str, data_folder: str, mech_group: str,
-                      custom=False, url_queue=None):
+                      custom=False, url_queue=None, display=None):
         if automation == "selenium":
             Jar.do_selenium_automation(automation, browser, browser_version, browser_config, extension_path,
                                        browser_binary, additional_cli_options, driver_exec, data_folder, mech_group,
-                                       logger, custom=custom, url_queue=url_queue)
+                                       logger, custom=custom, url_queue=url_queue, display=display)
         elif automation == "terminal":
             Jar.do_terminal_automation(automation, browser, browser_version, browser_config, extension_path,
                                        browser_binary, additional_cli_options, driver_exec, data_folder, mech_group,
-                                       logger, custom=custom, url_queue=url_queue)
+                                       logger, custom=custom, url_queue=url_queue, display=display)
         else:
             raise AttributeError("Unknown automation '%s'" % automation)
 
@@ -88,7 +92,8 @@ class Jar:
             mech_group: str,
             logger,
             custom=False,
-            url_queue=None):
+            url_queue=None,
+            display=None):
         if driver_exec is None:
             raise AttributeError("Driver executable cannot be None for selenium automation")
         command = Jar.get_command(automation, browser, browser_version, browser_config, extension_path,
@@ -132,14 +137,7 @@ class Jar:
                 command += " --arg --profile=/app/profiles/firefox/tp-67"
 
         # Execute evaluation command
-        Jar.execute(command)
-
-        if browser == "chromium":
-            # Especially in the case of Chromium version < 60, the process won't be
-            # killed effectively, so we have to do it manually to prevent a bottleneck
-            cli.execute_and_return_status("pkill -f %s" % browser_binary)
-            cli.execute_and_return_status("pkill -f %s" % driver_exec)
-            cli.execute_and_return_status("pkill -f /usr/bin/google-chrome-proxy")
+        Jar.execute(command, display=display)
 
     @staticmethod
     def do_terminal_automation(
@@ -155,13 +153,13 @@ class Jar:
             mech_group: str,
             logger,
             custom=False,
-            url_queue=None):
+            url_queue=None,
+            display=None):
         command = Jar.get_command(automation, browser, browser_version, browser_config, extension_path,
                                   browser_binary, additional_cli_options, driver_exec, data_folder, mech_group,
                                   custom=custom, url_queue=url_queue)
         short_browser_version = Jar.get_short_browser_version(browser_version)
         profile_folder = Jar.increment_until_original("/tmp/new-profile")
-        cli.execute("mkdir -p %s" % profile_folder)
 
         if browser == "chromium":
             command += " --arg --user-data-dir=%s" % profile_folder
@@ -169,43 +167,14 @@ class Jar:
             if browser_config == "default" and not extension_path:
                 pass  # Jar takes care of this
             elif browser_config == "btpc" and not extension_path:
-                if int(short_browser_version) < 17:
-                    cli.execute("cp -r /app/profiles/chromium/6_btpc/Default %s" % profile_folder)
-                elif int(short_browser_version) < 24:
-                    cli.execute("cp -r /app/profiles/chromium/17_btpc/Default %s" % profile_folder)
-                elif int(short_browser_version) < 36:
-                    cli.execute("cp -r /app/profiles/chromium/24_btpc/Default %s" % profile_folder)
-                elif int(short_browser_version) < 40:
-                    cli.execute("cp -r /app/profiles/chromium/36_btpc/Default %s" % profile_folder)
-                elif int(short_browser_version) < 46:
-                    cli.execute("cp -r /app/profiles/chromium/40_btpc/Default %s" % profile_folder)
-                elif int(short_browser_version) < 59:
-                    cli.execute("cp -r /app/profiles/chromium/46_btpc/Default %s" % profile_folder)
-                elif int(short_browser_version) < 86:
-                    cli.execute("cp -r /app/profiles/chromium/59_btpc/Default %s" % profile_folder)
-                else:
-                    raise AttributeError("Chrome 86 and up not supported yet")
+                ProfileCache.clone_chromium_btpc_profile(int(short_browser_version), profile_folder)
             elif browser_config == "pb":
                 pass  # Jar takes care of this
             else:
                 raise AttributeError("CLI automation currently does not support '%s' for chromium" % browser_config)
 
         if browser == "firefox":
-            # Make Firefox trust the proxy CA and server CA
-            cli.execute(
-                "certutil -A -n littleproxy -t CT,c -i /app/ssl/LittleProxy_MITM.cer -d sql:%s" %
-                profile_folder)  # cert9.db  key4.db  pkcs11.txt
-            cli.execute("certutil -A -n littleproxy -t CT,c -i /app/ssl/LittleProxy_MITM.cer -d %s" %
-                        profile_folder)  # Normally: cert8.db  key3.db  secmod.db, however: cert9.db  key4.db  pkcs11.txt
-
-            cli.execute("certutil -A -n myCA -t CT,c -i /app/ssl/myCA.crt -d sql:%s" %
-                        profile_folder)  # cert9.db  key4.db  pkcs11.txt
-            # Normally: cert8.db  key3.db  secmod.db, however: cert9.db  key4.db  pkcs11.txt
-            cli.execute("certutil -A -n myCA -t CT,c -i /app/ssl/myCA.crt -d %s" % profile_folder)
-
-            # The certutil in the docker image refuses to create cert8.db, so we copy
-            # an existing cert8.db which accepts the necessary CAs
-            cli.execute("cp /app/profiles/firefox/cert8.db %s" % profile_folder)
+            ProfileCache.get_instance().clone_firefox_profile(profile_folder)
 
             command += " --arg --profile=%s" % profile_folder
             if browser_config == "default" and not extension_path:
@@ -225,32 +194,35 @@ class Jar:
 
         command += " --visits 3 --sessions 1"
 
-        Jar.execute(command)
-        sleep(2)
+        # The browsers started by the jar are terminated by the time it returns
+        Jar.execute(command, display=display)
 
         # Remove new profile if CLI automation
-        cli.execute_and_return_status("rm -rd %s" % profile_folder)
-        cli.execute_and_return_status("rm -rd %s" % profile_folder)
-        cli.execute_and_return_status("rm -rd %s" % profile_folder)
+        shutil.rmtree(profile_folder, ignore_errors=True)
 
     @staticmethod
-    def execute(command: str):
+    def execute(command: str, display: str = None):
         logger.info(f"Command: {command}")
+        # Evaluations that run concurrently are each given their own display
+        env = dict(os.environ, DISPLAY=display) if display else None
         timeout = 30
         max_tries = 3
-        finished_within_retries = cli.execute(command,
-                                              cwd=os.path.expanduser(os.path.dirname(Config.evaluation_jar_path)),
-                                              timeout=timeout, max_tries=max_tries)
+        finished_within_retries = JarRunner.get_instance(Config.evaluation_jar_path).run(
+            command, os.path.expanduser(os.path.dirname(Config.evaluation_jar_path)), timeout, max_tries, env=env)
         if not finished_within_retries:
             logger.error(f"Command did not finish within the given timeout '{timeout}' and max number of tries '{max_tries}", exc_info=True)
 
     @staticmethod
     def increment_until_original(path: str):
-        if not os.path.exists(path):
-            return path
-        i = 0
-        while True:
-            new_path = path + str(i)
-            if not os.path.exists(new_path):
-                return new_path
-            i += 1
+        """
+        Returns the first non-existing path starting with the given path, and creates it so that concurrent
+        evaluations never get the same path.
+        """
+        with path_lock:
+            new_path = path
+            i = 0
+            while os.path.exists(new_path):
+                new_path = path + str(i)
+                i += 1
+            os.makedirs(new_path)
+            return new_path
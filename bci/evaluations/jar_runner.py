@@ -0,0 +1,153 @@
+import os
+import time
+import uuid
+import fcntl
+import logging
+import threading
+import subprocess
+from bci.config import Config
+from bci.process_supervisor import SupervisedProcess
+
+CLASS_LIST_FILE_NAME = "classes.lst"
+ARCHIVE_FILE_NAME = "classes.jsa"
+ARCHIVE_LOCK_FILE_NAME = ".classes.lock"
+
+
+class JarRunner:
+    """
+    Runs evaluation jar commands. JVM startup is shortened by a class data sharing archive that is dumped after the
+    first run. The archive is stored next to the jar, which is shared by all workers, so it is created by a single run
+    under a file lock and renamed into place once complete. Runs that are still active when the worker exits are
+    terminated by the process supervisor.
+    """
+
+    instance = None
+    instance_lock = threading.Lock()
+
+    def __init__(self, jar_path: str, java_options: list = None, stall_timeout: int = None) -> None:
+        """
+        :param jar_path: path to the evaluation jar
+        :param java_options: additional options passed to the JVM
+        :param stall_timeout: number of seconds a run may go without producing output before it is cancelled, runs are
+            only cancelled by their timeout if not given
+        """
+        self.logger = logging.getLogger("bci")
+        self.jar_path = os.path.expanduser(jar_path)
+        self.java_options = list(java_options) if java_options else []
+        self.stall_timeout = stall_timeout
+        jar_folder = os.path.dirname(self.jar_path)
+        self.class_list_path = os.path.join(jar_folder, CLASS_LIST_FILE_NAME)
+        self.archive_path = os.path.join(jar_folder, ARCHIVE_FILE_NAME)
+        self.archive_lock_path = os.path.join(jar_folder, ARCHIVE_LOCK_FILE_NAME)
+
+    @classmethod
+    def get_instance(cls, jar_path: str):
+        with cls.instance_lock:
+            if cls.instance is None or cls.instance.jar_path != os.path.expanduser(jar_path):
+                cls.instance = cls(jar_path, java_options=Config.jar_java_options, stall_timeout=Config.jar_stall_timeout)
+            return cls.instance
+
+    def acquire_archive_lock(self):
+        """
+        Returns the locked lock file if this run should record the loaded classes, or None if another run (in this or
+        another worker) is already recording them.
+        """
+        lock_file = open(self.archive_lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        if os.path.isfile(self.archive_path) or os.path.isfile(self.class_list_path):
+            # Recorded by another run in the meantime
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+            return None
+        return lock_file
+
+    def create_archive(self, tmp_class_list_path: str):
+        """
+        Dumps the archive from the recorded classes into a temporary file that is renamed into place, so that other
+        runs never load a partially written archive. The class list is kept afterwards, also if dumping failed, so
+        that classes are only recorded once.
+        """
+        tmp_archive_path = f"{self.archive_path}.{uuid.uuid4().hex}"
+        self.logger.info("Creating class data sharing archive for the evaluation jar")
+        status = subprocess.call(
+            ["java", "-Xshare:dump", f"-XX:SharedClassListFile={tmp_class_list_path}",
+             f"-XX:SharedArchiveFile={tmp_archive_path}", "-cp", os.path.basename(self.jar_path)],
+            cwd=os.path.dirname(self.jar_path), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if status == 0 and os.path.isfile(tmp_archive_path):
+            os.replace(tmp_archive_path, self.archive_path)
+        else:
+            self.logger.warning("Could not create class data sharing archive, jar runs will start without it")
+            if os.path.isfile(tmp_archive_path):
+                os.remove(tmp_archive_path)
+        os.replace(tmp_class_list_path, self.class_list_path)
+
+    def run(self, command: str, cwd: str, timeout: int, max_tries: int, env: dict = None) -> bool:
+        """
+        Executes the given 'java -jar' command, retrying if it times out or stalls.
+
+        :param command: command as built by Jar.get_command
+        :param cwd: working directory of the command
+        :param timeout: maximum duration of a single try in minutes
+        :param max_tries: maximum number of tries
+        :param env: environment of the command
+        :return: True if the command finished within the given number of tries
+        """
+        args = command.split(" ")
+        for tries in range(1, max_tries + 1):
+            jvm_options = list(self.java_options)
+            archive_lock_file = None
+            if os.path.isfile(self.archive_path):
+                jvm_options += ["-Xshare:auto", f"-XX:SharedArchiveFile={self.archive_path}"]
+            elif not os.path.isfile(self.class_list_path):
+                archive_lock_file = self.acquire_archive_lock()
+            tmp_class_list_path = f"{self.class_list_path}.{uuid.uuid4().hex}"
+            if archive_lock_file is not None:
+                jvm_options.append(f"-XX:DumpLoadedClassList={tmp_class_list_path}")
+            try:
+                finished = self.run_once(args[:1] + jvm_options + args[1:], cwd, timeout * 60, env)
+            finally:
+                if archive_lock_file is not None:
+                    try:
+                        if os.path.isfile(tmp_class_list_path):
+                            self.create_archive(tmp_class_list_path)
+                    finally:
+                        fcntl.flock(archive_lock_file, fcntl.LOCK_UN)
+                        archive_lock_file.close()
+            if finished:
+                return True
+            if tries < max_tries:
+                self.logger.error("Run of evaluation jar was cancelled: starting try %i" % (tries + 1))
+        self.logger.error("Run of evaluation jar was cancelled after %i tries" % max_tries)
+        return False
+
+    def run_once(self, args: list, cwd: str, timeout: float, env: dict) -> bool:
+        process = SupervisedProcess(args, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        last_activity = [time.time()]
+
+        def follow_output():
+            for _ in process.stdout:
+                last_activity[0] = time.time()
+
+        output_thread = threading.Thread(target=follow_output, daemon=True)
+        output_thread.start()
+        start = time.time()
+        try:
+            while process.wait(timeout=1) is None:
+                now = time.time()
+                if now - start > timeout:
+                    self.logger.error(f"Timeout of {timeout} seconds expired for evaluation jar run")
+                    return False
+                if self.stall_timeout is not None and now - last_activity[0] > self.stall_timeout:
+                    self.logger.error(f"Evaluation jar run produced no output for {self.stall_timeout} seconds")
+                    return False
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(process.returncode, args)
+            return True
+        finally:
+            # Also cleans up browsers and drivers that outlived the jar
+            process.terminate()
+            output_thread.join(timeout=5)
@@ -0,0 +1,129 @@
+import os
+import fcntl
+import errno
+import shutil
+import logging
+import tempfile
+import threading
+from bci import cli
+
+# ioctl request that makes a file share the extents of another file (copy-on-write clone)
+FICLONE = 0x40049409
+
+# Profiles shipped in the image that are used for Chromium with third-party cookies blocked, by first unsupported version
+CHROMIUM_BTPC_PROFILES = [
+    (17, "/app/profiles/chromium/6_btpc"),
+    (24, "/app/profiles/chromium/17_btpc"),
+    (36, "/app/profiles/chromium/24_btpc"),
+    (40, "/app/profiles/chromium/36_btpc"),
+    (46, "/app/profiles/chromium/40_btpc"),
+    (59, "/app/profiles/chromium/46_btpc"),
+    (86, "/app/profiles/chromium/59_btpc"),
+]
+
+
+class ProfileCache:
+    """
+    Builds every browser profile template once per worker and clones it for each run. Files are cloned with reflinks
+    where the file system supports it and copied otherwise. Hard links are not used, as browsers modify profile files
+    (e.g. the certificate databases) in place, which would corrupt the template.
+    """
+
+    instance = None
+    instance_lock = threading.Lock()
+
+    template_folder = "/tmp/profile-templates"
+
+    def __init__(self) -> None:
+        self.logger = logging.getLogger("bci")
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        # Evaluations of different mech groups can request the instance concurrently
+        with cls.instance_lock:
+            if cls.instance is None:
+                cls.instance = cls()
+            return cls.instance
+
+    def clone_firefox_profile(self, profile_folder: str):
+        """
+        Populates the given folder with a Firefox profile that trusts the proxy and server CAs.
+        """
+        template = self.get_template("firefox_certificates", ProfileCache.build_firefox_certificate_profile)
+        ProfileCache.copy_tree(template, profile_folder)
+
+    @staticmethod
+    def clone_chromium_btpc_profile(browser_version: int, profile_folder: str):
+        """
+        Populates the given folder with the Chromium profile that blocks third-party cookies for the given version.
+        """
+        for first_unsupported_version, template in CHROMIUM_BTPC_PROFILES:
+            if browser_version < first_unsupported_version:
+                ProfileCache.copy_tree(os.path.join(template, "Default"), os.path.join(profile_folder, "Default"))
+                return
+        raise AttributeError("Chrome %i and up not supported yet" % CHROMIUM_BTPC_PROFILES[-1][0])
+
+    def get_template(self, name: str, build_fn) -> str:
+        """
+        Returns the path to the template with the given name, building it first if needed.
+
+        :param name: name of the template
+        :param build_fn: function that builds the template in the folder it is passed
+        """
+        template_path = os.path.join(self.template_folder, name)
+        if os.path.isdir(template_path):
+            return template_path
+        with self.lock:
+            if os.path.isdir(template_path):
+                return template_path
+            self.logger.debug(f"Building profile template '{name}'")
+            os.makedirs(self.template_folder, exist_ok=True)
+            build_path = tempfile.mkdtemp(prefix=f"{name}-", dir=self.template_folder)
+            try:
+                build_fn(build_path)
+                os.rename(build_path, template_path)
+            except Exception:
+                shutil.rmtree(build_path, ignore_errors=True)
+                raise
+        return template_path
+
+    @staticmethod
+    def build_firefox_certificate_profile(profile_folder: str):
+        # Make Firefox trust the proxy CA and server CA
+        # cert9.db  key4.db  pkcs11.txt
+        cli.execute("certutil -A -n littleproxy -t CT,c -i /app/ssl/LittleProxy_MITM.cer -d sql:%s" % profile_folder)
+        # Normally: cert8.db  key3.db  secmod.db, however: cert9.db  key4.db  pkcs11.txt
+        cli.execute("certutil -A -n littleproxy -t CT,c -i /app/ssl/LittleProxy_MITM.cer -d %s" % profile_folder)
+        # cert9.db  key4.db  pkcs11.txt
+        cli.execute("certutil -A -n myCA -t CT,c -i /app/ssl/myCA.crt -d sql:%s" % profile_folder)
+        # Normally: cert8.db  key3.db  secmod.db, however: cert9.db  key4.db  pkcs11.txt
+        cli.execute("certutil -A -n myCA -t CT,c -i /app/ssl/myCA.crt -d %s" % profile_folder)
+        # The certutil in the docker image refuses to create cert8.db, so we copy
+        # an existing cert8.db which accepts the necessary CAs
+        shutil.copyfile("/app/profiles/firefox/cert8.db", os.path.join(profile_folder, "cert8.db"))
+
+    @staticmethod
+    def copy_tree(src_path: str, dst_path: str):
+        os.makedirs(dst_path, exist_ok=True)
+        for dir_path, dir_names, file_names in os.walk(src_path):
+            relative_path = os.path.relpath(dir_path, src_path)
+            target_dir_path = os.path.normpath(os.path.join(dst_path, relative_path))
+            for dir_name in dir_names:
+                os.makedirs(os.path.join(target_dir_path, dir_name), exist_ok=True)
+            for file_name in file_names:
+                ProfileCache.clone_file(os.path.join(dir_path, file_name), os.path.join(target_dir_path, file_name))
+
+    @staticmethod
+    def clone_file(src_path: str, dst_path: str):
+        if os.path.islink(src_path):
+            os.symlink(os.readlink(src_path), dst_path)
+            return
+        with open(src_path, "rb") as src_file, open(dst_path, "wb") as dst_file:
+            try:
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            except OSError as e:
+                if e.errno not in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY):
+                    raise
+                shutil.copyfileobj(src_file, dst_file)
+        shutil.copymode(src_path, dst_path)
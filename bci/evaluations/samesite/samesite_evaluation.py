@@ -1,6 +1,6 @@
 import os
 import shutil
-from bci.evaluations.evaluation_framework import EvaluationFramework
+from bci.evaluations.jar_evaluation_framework import JarEvaluationFramework
 from bci.version_control.version_control import RepoState
 from bci.evaluations.samesite.samesite_mongodb import SamesiteMongoDB
 from bci.evaluations.jar_interface import Jar
@@ -17,7 +17,7 @@ all_mech_groups = [
 ]
 
 
-class SameSiteEvaluationFramework(EvaluationFramework):
+class SameSiteEvaluationFramework(JarEvaluationFramework):
 
     db_class = SamesiteMongoDB
 
@@ -35,29 +35,31 @@ class SameSiteEvaluationFramework(EvaluationFramework):
             browser_binary: str,
             driver_exec: str,
             state: RepoState,
-            cookie_name: str):
-        if not self.has_data(automation, browser, browser_config, extension_name, additional_cli_options, mech_group, state):
-            data_folder = self.get_data_path(browser, state, browser_config)
+            cookie_name: str,
+            display: str = None):
+        if not self.is_cached(mech_group):
+            data_folder = self.get_data_path(browser, state, browser_config, mech_group)
             extension_path = self.get_extension_path(browser, extension_name) if extension_name else None
 
             self.logger.info(f"Starting browser evaluation for {browser} v{browser_version} with driver {driver_exec}")
             Jar.do_automation(automation, browser, browser_version, browser_config, extension_path,
-                              browser_binary, additional_cli_options, driver_exec, data_folder, mech_group)
+                              browser_binary, additional_cli_options, driver_exec, data_folder, mech_group,
+                              display=display)
 
             json_data = self.get_data_in_json(data_folder, mech_group)
             is_dirty = self.is_dirty_evaluation(data_folder, mech_group)
-            self.db_class.get_instance().store_data(automation, browser, browser_version, driver_version, browser_config,
-                                                    extension_name, additional_cli_options, state, mech_group,
-                                                    json_data, is_dirty)
+            document = self.db_class.get_instance().store_data(automation, browser, browser_version, driver_version,
+                                                               browser_config, extension_name, additional_cli_options,
+                                                               state, mech_group, json_data, is_dirty)
+            self.cache_document(document)
 
             # Remove csv files
             try:
-                shutil.rmtree(os.path.dirname(data_folder))
+                shutil.rmtree(data_folder)
             except OSError:
                 self.logger.error("Could not remove temporary data folder", exc_info=True)
 
-        return self.get_data(automation, browser, browser_config, extension_name,
-                             additional_cli_options, mech_group, mech_id, state, cookie_name)
+        return self.get_cached_outcome(mech_group, mech_id, cookie_name)
 
     def get_data_in_json(self, data_path, mech_group) -> dict:
         data_file_path = os.path.join(data_path, "%s.csv" % mech_group)
@@ -1,5 +1,3 @@
-import time
-
 from bci.evaluations.evaluation_framework import EvaluationFramework
 from bci.evaluations.xsleaks.mongodb import XSLeaksMonogDB
 from bci.version_control.version_control import RepoState
@@ -23,7 +21,7 @@ class XSLeaksEvaluation(EvaluationFramework):
     def perform_specific_evaluation(self, automation: str, browser: str, browser_version: str, driver_version: str,
                                     browser_config: str, extension_file: str, additional_cli_options: list,
                                     mech_id: str, mech_group: str, browser_binary: str, driver_exec: str,
-                                    state: RepoState, cookie_name: str):
+                                    state: RepoState, cookie_name: str, display: str = None):
         if mech_group == "first":
             test = First(browser, browser_version, mech_id, browser_binary, state)
         else:
@@ -31,14 +29,18 @@ class XSLeaksEvaluation(EvaluationFramework):
         if test is None:
             raise AttributeError("Unknown test '%s'" % mech_group)
 
+        test.display = display
         report = test.run()
-        time.sleep(5)
         mongodb = XSLeaksMonogDB.get_instance()
 
         is_dirty = self.is_dirty_evaluation(report)
         mongodb.store_data(automation, browser, browser_version, driver_version, browser_config,
                            None, additional_cli_options, state, mech_group, report, is_dirty)
 
+    def supports_parallel_evaluation(self, automation: str) -> bool:
+        # Each case writes its own report and browsers are terminated by process group
+        return True
+
     def get_data_in_json(self, data_path, mech_group):
         pass
 
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+import logging
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class ReportWatcher:
+    """
+    Waits until a JSON report with the given name is written to the given folder. Uses inotify if it is available and
+    falls back to polling the folder otherwise. The watch is set up when entering the context, so it should be entered
+    before the browser is started.
+    """
+
+    poll_interval = 0.2
+
+    def __init__(self, folder: str, file_name: str) -> None:
+        self.logger = logging.getLogger("bci")
+        self.folder = folder
+        self.file_name = file_name
+        self.path = os.path.join(folder, file_name)
+        self.inotify_fd = None
+
+    def __enter__(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            if libc.inotify_add_watch(fd, self.folder.encode(), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+                os.close(fd)
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+            self.inotify_fd = fd
+        except (OSError, AttributeError):
+            self.logger.debug(f"Could not watch '{self.folder}' with inotify, falling back to polling")
+        return self
+
+    def __exit__(self, *_):
+        if self.inotify_fd is not None:
+            os.close(self.inotify_fd)
+            self.inotify_fd = None
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Blocks until the report is completely written or the timeout expires.
+
+        :param timeout: maximum number of seconds to wait
+        :return: True if the report was written
+        """
+        deadline = time.time() + timeout
+        if self.inotify_fd is None:
+            return self.poll(deadline)
+        # Only closing or moving the report into place signals that it is complete, its creation does not
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            if self.wait_for_event(remaining):
+                return True
+
+    def poll(self, deadline: float) -> bool:
+        # The report might still be written when it is first seen, so it is only complete once it can be parsed
+        while not self.is_complete():
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.poll_interval, remaining))
+        return True
+
+    def is_complete(self) -> bool:
+        try:
+            with open(self.path, "r") as file:
+                json.load(file)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def wait_for_event(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self.inotify_fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            buffer = os.read(self.inotify_fd, 4096)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return False
+            raise
+        offset = 0
+        while offset < len(buffer):
+            _, _, _, name_length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b"\0").decode()
+            offset += name_length
+            if name == self.file_name:
+                return True
+        return False
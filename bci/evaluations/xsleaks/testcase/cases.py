@@ -4,7 +4,7 @@ from bci.evaluations.xsleaks.testcase.testcase import TestCase
 class Case01(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case1/main/")
+        self.visit("https://attack.er/custom/case1/main/", expected_report="case1.json")
         report = self.read_report("case1.json")
         return report
 
@@ -12,7 +12,7 @@ class Case01(TestCase):
 class Case02(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case2/main/")
+        self.visit("https://attack.er/custom/case2/main/", expected_report="case2.json")
         report = self.read_report("case2.json")
         return report
 
@@ -20,7 +20,7 @@ class Case02(TestCase):
 class Case03(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case3/main/")
+        self.visit("https://attack.er/custom/case3/main/", expected_report="case3.json")
         report = self.read_report("case3.json")
         return report
 
@@ -28,7 +28,7 @@ class Case03(TestCase):
 class Case04(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case4/main/", sleep_after_visit=15)
+        self.visit("https://attack.er/custom/case4/main/", sleep_after_visit=15, expected_report="case4.json")
         report = self.read_report("case4.json")
         return report
 
@@ -36,7 +36,7 @@ class Case04(TestCase):
 class Case05(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case5/main/")
+        self.visit("https://attack.er/custom/case5/main/", expected_report="case5.json")
         report = self.read_report("case5.json")
         return report
 
@@ -44,7 +44,7 @@ class Case05(TestCase):
 class Case06(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case6/a/", sleep_after_visit=20)
+        self.visit("https://attack.er/custom/case6/a/", sleep_after_visit=20, expected_report="case6.json")
         report = self.read_report("case6.json")
         return report
 
@@ -52,7 +52,7 @@ class Case06(TestCase):
 class Case07(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case7/main/")
+        self.visit("https://attack.er/custom/case7/main/", expected_report="case7.json")
         report = self.read_report("case7.json")
         return report
 
@@ -60,7 +60,7 @@ class Case07(TestCase):
 class Case08(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case8/main/")
+        self.visit("https://attack.er/custom/case8/main/", expected_report="case8.json")
         report = self.read_report("case8.json")
         return report
 
@@ -68,7 +68,7 @@ class Case08(TestCase):
 class Case09(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case9/main/")
+        self.visit("https://attack.er/custom/case9/main/", expected_report="case9.json")
         report = self.read_report("case9.json")
         return report
 
@@ -76,7 +76,7 @@ class Case09(TestCase):
 class Case10(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case10/main/")
+        self.visit("https://attack.er/custom/case10/main/", expected_report="case10.json")
         report = self.read_report("case10.json")
         return report
 
@@ -84,8 +84,8 @@ class Case10(TestCase):
 class Case11(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case11/redirect/")
-        self.visit("https://attack.er/custom/case11/no_redirect/")
+        self.visit("https://attack.er/custom/case11/redirect/", expected_report="case11_redirect.json")
+        self.visit("https://attack.er/custom/case11/no_redirect/", expected_report="case11_no_redirect.json")
         report1 = self.read_report("case11_redirect.json")
         report2 = self.read_report("case11_no_redirect.json")
 
@@ -104,7 +104,7 @@ class Case11(TestCase):
 class Case12(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case12/main/")
+        self.visit("https://attack.er/custom/case12/main/", expected_report="case12.json")
         report = self.read_report("case12.json")
         return report
 
@@ -113,7 +113,7 @@ class Case13(TestCase):
 
     def run(self):
         self.visit("https://sub.leak.test/resource1")
-        self.visit("https://attack.er/custom/case13/main/", clean_profile=False)
+        self.visit("https://attack.er/custom/case13/main/", clean_profile=False, expected_report="case13.json")
         report = self.read_report("case13.json")
         return report
 
@@ -121,7 +121,7 @@ class Case13(TestCase):
 class Case15(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case15/main/")
+        self.visit("https://attack.er/custom/case15/main/", expected_report="case15.json")
         report = self.read_report("case15.json")
         return report
 
@@ -129,7 +129,7 @@ class Case15(TestCase):
 class Case18(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case18/main/")
+        self.visit("https://attack.er/custom/case18/main/", expected_report="case18.json")
         report = self.read_report("case18.json")
         return report
 
@@ -137,7 +137,7 @@ class Case18(TestCase):
 class Case19(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case19/main/")
+        self.visit("https://attack.er/custom/case19/main/", expected_report="case19.json")
         report = self.read_report("case19.json")
         return report
 
@@ -145,7 +145,7 @@ class Case19(TestCase):
 class Case20(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case20/main/")
+        self.visit("https://attack.er/custom/case20/main/", expected_report="case20.json")
         report = self.read_report("case20.json")
         return report
 
@@ -153,7 +153,7 @@ class Case20(TestCase):
 class Case25(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case25/main/")
+        self.visit("https://attack.er/custom/case25/main/", expected_report="case25.json")
         report = self.read_report("case25.json")
         return report
 
@@ -161,7 +161,7 @@ class Case25(TestCase):
 class Case25b(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case25/old/")
+        self.visit("https://attack.er/custom/case25/old/", expected_report="case25b.json")
         report = self.read_report("case25b.json")
         return report
 
@@ -169,7 +169,7 @@ class Case25b(TestCase):
 class Case29(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case29/main/")
+        self.visit("https://attack.er/custom/case29/main/", expected_report="case29.json")
         report = self.read_report("case29.json")
         return report
 
@@ -177,7 +177,7 @@ class Case29(TestCase):
 class Case30(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case30/main/")
+        self.visit("https://attack.er/custom/case30/main/", expected_report="case30.json")
         report = self.read_report("case30.json")
         return report
 
@@ -185,7 +185,7 @@ class Case30(TestCase):
 class Case31(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/case31/main/")
+        self.visit("https://attack.er/custom/case31/main/", expected_report="case31.json")
         report = self.read_report("case31.json")
         return report
 
@@ -194,7 +194,7 @@ class DefaultSameSite(TestCase):
 
     def run(self):
         self.visit("https://re.port/set_cookie/generic_cookie/1/")
-        self.visit("https://attack.er/custom/default_samesite/main", clean_profile=False)
+        self.visit("https://attack.er/custom/default_samesite/main", clean_profile=False, expected_report="default_samesite.json")
         report = self.read_report("default_samesite.json")
         return report
 
@@ -203,7 +203,7 @@ class SameSite(TestCase):
 
     def run(self):
         self.visit("https://re.port/set_lax_cookie/ss_lax_cookie/1/")
-        self.visit("https://attack.er/custom/samesite/main", clean_profile=False)
+        self.visit("https://attack.er/custom/samesite/main", clean_profile=False, expected_report="samesite.json")
         report = self.read_report("samesite.json")
         return report
 
@@ -211,7 +211,7 @@ class SameSite(TestCase):
 class SecFetchSite(TestCase):
 
     def run(self):
-        self.visit("https://attack.er/custom/SecFetchSite/main")
+        self.visit("https://attack.er/custom/SecFetchSite/main", expected_report="SecFetchSite.json")
         report = self.read_report("SecFetchSite.json")
         return report
 
@@ -220,6 +220,6 @@ class NetworkIsolation(TestCase):
 
     def run(self):
         self.visit("https://leak.test/custom/NetworkIsolation/main")
-        self.visit("https://attack.er/custom/NetworkIsolation/main", clean_profile=False)
+        self.visit("https://attack.er/custom/NetworkIsolation/main", clean_profile=False, expected_report="NetworkIsolation.json")
         report = self.read_report("NetworkIsolation.json")
         return report
@@ -1,12 +1,15 @@
 import json
-import time
+import shlex
 import logging
 import os.path
 from abc import abstractmethod
 from bci import cli
 from bci import util
+from bci.process_supervisor import SupervisedProcess
 from bci.version_control.version_control import RepoState
 from bci.evaluations.jar_interface import Jar
+from bci.evaluations.profile_cache import ProfileCache
+from bci.evaluations.xsleaks.report_watcher import ReportWatcher
 
 
 class TestCase:
@@ -22,37 +25,32 @@ class TestCase:
         self.browser_binary = browser_binary
         self.state = state
         self.profile_path: str = ""
+        self.display: str = None
 
     @abstractmethod
     def run(self):
         pass
 
     def get_new_profile(self):
-        if self.profile_path is not None:
+        if self.profile_path:
             util.rmtree(self.profile_path)
         self.profile_path = Jar.increment_until_original("/tmp/new-profile")
-        cli.execute("mkdir -p %s" % self.profile_path)
         if self.browser == "chromium":
             pass
         elif self.browser == "firefox":
-            # Make Firefox trust the proxy CA and server CA
-            # cert9.db  key4.db  pkcs11.txt
-            cli.execute(
-                "certutil -A -n littleproxy -t CT,c -i /app/ssl/LittleProxy_MITM.cer -d sql:%s" % self.profile_path)
-            # Normally: cert8.db  key3.db  secmod.db, however: cert9.db  key4.db  pkcs11.txt
-            cli.execute(
-                "certutil -A -n littleproxy -t CT,c -i /app/ssl/LittleProxy_MITM.cer -d %s" % self.profile_path)
-            # cert9.db  key4.db  pkcs11.txt
-            cli.execute(
-                "certutil -A -n myCA -t CT,c -i /app/ssl/myCA.crt -d sql:%s" % self.profile_path)
-            # Normally: cert8.db  key3.db  secmod.db, however: cert9.db  key4.db  pkcs11.txt
-            cli.execute(
-                "certutil -A -n myCA -t CT,c -i /app/ssl/myCA.crt -d %s" % self.profile_path)
-            # The certutil in the docker image refuses to create cert8.db, so we copy
-            # an existing cert8.db which accepts the necessary CAs
-            cli.execute("cp /app/profiles/firefox/cert8.db %s" % self.profile_path)
+            ProfileCache.get_instance().clone_firefox_profile(self.profile_path)
 
-    def visit(self, url: str, clean_profile=True, sleep_after_visit=20):
+    def visit(self, url: str, clean_profile=True, sleep_after_visit=20, expected_report: str = None):
+        """
+        Visits the given url in the browser under evaluation.
+
+        :param url: url to visit
+        :param clean_profile: whether to start from a new profile
+        :param sleep_after_visit: number of seconds the browser is kept open, or the maximum number of seconds to wait
+        for the expected report
+        :param expected_report: name of the report that is written by the visited page, the visit ends as soon as it
+        is written
+        """
         self.logger.info("Visiting '%s' %s a clean profile" % (url, "with" if clean_profile or self.profile_path is None else "without"))
         if self.profile_path == "" or clean_profile:
             self.get_new_profile()
@@ -68,21 +66,27 @@ class TestCase:
         else:
             raise AttributeError("Unknown browser '%s'" % self.browser)
         self.logger.info("Executing command '%s'" % command)
-        cli.execute_as_daemon(command)
+        if expected_report is None:
+            browser_process = self.start_browser(command)
+            browser_process.wait(timeout=sleep_after_visit)
+        else:
+            # Remove stale reports, so only the report of this visit ends the wait
+            report_path = os.path.join(TestCase.REPORTS_FOLDER, expected_report)
+            if os.path.isfile(report_path):
+                os.remove(report_path)
+            with ReportWatcher(TestCase.REPORTS_FOLDER, expected_report) as watcher:
+                browser_process = self.start_browser(command)
+                if not watcher.wait(sleep_after_visit):
+                    self.logger.info(f"Report '{expected_report}' was not written within {sleep_after_visit} seconds")
+        browser_process.terminate()
 
-        time.sleep(sleep_after_visit)
-        command = "pkill -SIGINT %s" % ("chrome" if self.browser == "chromium" else "firefox")
-        self.logger.info("Executing command '%s'" % command)
-        cli.execute_and_return_status(command)
-        time.sleep(3)
-        command = "pkill -SIGINT %s" % ("chrome" if self.browser == "chromium" else "firefox")
-        self.logger.info("Executing command '%s'" % command)
-        cli.execute_and_return_status(command)
-        time.sleep(3)
-        command = "pkill -o dbus-launch"
-        self.logger.info("Executing command '%s'" % command)
-        cli.execute_and_return_status(command)
-        time.sleep(1)
+    def start_browser(self, command: str) -> SupervisedProcess:
+        env = dict(os.environ)
+        # Prevents browsers from autolaunching a dbus daemon that outlives them
+        env["DBUS_SESSION_BUS_ADDRESS"] = "disabled:"
+        if self.display:
+            env["DISPLAY"] = self.display
+        return SupervisedProcess(shlex.split(command), env=env)
 
     @staticmethod
     def read_report(file_name: str, remove_after=True):
@@ -90,7 +94,12 @@ class TestCase:
         if not os.path.isfile(path):
             return None
         with open(path, "r") as file:
-            report = json.load(file)
+            try:
+                report = json.load(file)
+            except ValueError:
+                # E.g. a report that was not completely written before the browser was terminated
+                logging.getLogger("bci").warning(f"Report '{file_name}' could not be parsed, it is ignored")
+                report = None
         if remove_after:
             cli.execute("rm %s" % path)
         return report
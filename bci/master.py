@@ -6,15 +6,20 @@ from bci.params import DatabaseParams, EvalParams
 from bci.data_storage.mongodb import MongoDB, ServerException
 from bci.browser_build.firefox_build import FirefoxBuild
 from bci.browser_build.chromium_build import ChromiumBuild
+from bci.browser_build.prefetcher import BinaryPrefetcher
+from bci.browser_build.binary_installer import BinaryInstaller
 from bci.search_strategy.sequence_strategy import SequenceStrategy
 from bci.version_control.version_control import RepoLineage, RepoState
 from bci.search_strategy.n_ary_search import NArySearch
 from bci.search_strategy.n_ary_sequence import NArySequence, SequenceFinished
 from bci.search_strategy.composite_search import CompositeSearch
+from bci.search_strategy.multi_target_search import MultiTargetSearch
+from bci.search_strategy.availability_bitmap import AvailabilityBitmap
 from bci.evaluations.samesite.samesite_evaluation import SameSiteEvaluationFramework
 from bci.evaluations.custom.custom_evaluation import CustomEvaluationFramework
 from bci.evaluations.xsleaks.evaluation import XSLeaksEvaluation
 from bci.distribution.manager import ContainerManager
+from bci.distribution.worker_pool import WorkerPoolManager
 
 logger = None
 stop = False
@@ -22,6 +27,7 @@ stop = False
 evaluations = []
 evaluation_framework = None
 container_manager = None
+search_strategy = None
 available_evaluation_frameworks = {}
 
 firefox_build = None
@@ -38,14 +44,15 @@ def initialize():
 
     logger = logging.getLogger("bci")
 
+    inititialize_available_evaluation_frameworks()
+
     try:
-        MongoDB.connect()
+        MongoDB.connect(
+            db_classes=[framework.db_class for framework in available_evaluation_frameworks.values()])
     except ServerException:
         logger.critical("A database server occurred", exc_info=True)
         return
 
-    inititialize_available_evaluation_frameworks()
-
     firefox_build = FirefoxBuild(
         Config.firefox_repo_path,
         Config.firefox_bin_folder_path,
@@ -66,6 +73,7 @@ def run(eval_params: EvalParams):
     global stop
     global evaluation_framework
     global container_manager
+    global search_strategy
 
     logger.info(
         "Starting evaluation for %s (%s)"
@@ -75,11 +83,15 @@ def run(eval_params: EvalParams):
     evaluation_framework = get_specific_evaluation_framework(
         eval_params.evaluation_framework_name
     )
-    container_manager = ContainerManager(eval_params.nb_of_containers)
+    if eval_params.persistent_workers:
+        container_manager = WorkerPoolManager(eval_params.nb_of_containers)
+    else:
+        container_manager = ContainerManager(eval_params.nb_of_containers)
 
     try:
         browser_build = get_browser_build(eval_params.browser)
         browser_build.set_only_releases(eval_params.only_release_commits)
+        browser_build.refresh_availability_index()
         state_lineage = get_state_lineage(
             eval_params.browser,
             eval_params.lower_version,
@@ -90,38 +102,80 @@ def run(eval_params: EvalParams):
         )
 
         search_strategy = parse_search_strategy(
-            eval_params.search_strategy, state_lineage, browser_build, eval_params.nb_of_containers, eval_params.sequence_limit
+            eval_params.search_strategy, state_lineage, browser_build, eval_params.nb_of_containers, eval_params.sequence_limit,
+            mech_ids=eval_params.mech_ids
         )
+        # The multi-target search takes the outcomes of all mechanisms instead of the outcome of a single mech_id
+        is_multi_target = isinstance(search_strategy, MultiTargetSearch)
 
         # The state_lineage is put into self.evaluation as a means to check on the process through front-end
         evaluations.append(state_lineage)
 
+        # Resolve all states that were already evaluated at once, so that only the missing states require a worker
+        if is_multi_target:
+            evaluated_outcomes = evaluation_framework.get_all_outcomes_with_params(
+                eval_params.get_database_params(), state_lineage.state_ids)
+        else:
+            evaluated_outcomes = evaluation_framework.get_all_data_with_params(
+                eval_params.get_database_params(), state_lineage.state_ids)
+        logger.info(f"{len(evaluated_outcomes)} of {state_lineage.nb_of_states} states were already evaluated")
+
+        # Binaries are downloaded in the background, dispatching a state only waits for the binary of that state
+        installer = BinaryInstaller(browser_build, eval_params.nb_of_containers, availability_cb=search_strategy.set_available)
+        prefetcher = None
+        if eval_params.prefetch_lookahead > 0:
+            prefetcher = BinaryPrefetcher(installer, search_strategy, eval_params.prefetch_lookahead,
+                                           skipped_state_ids=evaluated_outcomes.keys())
+            prefetcher.start()
+
         try:
             current_state = search_strategy.next()
             while stop is False:
-                database_params = eval_params.get_database_params(current_state.id)
-
-                # Callback function for sequence strategy
-                update_outcome = get_update_outcome_cb(search_strategy, database_params, current_state)
-
                 # Check whether state is already evaluated
-                if evaluation_framework.has_all_data_with_params(database_params):
+                if current_state.id in evaluated_outcomes:
                     logger.info(f"State '{current_state.id}' already evaluated.")
-                    update_outcome()
+                    if is_multi_target or eval_params.mech_id is not None:
+                        search_strategy.update_outcome(current_state, evaluated_outcomes[current_state.id])
                     current_state = search_strategy.next()
                     continue
 
+                database_params = eval_params.get_database_params(current_state.id)
+
+                # Callback function for sequence strategy, which also releases the binary of the state
+                browser_build.binary_cache.mark_in_use(current_state.id)
+                update_outcome = get_update_outcome_cb(search_strategy, database_params, current_state, browser_build)
+
                 # Start worker to perform evaluation
-                worker_params = eval_params.get_worker_params(current_state.id)
-                container_manager.start_container(worker_params, update_outcome)
+                try:
+                    if Config.shared_binary_store:
+                        install_binary(installer, current_state)
+                    else:
+                        # The worker installs the binary itself, but should not install a binary that is being
+                        # prefetched
+                        installer.wait_until_installed(current_state)
+                    worker_params = eval_params.get_worker_params(current_state.id)
+                    container_manager.start_container(worker_params, update_outcome)
+                except Exception:
+                    # The callback that releases the binary is only called for started evaluations
+                    browser_build.binary_cache.release(current_state.id)
+                    raise
                 logger.info(f"Container started for {current_state}")
 
                 current_state = search_strategy.next()
         except SequenceFinished:
             logger.debug("Last evaluation has started")
+        finally:
+            if prefetcher:
+                prefetcher.stop()
+            installer.shutdown()
 
     except Exception as e:
         logger.critical("A critical error occurred", exc_info=True)
+        # Persistent workers would otherwise keep waiting for jobs
+        try:
+            container_manager.shutdown()
+        except Exception:
+            logger.error("Could not shut down the container manager", exc_info=True)
         raise e
 
     # Gracefully exit
@@ -135,13 +189,45 @@ def run(eval_params: EvalParams):
     logger.info("Waiting for remaining containers to finish")
     container_manager.wait_until_all_containers_are_done()
     logger.info("Ended gracefully, all containers have finished")
+    if isinstance(search_strategy, MultiTargetSearch):
+        for mech_id, (lower_state, upper_state) in search_strategy.get_target_bounds().items():
+            logger.info(f"Outcome of '{mech_id}' changes between {lower_state.id} and {upper_state.id}")
+
+
+def install_binary(installer: BinaryInstaller, state: RepoState):
+    """
+    Installs the binary of the given state in the shared binary store, which workers mount read-only.
+    """
+    try:
+        installer.install_and_wait(state)
+    except Exception:
+        # The worker will report the build as unavailable
+        logger.error(f"Could not install binary of {state.id} in the shared binary store", exc_info=True)
 
 
-def get_update_outcome_cb(search_strategy: SequenceStrategy, params: DatabaseParams, state: RepoState) -> None:
-    def cb():
-        if params.mech_id is not None:
-            outcome = evaluation_framework.get_data_with_params(params)
-            search_strategy.update_outcome(state, outcome)
+def get_update_outcome_cb(search_strategy: SequenceStrategy, params: DatabaseParams, state: RepoState, browser_build: BrowserBuild) -> None:
+    def cb(success: bool = True):
+        try:
+            update_outcome(success)
+        finally:
+            # The worker is done with the binary, from now on it can be evicted
+            browser_build.binary_cache.release(state.id)
+
+    def update_outcome(success: bool):
+        is_multi_target = isinstance(search_strategy, MultiTargetSearch)
+        if not is_multi_target and params.mech_id is None:
+            return
+        # A failed evaluation is reported as well, otherwise the search strategy keeps waiting for its outcome
+        outcome = None
+        if success:
+            try:
+                if is_multi_target:
+                    outcome = evaluation_framework.get_outcomes_with_params(params)
+                else:
+                    outcome = evaluation_framework.get_data_with_params(params)
+            except Exception:
+                logger.error(f"Could not retrieve outcome of {state.id}", exc_info=True)
+        search_strategy.update_outcome(state, outcome)
     return cb
 
 
@@ -196,13 +282,23 @@ def get_specific_evaluation_framework(evaluation_name: str):
     return available_evaluation_frameworks[evaluation_name]
 
 
-def parse_search_strategy(search_strategy_option: str, state_lineage: RepoLineage, browser_build: BrowserBuild, n: int, sequence_limit: int):
+def parse_search_strategy(search_strategy_option: str, state_lineage: RepoLineage, browser_build: BrowserBuild, n: int, sequence_limit: int, mech_ids: list = None):
+    search_strategy = create_search_strategy(search_strategy_option, state_lineage, browser_build, n, sequence_limit, mech_ids=mech_ids)
+    availability_bitmap = AvailabilityBitmap.from_lineage(state_lineage, browser_build)
+    logger.info(f"Binaries available for {availability_bitmap.nb_of_available} of {len(availability_bitmap)} states")
+    search_strategy.set_availability_bitmap(availability_bitmap)
+    return search_strategy
+
+
+def create_search_strategy(search_strategy_option: str, state_lineage: RepoLineage, browser_build: BrowserBuild, n: int, sequence_limit: int, mech_ids: list = None):
     if search_strategy_option == "bin_seq":
         return NArySequence(state_lineage.states, lambda state: browser_build.is_available_locally_or_online(state.id), n, limit=sequence_limit)
     if search_strategy_option == "bin_search":
         return NArySearch(state_lineage.states, lambda state: browser_build.is_available_locally_or_online(state.id), n)
     if search_strategy_option == "comp_search":
         return CompositeSearch(state_lineage.states, lambda state: browser_build.is_available_locally_or_online(state.id), n, sequence_limit, NArySequence, NArySearch)
+    if search_strategy_option == "multi_search":
+        return MultiTargetSearch(state_lineage.states, lambda state: browser_build.is_available_locally_or_online(state.id), mech_ids=mech_ids)
     raise AttributeError("Unknown search strategy option '%s'" % search_strategy_option)
 
 
@@ -230,6 +326,10 @@ def update_artisanal_binaries(browser):
     return get_browser_build(browser).update_artisanal_binaries_meta_data()
 
 
+def get_database_index_usage():
+    return MongoDB.get_index_usage()
+
+
 def download_online_binary(browser, state_id):
     try:
         logger.info("Download process started")
@@ -246,3 +346,6 @@ def stop_after_current_evaluation():
     logger.info("Received stop signal from user")
     stop = True
     evaluation_framework.stop_gracefully()
+    # The multi-target search might be waiting for the outcomes of running evaluations
+    if isinstance(search_strategy, MultiTargetSearch):
+        search_strategy.stop()
@@ -11,6 +11,7 @@ class EvalParams:
         self.browser_name = None
         self.configuration_option = None
         self.mech_id = None
+        self.mech_ids = []
         self.mech_groups = []
         self.cookie_name = None
         self.extension_name = None
@@ -23,6 +24,8 @@ class EvalParams:
         self.search_strategy = None
         self.automation = None
         self.nb_of_containers = None
+        self.persistent_workers = False
+        self.prefetch_lookahead = 0
         self.sequence_limit = None
 
         if form_data:
@@ -41,6 +44,9 @@ class EvalParams:
     def set_mech_id(self, mech_id: str):
         self.mech_id = mech_id
 
+    def set_mech_ids(self, mech_ids: list):
+        self.mech_ids = mech_ids
+
     def set_mech_groups(self, mech_groups: list):
         self.mech_groups = mech_groups
 
@@ -77,6 +83,12 @@ class EvalParams:
     def set_nb_of_containers(self, nb: int):
         self.nb_of_containers = nb
 
+    def set_persistent_workers(self):
+        self.persistent_workers = True
+
+    def set_prefetch_lookahead(self, nb: int):
+        self.prefetch_lookahead = nb
+
     def set_sequence_limit(self, nb: int):
         self.sequence_limit = nb
 
@@ -98,7 +110,11 @@ class EvalParams:
         self.set_search_strategy(form_data["search_strategy_option"])
 
         self.set_nb_of_containers(int(form_data["nb_of_containers"]))
+        if "persistent_workers" in form_data:
+            self.set_persistent_workers()
         self.set_sequence_limit(int(form_data["sequence_limit"]))
+        if form_data.get("prefetch_lookahead", "") != "":
+            self.set_prefetch_lookahead(int(form_data["prefetch_lookahead"]))
 
         if "btpc" in form_data:
             self.set_configuration_option("btpc")
@@ -123,7 +139,11 @@ class EvalParams:
                 )
 
         if form_data["mech_id"] != "":
-            self.set_mech_id(form_data["mech_id"])
+            if self.search_strategy == "multi_search":
+                # The multi-target search localizes all given (comma-separated) mechanisms at once
+                self.set_mech_ids([mech_id.strip() for mech_id in form_data["mech_id"].split(",") if mech_id.strip()])
+            else:
+                self.set_mech_id(form_data["mech_id"])
 
         selected_mech_group_tags = list(
             filter(
@@ -183,7 +203,7 @@ class EvalParams:
     def get_worker_params(self, state_id: str):
         return WorkerParams(state_id, self)
 
-    def get_database_params(self, state_id: str):
+    def get_database_params(self, state_id: str = None):
         return DatabaseParams(state_id, self)
 
 
@@ -201,6 +221,30 @@ class WorkerParams:
         self.additional_cli_options = eval_params.additional_cli_arguments
         self.cookie_name = eval_params.cookie_name
 
+    def to_dict(self) -> dict:
+        return {
+            "evaluation_framework_name": self.evaluation_framework_name,
+            "automation": self.automation,
+            "browser": self.browser,
+            "state_id": self.state_id,
+            "configuration_option": self.configuration_option,
+            "mech_id": self.mech_id,
+            "mech_groups": self.mech_groups,
+            "extension_name": self.extension_name,
+            "additional_cli_options": self.additional_cli_options,
+            "cookie_name": self.cookie_name,
+        }
+
+    @staticmethod
+    def from_dict(data: dict):
+        """
+        Reconstructs worker parameters that were serialized with to_dict (e.g. to be passed through a job queue).
+        """
+        params = WorkerParams.__new__(WorkerParams)
+        for key, value in data.items():
+            setattr(params, key, value)
+        return params
+
 
 class DatabaseParams:
 
@@ -212,12 +256,22 @@ class DatabaseParams:
         self.additional_cli_options = eval_params.additional_cli_arguments
         self.mech_groups = eval_params.mech_groups
         self.mech_id = eval_params.mech_id
-        self.state_id = int(state_id) if state_id.isdigit() else state_id
+        self.state_id = DatabaseParams.get_stored_state_id(state_id) if state_id is not None else None
         self.cookie_name = eval_params.cookie_name
 
-    def to_mongodb_query(self):
+    @staticmethod
+    def get_stored_state_id(state_id: str):
+        return int(state_id) if state_id.isdigit() else state_id
+
+    def to_mongodb_query(self, state_ids: list = None):
+        """
+        Returns the query matching the documents of this evaluation, either for the state of these parameters or, if
+        given, for all of the given states.
+        """
         query = {
-            "state_id": self.state_id,
+            "state_id": self.state_id if state_ids is None else {
+                "$in": [DatabaseParams.get_stored_state_id(state_id) for state_id in state_ids]
+            },
             "browser_automation": self.automation,
             "browser_config": self.browser_setting,
             "mech_group": {"$in": self.mech_groups},
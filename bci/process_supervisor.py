@@ -0,0 +1,132 @@
+import os
+import time
+import atexit
+import signal
+import logging
+import threading
+import subprocess
+
+logger = logging.getLogger("bci")
+
+# Signals sent to a process tree that does not exit, in order
+TERMINATION_SIGNALS = [signal.SIGINT, signal.SIGTERM, signal.SIGKILL]
+
+running_processes = set()
+running_processes_lock = threading.Lock()
+
+
+class SupervisedProcess:
+    """
+    Process started in its own process group, so that it can be terminated together with everything it spawned
+    without affecting other processes in the container.
+    """
+
+    def __init__(self, args: list, cwd: str = None, env: dict = None, stdout=None, stderr=None) -> None:
+        self.args = args
+        self.process = subprocess.Popen(args, cwd=cwd, env=env, stdout=stdout, stderr=stderr, start_new_session=True)
+        self.pid = self.process.pid
+        with running_processes_lock:
+            running_processes.add(self)
+
+    @property
+    def stdout(self):
+        return self.process.stdout
+
+    @property
+    def returncode(self):
+        return self.process.returncode
+
+    def wait(self, timeout: float = None):
+        """
+        Waits for the started process to exit.
+
+        :param timeout: maximum number of seconds to wait, or None to wait indefinitely
+        :return: the exit code, or None if the process is still running after the timeout
+        """
+        try:
+            return_code = self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None
+        if not self.get_tree_pids():
+            self.forget()
+        return return_code
+
+    def get_tree_pids(self) -> set:
+        """
+        Returns the live processes in the process group of this process, or descending from it.
+        """
+        parents = {}
+        group_pids = set()
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as file:
+                    stat = file.read()
+            except OSError:
+                continue
+            # The command name can contain spaces, so fields are counted from its closing parenthesis
+            fields = stat[stat.rindex(")") + 2:].split(" ")
+            pid, state, ppid, pgid = int(entry), fields[0], int(fields[1]), int(fields[2])
+            if state in ("Z", "X"):
+                continue
+            parents[pid] = ppid
+            if pgid == self.pid:
+                group_pids.add(pid)
+        tree_pids = {self.pid} if self.pid in parents else set()
+        added = True
+        while added:
+            children = {pid for pid, ppid in parents.items() if ppid in tree_pids and pid not in tree_pids}
+            tree_pids |= children
+            added = len(children) > 0
+        return tree_pids | group_pids
+
+    def terminate(self, grace_period: float = 5):
+        """
+        Terminates the process tree, escalating to stronger signals if it does not exit within the grace period.
+        """
+        for sig in TERMINATION_SIGNALS:
+            pids = self.get_tree_pids()
+            if not pids:
+                break
+            self.send_signal(pids, sig)
+            deadline = time.time() + grace_period
+            while time.time() < deadline:
+                self.process.poll()
+                if not self.get_tree_pids():
+                    break
+                time.sleep(0.1)
+        self.process.poll()
+        remaining_pids = self.get_tree_pids()
+        if remaining_pids:
+            logger.error(f"Processes {sorted(remaining_pids)} of '{self.args[0]}' survived termination")
+        self.forget()
+
+    def send_signal(self, pids: set, sig: int):
+        try:
+            os.killpg(self.pid, sig)
+        except ProcessLookupError:
+            pass
+        # Processes that moved to another process group are signalled individually
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def forget(self):
+        with running_processes_lock:
+            running_processes.discard(self)
+
+
+def terminate_all():
+    """
+    Terminates all supervised processes that are still running.
+    """
+    with running_processes_lock:
+        processes = list(running_processes)
+    for process in processes:
+        process.terminate()
+
+
+atexit.register(terminate_all)
@@ -0,0 +1,57 @@
+from typing import Iterable
+
+
+class AvailabilityBitmap:
+    """
+    Availability of a binary for every state in a lineage, stored as one byte per state and indexed like the states of
+    the lineage. It is populated in bulk once and shared by all search strategies operating on the lineage.
+    """
+
+    AVAILABLE = 1
+    UNAVAILABLE = 0
+
+    def __init__(self, length: int, available_indexes: Iterable[int] = ()) -> None:
+        self.bitmap = bytearray(length)
+        for index in available_indexes:
+            self.bitmap[index] = AvailabilityBitmap.AVAILABLE
+
+    @staticmethod
+    def from_lineage(state_lineage, browser_build):
+        state_ids = state_lineage.state_ids
+        available_state_ids = browser_build.get_available_state_ids(state_ids)
+        return AvailabilityBitmap(
+            len(state_ids),
+            available_indexes=(index for index, state_id in enumerate(state_ids) if state_id in available_state_ids))
+
+    def __len__(self) -> int:
+        return len(self.bitmap)
+
+    @property
+    def nb_of_available(self) -> int:
+        return self.bitmap.count(AvailabilityBitmap.AVAILABLE)
+
+    def is_available(self, index: int) -> bool:
+        return self.bitmap[index] == AvailabilityBitmap.AVAILABLE
+
+    def set_available(self, index: int, available: bool) -> None:
+        self.bitmap[index] = AvailabilityBitmap.AVAILABLE if available else AvailabilityBitmap.UNAVAILABLE
+
+    def find_closest_available_index(self, target_index: int, lower_index: int = 0, upper_index: int = None):
+        """
+        Returns the index of the available state closest to target_index within [lower_index, upper_index), or None if
+        there is none. Ties are resolved in favour of the lower index. The search itself is done by bytearray.find and
+        bytearray.rfind, so it does not iterate over the states in Python.
+        """
+        if upper_index is None:
+            upper_index = len(self.bitmap)
+        right_index = self.bitmap.find(AvailabilityBitmap.AVAILABLE, target_index, upper_index)
+        left_index = self.bitmap.rfind(AvailabilityBitmap.AVAILABLE, lower_index, target_index)
+        if right_index == -1 and left_index == -1:
+            return None
+        if right_index == -1:
+            return left_index
+        if left_index == -1:
+            return right_index
+        if target_index - left_index <= right_index - target_index:
+            return left_index
+        return right_index
@@ -1,14 +1,15 @@
-from typing import List, Callable, Tuple
+from typing import List, Callable, Tuple, Sequence
 from bci.search_strategy.sequence_strategy import SequenceStrategy
 from bci.search_strategy.n_ary_sequence import NArySequence, SequenceFinished
 from bci.search_strategy.n_ary_search import NArySearch
-from bci.search_strategy.sequence_elem import SequenceElem, Type, ElemState
+from bci.search_strategy.sequence_elem import Type
+from bci.search_strategy.availability_bitmap import AvailabilityBitmap
 
 
 class CompositeSearch(SequenceStrategy):
     def __init__(
                 self,
-                values: List[Type],
+                values: Sequence[Type],
                 is_available: Callable[[Type], bool],
                 n: int,
                 sequence_limit: int,
@@ -16,7 +17,9 @@ class CompositeSearch(SequenceStrategy):
                 search_strategy_class: NArySearch.__class__) -> None:
         super().__init__(values, is_available)
         self.n = n
-        self.sequence_strategy = sequence_strategy_class(values, is_available, n, limit=sequence_limit)
+        # All strategies share the element store of this object, search strategies operate on views of it
+        self.sequence_strategy = sequence_strategy_class(
+            values, is_available, n, limit=sequence_limit, elem_store=self.elem_store)
         self.search_strategies = []
         self.search_strategy_class = search_strategy_class
         self.sequence_strategy_finished = False
@@ -54,33 +57,47 @@ class CompositeSearch(SequenceStrategy):
         else:
             raise AttributeError("No strategy is currently active")
 
+    def set_availability_bitmap(self, availability_bitmap: AvailabilityBitmap, offset: int = 0) -> None:
+        super().set_availability_bitmap(availability_bitmap, offset=offset)
+        self.sequence_strategy.set_availability_bitmap(availability_bitmap, offset=offset)
+
+    def get_upcoming_values(self, k: int) -> List[Type]:
+        try:
+            return self.get_active_strategy().get_upcoming_values(k)
+        except AttributeError:
+            return []
+
     def update_outcome(self, elem: Type, outcome: bool) -> None:
-        self.get_active_strategy().update_outcome(elem, outcome)
-        # We only update the outcome of this object too if we are still using the sequence strategy
-        # because the elem lists need to be synced up until the search strategies are prepared.
-        # Not very clean, but does the job for now.
-        if not self.sequence_strategy_finished:
+        try:
+            active_strategy = self.get_active_strategy()
+        except AttributeError:
+            active_strategy = None
+        if active_strategy is not None and elem in active_strategy.values:
+            active_strategy.update_outcome(elem, outcome)
+        else:
+            # Outcome of an element that was started before the active strategy, only kept in the shared store
             super().update_outcome(elem, outcome)
 
     def prepare_search_strategies(self):
         shift_index_pairs = self.find_all_shift_index_pairs()
         self.search_strategies = [self.search_strategy_class(
-                self.sequence_strategy.values[left_shift_index:right_shift_index+1],
+                self.values[left_shift_index:right_shift_index+1],
                 self.is_available,
                 self.n,
-                prior_elems=self.get_elems_slice(left_shift_index, right_shift_index+1))
+                elem_store=self.elem_store.get_slice(left_shift_index, right_shift_index+1))
             for left_shift_index, right_shift_index in shift_index_pairs]
-
-    def get_elems_slice(self, start: int, end: int) -> List[SequenceElem]:
-        return [elem.get_deep_copy(index=i) for i, elem in enumerate(self._elems[start:end])]
+        if self.availability_bitmap is not None:
+            for search_strategy, (left_shift_index, _) in zip(self.search_strategies, shift_index_pairs):
+                search_strategy.set_availability_bitmap(
+                    self.availability_bitmap, offset=self.availability_bitmap_offset + left_shift_index)
 
     def find_all_shift_index_pairs(self) -> List[Tuple[int, int]]:
-        # Filter out all errors and unevaluated elements
-        filtered_elems = [elem for elem in self._elems if elem.state not in [ElemState.ERROR, ElemState.INITIALIZED]]
-        filtered_elems_outcomes = [elem.outcome for elem in filtered_elems]
-        # Get start indexes of shift in outcome
-        shift_indexes = [i for i in range(0, len(filtered_elems_outcomes) - 1) if filtered_elems_outcomes[i] != filtered_elems_outcomes[i+1]]
-        # Convert to index pairs for original value list
-        shift_elem_pairs = [(filtered_elems[shift_index], filtered_elems[shift_index + 1]) for shift_index in shift_indexes if shift_index + 1 < len(filtered_elems)]
-        shift_index_pairs = [(left_shift_elem.index, right_shift_elem.index) for left_shift_elem, right_shift_elem in shift_elem_pairs]
-        return shift_index_pairs
+        # Only evaluated elements with an outcome are taken into account
+        evaluated_indexes = list(self.elem_store.iter_evaluated_indexes())
+        outcomes = [self.elem_store.get_outcome(index) for index in evaluated_indexes]
+        # Get index pairs of consecutive evaluated elements with a different outcome
+        return [
+            (evaluated_indexes[i], evaluated_indexes[i + 1])
+            for i in range(0, len(outcomes) - 1)
+            if outcomes[i] != outcomes[i + 1]
+        ]
@@ -0,0 +1,85 @@
+from typing import Iterator, Optional
+from bci.search_strategy.sequence_elem import ElemState
+
+
+class ElemStore:
+    """
+    Evaluation state, outcome and availability of every element of a sequence, stored as one byte per element in
+    separate arrays that are indexed like the sequence. A store can be sliced into a view that shares the arrays of the
+    original store, so sub-searches see and update the same elements without copying them.
+    """
+
+    NO_OUTCOME = 0
+    NEGATIVE_OUTCOME = 1
+    POSITIVE_OUTCOME = 2
+
+    AVAILABILITY_UNKNOWN = 0
+    UNAVAILABLE = 1
+    AVAILABLE = 2
+
+    def __init__(self, length: int) -> None:
+        self.states = bytearray(length)
+        self.outcomes = bytearray(length)
+        self.availability = bytearray(length)
+        self.offset = 0
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def get_slice(self, start: int, end: int) -> 'ElemStore':
+        """
+        Returns a view on the elements [start, end), of which the indexes start at 0.
+        """
+        if not 0 <= start <= end <= self.length:
+            raise AttributeError(f"Slice [{start}, {end}) is out of bounds for a store of {self.length} elements")
+        view = ElemStore.__new__(ElemStore)
+        view.states = self.states
+        view.outcomes = self.outcomes
+        view.availability = self.availability
+        view.offset = self.offset + start
+        view.length = end - start
+        return view
+
+    def get_state(self, index: int) -> ElemState:
+        return ElemState(self.states[self.offset + index])
+
+    def set_state(self, index: int, state: ElemState) -> None:
+        self.states[self.offset + index] = state.value
+
+    def is_initialized(self, index: int) -> bool:
+        return self.states[self.offset + index] == ElemState.INITIALIZED.value
+
+    def get_outcome(self, index: int) -> Optional[bool]:
+        outcome = self.outcomes[self.offset + index]
+        if outcome == ElemStore.NO_OUTCOME:
+            return None
+        return outcome == ElemStore.POSITIVE_OUTCOME
+
+    def update_outcome(self, index: int, outcome: Optional[bool]) -> None:
+        if self.states[self.offset + index] == ElemState.DONE.value:
+            raise AttributeError(f"Outcome was already set to DONE for element {index}")
+        if outcome is None:
+            self.set_state(index, ElemState.ERROR)
+            return
+        self.set_state(index, ElemState.DONE)
+        self.outcomes[self.offset + index] = ElemStore.POSITIVE_OUTCOME if outcome else ElemStore.NEGATIVE_OUTCOME
+
+    def get_cached_availability(self, index: int) -> Optional[bool]:
+        availability = self.availability[self.offset + index]
+        if availability == ElemStore.AVAILABILITY_UNKNOWN:
+            return None
+        return availability == ElemStore.AVAILABLE
+
+    def set_cached_availability(self, index: int, available: bool) -> None:
+        self.availability[self.offset + index] = ElemStore.AVAILABLE if available else ElemStore.UNAVAILABLE
+
+    def iter_evaluated_indexes(self) -> Iterator[int]:
+        """
+        Yields the indexes of all elements with an outcome (state DONE), in order.
+        """
+        done = ElemState.DONE.value
+        index = self.states.find(done, self.offset, self.offset + self.length)
+        while index != -1:
+            yield index - self.offset
+            index = self.states.find(done, index + 1, self.offset + self.length)
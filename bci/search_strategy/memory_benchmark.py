@@ -0,0 +1,72 @@
+"""
+Measures the memory taken by a Chromium lineage and the search strategies that operate on it, for lineages of
+increasing length. The lineage and the strategy are built like master.run does, with an availability bitmap that
+marks every state as available, and the composite search is driven through its sequence phase so that its search
+strategies (views on the shared element store) are included.
+
+Usage: python -m bci.search_strategy.memory_benchmark [--length N ...] [--n N] [--sequence-limit L]
+"""
+import time
+import tracemalloc
+import click
+from bci.version_control.chromium_vc import ChromiumRepoLineage
+from bci.search_strategy.n_ary_sequence import NArySequence, SequenceFinished
+from bci.search_strategy.n_ary_search import NArySearch
+from bci.search_strategy.composite_search import CompositeSearch
+from bci.search_strategy.availability_bitmap import AvailabilityBitmap
+
+FIRST_COMMIT_POS = 500000
+
+
+def create_search_strategy(name: str, lineage: ChromiumRepoLineage, n: int, sequence_limit: int):
+    if name == "bin_seq":
+        return NArySequence(lineage.states, lambda _: True, n, limit=sequence_limit)
+    if name == "bin_search":
+        return NArySearch(lineage.states, lambda _: True, n)
+    return CompositeSearch(lineage.states, lambda _: True, n, sequence_limit, NArySequence, NArySearch)
+
+
+def drive_sequence_phase(search_strategy, sequence_limit: int):
+    """
+    Evaluates the elements of the sequence phase, with a single shift in outcome halfway the lineage.
+    """
+    middle = len(search_strategy.values) // 2
+    for _ in range(sequence_limit):
+        try:
+            state = search_strategy.next()
+        except SequenceFinished:
+            return
+        search_strategy.update_outcome(state, int(state.id) - FIRST_COMMIT_POS >= middle)
+
+
+def measure(name: str, length: int, n: int, sequence_limit: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    lineage = ChromiumRepoLineage(range(FIRST_COMMIT_POS, FIRST_COMMIT_POS + length))
+    search_strategy = create_search_strategy(name, lineage, n, sequence_limit)
+    availability_bitmap = AvailabilityBitmap(length, available_indexes=range(length))
+    search_strategy.set_availability_bitmap(availability_bitmap)
+    if name == "comp_search":
+        drive_sequence_phase(search_strategy, sequence_limit)
+    duration = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak, duration, len(lineage.materialized_states)
+
+
+@click.command()
+@click.option("--length", "lengths", multiple=True, type=int, default=[10 ** 5, 3 * 10 ** 5, 10 ** 6])
+@click.option("--n", default=8)
+@click.option("--sequence-limit", default=50)
+def run(lengths, n, sequence_limit):
+    print(f"{'strategy':<14}{'elements':>10}{'bytes/elem':>12}{'peak/elem':>11}{'states':>8}{'setup':>9}")
+    for name in ("bin_seq", "bin_search", "comp_search"):
+        for length in lengths:
+            current, peak, duration, nb_of_states = measure(name, length, n, sequence_limit)
+            print(f"{name:<14}{length:>10}{current / length:>12.2f}{peak / length:>11.2f}{nb_of_states:>8}"
+                  f"{duration:>8.3f}s")
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    run()
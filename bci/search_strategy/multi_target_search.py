@@ -0,0 +1,241 @@
+import math
+import time
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from bci.search_strategy.sequence_elem import Type, ElemState
+from bci.search_strategy.elem_store import ElemStore
+from bci.search_strategy.sequence_strategy import SequenceStrategy, SequenceFinished
+
+
+class MultiTargetSearch(SequenceStrategy):
+    """
+    Bisects the lineage for several mechanisms (targets) at once. Every evaluation yields the outcome of all mechanisms
+    in the evaluated mech groups, so each target keeps its own bounds over the same lineage: the last index with the
+    outcome of the lower boundary and the first index with the outcome of the upper boundary.
+
+    The next state is chosen to split as many unresolved targets as possible. Each candidate index is scored by the
+    expected information it yields, summed over all targets whose bounds contain it: a target contributes the binary
+    entropy of the split of the segment (between bounds and states still in progress) the index falls in, weighted by
+    the share of the target's bounds taken by that segment. An index in the middle of the bounds of k targets therefore
+    scores k, and an index that splits a single target or lies near a bound scores less.
+
+    Outcomes are given to update_outcome as a dictionary of mech_id to outcome (None if the evaluation failed).
+    Mechanisms missing from that dictionary are considered negative, like MongoDB.get_outcome_from_results does.
+    """
+
+    def __init__(
+            self,
+            values: Sequence[Type],
+            is_available: Callable[[Type], bool],
+            mech_ids: List[str] = None,
+            max_pending_time: float = 3600,
+            elem_store: ElemStore = None) -> None:
+        """
+        :param mech_ids: mechanisms to localize, if not given every mechanism whose outcome differs between the two
+            boundaries of the lineage is localized
+        :param max_pending_time: seconds after which an evaluation that has not returned an outcome is considered
+            failed, as a last resort for outcomes that are lost (failed evaluations are reported with a None outcome)
+        """
+        super().__init__(values, is_available, elem_store=elem_store)
+        self.mech_ids = mech_ids
+        self.max_pending_time = max_pending_time
+        self.condition = threading.Condition()
+        self.pending_since: Dict[int, float] = {}
+        self.outcomes: Dict[int, dict] = {}
+        self.boundary_indexes: Optional[Tuple[int, int]] = None
+        self.targets: Optional[Dict[str, List[int]]] = None
+        """
+        Bounds [lower, upper] of every unresolved target, None as long as the outcomes of the boundaries are unknown.
+        """
+        self.reference_outcomes: Dict[str, bool] = {}
+        self.resolved_targets: Dict[str, Tuple[int, int]] = {}
+        self.stopped = False
+
+    def next(self) -> Type:
+        with self.condition:
+            while True:
+                if self.stopped:
+                    raise SequenceFinished()
+                self.expire_pending_evaluations()
+                index = self.choose_next_index()
+                if index is not None:
+                    self.elem_store.set_state(index, ElemState.IN_PROGRESS)
+                    self.pending_since[index] = time.monotonic()
+                    return self.values[index]
+                if not self.pending_since:
+                    raise SequenceFinished()
+                # The outcomes of the evaluations in progress determine which states are worth evaluating next
+                oldest_pending_time = min(self.pending_since.values())
+                self.condition.wait(timeout=max(1, oldest_pending_time + self.max_pending_time - time.monotonic()))
+
+    def update_outcome(self, value: Type, outcome: Optional[dict]) -> None:
+        with self.condition:
+            index = self.get_index(value)
+            self.pending_since.pop(index, None)
+            if outcome is None:
+                self.elem_store.set_state(index, ElemState.ERROR)
+            else:
+                self.elem_store.set_state(index, ElemState.DONE)
+                self.outcomes[index] = outcome
+            if self.targets is None:
+                self.initialize_targets()
+            elif outcome is not None:
+                self.update_bounds(index)
+            self.condition.notify_all()
+
+    def stop(self):
+        """
+        Ends the search, a call to next that is waiting for outcomes raises SequenceFinished right away.
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def expire_pending_evaluations(self):
+        now = time.monotonic()
+        for index, pending_time in list(self.pending_since.items()):
+            if now - pending_time > self.max_pending_time:
+                self.logger.warning(f"No outcome for {self.values[index]} after {self.max_pending_time}s, considering it failed")
+                del self.pending_since[index]
+                self.elem_store.set_state(index, ElemState.ERROR)
+                if self.targets is None:
+                    self.initialize_targets()
+
+    def choose_next_index(self) -> Optional[int]:
+        if self.boundary_indexes is None:
+            try:
+                self.boundary_indexes = (
+                    self.find_closest_available_index(0),
+                    self.find_closest_available_index(len(self.values) - 1))
+            except AttributeError:
+                self.logger.error("None of the states of the lineage is available")
+                return None
+        for boundary_index in self.boundary_indexes:
+            if self.elem_store.is_initialized(boundary_index):
+                return boundary_index
+        if self.targets is None:
+            return None
+        scored_candidates = self.get_scored_candidates()
+        if not scored_candidates:
+            return None
+        return max(scored_candidates, key=lambda candidate: (candidate[1], -candidate[0]))[0]
+
+    def get_upcoming_indexes(self, k: int) -> List[int]:
+        with self.condition:
+            if self.boundary_indexes is None or self.targets is None:
+                return [0, len(self.values) - 1][:k]
+            scored_candidates = sorted(self.get_scored_candidates(), key=lambda candidate: (-candidate[1], candidate[0]))
+            return [index for index, _ in scored_candidates[:k]]
+
+    def initialize_targets(self):
+        if self.boundary_indexes is None:
+            return
+        lower_index, upper_index = self.boundary_indexes
+        if lower_index not in self.outcomes or upper_index not in self.outcomes:
+            # Wait for the outcome of the other boundary
+            if not any(self.elem_store.get_state(index) == ElemState.ERROR for index in self.boundary_indexes):
+                return
+            self.logger.error("Evaluation of a lineage boundary failed, no targets can be localized")
+            self.targets = {}
+            return
+        lower_outcomes = self.outcomes[lower_index]
+        upper_outcomes = self.outcomes[upper_index]
+        mech_ids = self.mech_ids if self.mech_ids else sorted(set(lower_outcomes) | set(upper_outcomes))
+        self.targets = {}
+        for mech_id in mech_ids:
+            lower_outcome = lower_outcomes.get(mech_id, False)
+            if lower_outcome == upper_outcomes.get(mech_id, False):
+                self.logger.info(f"Outcome of '{mech_id}' does not change within the lineage, it is not localized")
+                continue
+            self.targets[mech_id] = [lower_index, upper_index]
+            self.reference_outcomes[mech_id] = lower_outcome
+        self.logger.info(f"Localizing {len(self.targets)} mechanisms: {', '.join(self.targets)}")
+        for index in sorted(self.outcomes):
+            self.update_bounds(index)
+
+    def update_bounds(self, index: int):
+        outcomes = self.outcomes[index]
+        for mech_id, bounds in self.targets.items():
+            if bounds[0] < index < bounds[1]:
+                if outcomes.get(mech_id, False) == self.reference_outcomes[mech_id]:
+                    bounds[0] = index
+                else:
+                    bounds[1] = index
+
+    def get_scored_candidates(self) -> List[Tuple[int, float]]:
+        """
+        Returns the evaluable candidate indexes with their score, and moves the targets that cannot be narrowed down
+        any further to the resolved targets.
+        """
+        pending_indexes = sorted(self.pending_since)
+        target_cuts = {}
+        candidates = set()
+        for mech_id, (lower_bound, upper_bound) in list(self.targets.items()):
+            cuts = [lower_bound] + pending_indexes[
+                bisect_left(pending_indexes, lower_bound + 1):bisect_left(pending_indexes, upper_bound)] + [upper_bound]
+            segment_candidates = set()
+            for lower_cut, upper_cut in zip(cuts, cuts[1:]):
+                candidate = self.find_evaluable_index((lower_cut + upper_cut) // 2, lower_cut + 1, upper_cut)
+                if candidate is not None:
+                    segment_candidates.add(candidate)
+            if segment_candidates:
+                target_cuts[mech_id] = cuts
+                candidates |= segment_candidates
+            elif len(cuts) == 2:
+                # Nothing left to evaluate between the bounds and nothing in progress
+                self.resolve_target(mech_id)
+        return [(candidate, self.get_score(candidate, target_cuts)) for candidate in candidates]
+
+    def get_score(self, index: int, target_cuts: Dict[str, List[int]]) -> float:
+        score = 0
+        for cuts in target_cuts.values():
+            lower_bound, upper_bound = cuts[0], cuts[-1]
+            if not lower_bound < index < upper_bound:
+                continue
+            position = bisect_left(cuts, index)
+            if cuts[position] == index:
+                continue
+            lower_cut, upper_cut = cuts[position - 1], cuts[position]
+            ratio = (index - lower_cut) / (upper_cut - lower_cut)
+            entropy = -ratio * math.log2(ratio) - (1 - ratio) * math.log2(1 - ratio)
+            score += entropy * (upper_cut - lower_cut) / (upper_bound - lower_bound)
+        return score
+
+    def find_evaluable_index(self, target_index: int, lower_index: int, upper_index: int) -> Optional[int]:
+        """
+        Returns the index closest to target_index within [lower_index, upper_index) that is available and not yet
+        evaluated, or None if there is none.
+        """
+        try:
+            index = self.find_closest_available_index(target_index, lower_index=lower_index, upper_index=upper_index)
+        except AttributeError:
+            return None
+        if self.elem_store.is_initialized(index):
+            return index
+        # Only failed evaluations lie between cuts, so the remaining parts are searched separately
+        closest_indexes = [
+            closest_index for closest_index in [
+                self.find_evaluable_index(target_index, lower_index, index),
+                self.find_evaluable_index(target_index, index + 1, upper_index),
+            ] if closest_index is not None
+        ]
+        if not closest_indexes:
+            return None
+        return min(closest_indexes, key=lambda closest_index: abs(closest_index - target_index))
+
+    def resolve_target(self, mech_id: str):
+        lower_bound, upper_bound = self.targets.pop(mech_id)
+        self.resolved_targets[mech_id] = (lower_bound, upper_bound)
+        self.logger.info(
+            f"Outcome of '{mech_id}' changes between {self.values[lower_bound]} and {self.values[upper_bound]} "
+            f"({upper_bound - lower_bound - 1} states in between without outcome)")
+
+    def get_target_bounds(self) -> Dict[str, Tuple[Type, Type]]:
+        """
+        Returns the lower and upper bound of every target, resolved or not, as values of the lineage.
+        """
+        with self.condition:
+            bounds = dict(self.resolved_targets)
+            bounds.update({mech_id: tuple(target_bounds) for mech_id, target_bounds in (self.targets or {}).items()})
+            return {mech_id: (self.values[lower], self.values[upper]) for mech_id, (lower, upper) in bounds.items()}
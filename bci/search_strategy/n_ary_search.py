@@ -1,15 +1,15 @@
 from bisect import insort
-from typing import List, Callable, Tuple
+from typing import List, Callable, Tuple, Sequence
 
 from black import out
-from bci.search_strategy.sequence_elem import SequenceElem
+from bci.search_strategy.elem_store import ElemStore
 from bci.search_strategy.n_ary_sequence import NArySequence, Type, SequenceFinished, ElemState
 
 
 class NArySearch(NArySequence):
 
-    def __init__(self, values: List[Type], is_available: Callable[[Type], bool], n: int, prior_elems: List[SequenceElem] = None) -> None:
-        super().__init__(values, is_available, n, prior_elems=prior_elems)
+    def __init__(self, values: Sequence[Type], is_available: Callable[[Type], bool], n: int, elem_store: ElemStore = None) -> None:
+        super().__init__(values, is_available, n, elem_store=elem_store)
         self.lower_bound = 0
         """
         Lower boundary, only indexes equal or higher should be evaluated.
@@ -19,19 +19,18 @@ class NArySearch(NArySequence):
         Strict upper boundary, only indexes strictly lower should be evaluated.
         """
         self.outcomes: List[Tuple[int, bool]] = []
-        if prior_elems:
-            for elem in prior_elems:
-                if elem.outcome is not None:
-                    self.update_boundaries(elem.value, elem.outcome)
+        if elem_store is not None:
+            for index in list(self.elem_store.iter_evaluated_indexes()):
+                self.update_boundaries(index, self.elem_store.get_outcome(index))
 
     def update_outcome(self, value: Type, outcome: bool) -> None:
-        super().update_outcome(value, outcome)
-        self.update_boundaries(value, outcome)
+        index = self.get_index(value)
+        self.elem_store.update_outcome(index, outcome)
+        self.update_boundaries(index, outcome)
 
-    def update_boundaries(self, value: Type, outcome: bool) -> None:
+    def update_boundaries(self, new_index: int, outcome: bool) -> None:
         if outcome is None:
             return
-        new_index = self._elem_info[value].index
         insort(self.outcomes, (new_index, outcome), key=lambda x: x[0])
         if len(self.outcomes) < 3:
             return
@@ -46,26 +45,35 @@ class NArySearch(NArySequence):
             del self.outcomes[0]
             self.lower_bound = index1
             self.upper_bound = index2
-        lower_value = self._elems[self.lower_bound].value
-        upper_value = self._elems[self.upper_bound - 1].value
+        lower_value = self.values[self.lower_bound]
+        upper_value = self.values[self.upper_bound - 1]
         self.logger.info(f"Boundaries updated: {lower_value} <= x <= {upper_value}")
 
+    def truncate_range(self, lower_index: int, upper_index: int):
+        if lower_index >= self.upper_bound or upper_index < self.lower_bound:
+            # The range is completely out of bounds, so we just discard it
+            return None
+        if lower_index < self.lower_bound:
+            # The range is partly out of bounds, so we truncate it
+            # (possible because closest available elem instead of exact elem)
+            lower_index = self.lower_bound
+        if upper_index > self.upper_bound:
+            # Same as above
+            upper_index = self.upper_bound
+        return lower_index, upper_index
+
+    def get_upcoming_indexes(self, k: int) -> List[int]:
+        return [index for index in super().get_upcoming_indexes(k) if self.lower_bound <= index < self.upper_bound]
+
     def next(self) -> Type:
         while True:
             while self.index_queue.empty():
                 if self.range_queue.empty():
                     raise SequenceFinished()
-                (lower_index, upper_index) = self.range_queue.get()
-                if lower_index >= self.upper_bound or upper_index < self.lower_bound:
-                    # The range is completely out of bounds, so we just discard it
+                truncated_range = self.truncate_range(*self.range_queue.get())
+                if truncated_range is None:
                     continue
-                if lower_index < self.lower_bound:
-                    # The range is partly out of bounds, so we truncate it
-                    # (possible because closest available elem instead of exact elem)
-                    lower_index = self.lower_bound
-                if upper_index > self.upper_bound:
-                    # Same as above
-                    upper_index = self.upper_bound
+                (lower_index, upper_index) = truncated_range
                 new_indexes, new_ranges = self.divide_range(lower_index, upper_index, self.n)
                 for new_index in new_indexes:
                     self.index_queue.put(new_index)
@@ -76,7 +84,7 @@ class NArySearch(NArySequence):
             # Could not be the case if the index was added to the queue after the bounds were updated
             if self.lower_bound <= index < self.upper_bound:
                 # Get closest available elem and check whether it is not yet evaluated
-                closest_available_elem = self.find_closest_available_elem(index)
-                if closest_available_elem.state == ElemState.INITIALIZED:
-                    closest_available_elem.state = ElemState.IN_PROGRESS
-                    return closest_available_elem.value
+                closest_available_index = self.find_closest_available_index(index)
+                if self.elem_store.is_initialized(closest_available_index):
+                    self.elem_store.set_state(closest_available_index, ElemState.IN_PROGRESS)
+                    return self.values[closest_available_index]
@@ -1,21 +1,23 @@
 import math
-from typing import List, Callable
+from collections import deque
+from typing import List, Callable, Sequence
 from queue import Queue
-from bci.search_strategy.sequence_elem import ElemState, SequenceElem
+from bci.search_strategy.sequence_elem import ElemState
+from bci.search_strategy.elem_store import ElemStore
 from bci.search_strategy.sequence_strategy import SequenceStrategy, Type, SequenceFinished
 
 
 class NArySequence(SequenceStrategy):
 
-    def __init__(self, values: List[Type], is_available: Callable[[Type], bool], n: int, limit=float('inf'), prior_elems: List[SequenceElem] = None) -> None:
-        super().__init__(values, is_available, prior_elems=prior_elems)
+    def __init__(self, values: Sequence[Type], is_available: Callable[[Type], bool], n: int, limit=float('inf'), elem_store: ElemStore = None) -> None:
+        super().__init__(values, is_available, elem_store=elem_store)
         if n <= 1:
             self.logger.info(f"n currently equals {n}, while it should equal 2 or greater for n-ary search. Using 2 instead.")
             self.n = 2
         else:
             self.n = n
         first_index = 0
-        last_index = len(self._elems) - 1
+        last_index = len(self.elem_store) - 1
         self.index_queue = Queue()
         self.index_queue.put(first_index)
         self.index_queue.put(last_index)
@@ -37,13 +39,36 @@ class NArySequence(SequenceStrategy):
                     self.index_queue.put(new_index)
                 for new_range in new_ranges:
                     self.range_queue.put(new_range)
-            target_elem = self.index_queue.get()
-            closest_available_elem = self.find_closest_available_elem(target_elem)
-            self.logger.debug(f"Next state should be {repr(target_elem)}, but {repr(closest_available_elem)} is closest available")
-            if closest_available_elem.state == ElemState.INITIALIZED:
-                closest_available_elem.state = ElemState.IN_PROGRESS
+            target_index = self.index_queue.get()
+            closest_available_index = self.find_closest_available_index(target_index)
+            self.logger.debug(f"Next state should be {target_index}, but {closest_available_index} is closest available")
+            if self.elem_store.is_initialized(closest_available_index):
+                self.elem_store.set_state(closest_available_index, ElemState.IN_PROGRESS)
                 self.nb_of_started_evaluations += 1
-                return closest_available_elem.value
+                return self.values[closest_available_index]
+
+    def get_upcoming_indexes(self, k: int) -> List[int]:
+        nb_of_remaining_evaluations = self.limit - self.nb_of_started_evaluations
+        k = int(min(k, nb_of_remaining_evaluations))
+        with self.index_queue.mutex:
+            upcoming_indexes = list(self.index_queue.queue)
+        with self.range_queue.mutex:
+            ranges = deque(self.range_queue.queue)
+        # Divide copies of the queued ranges in the same order as next() would, without touching the queues
+        while len(upcoming_indexes) < k and ranges:
+            truncated_range = self.truncate_range(*ranges.popleft())
+            if truncated_range is None:
+                continue
+            new_indexes, new_ranges = self.divide_range(*truncated_range, self.n)
+            upcoming_indexes.extend(new_indexes)
+            ranges.extend(new_ranges)
+        return upcoming_indexes[:k]
+
+    def truncate_range(self, lower_index: int, higher_index: int):
+        """
+        Returns the part of the given range that is still relevant, or None if it can be discarded entirely.
+        """
+        return lower_index, higher_index
 
     @staticmethod
     def divide_range(lower_index, higher_index, n):
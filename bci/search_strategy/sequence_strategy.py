@@ -1,34 +1,102 @@
 import logging
-from typing import List, Generic, Callable
+from typing import List, Generic, Callable, Sequence
 from abc import abstractmethod
 from threading import Thread
-from bci.search_strategy.sequence_elem import Type, SequenceElem
+from bci.search_strategy.sequence_elem import Type
+from bci.search_strategy.elem_store import ElemStore
+from bci.search_strategy.availability_bitmap import AvailabilityBitmap
 
 
 class SequenceStrategy(Generic[Type]):
-    def __init__(self, values: List[Type], is_available: Callable[[Type], bool], prior_elems: List[SequenceElem] = None) -> None:
+    def __init__(self, values: Sequence[Type], is_available: Callable[[Type], bool], elem_store: ElemStore = None) -> None:
+        """
+        :param values: values to evaluate, values are mapped to their index with values.index (which is done by the
+            lineage for its states)
+        :param is_available: callback that returns whether a value can be evaluated
+        :param elem_store: store (or view on a store) of the elements, shared with other strategies
+        """
         self.logger = logging.getLogger("bci")
-        if prior_elems and len(values) != len(prior_elems):
-            raise AttributeError(f"List of values and list of elems should be of equal length ({len(values)} != {len(prior_elems)})")
+        if elem_store is not None and len(values) != len(elem_store):
+            raise AttributeError(f"List of values and store of elems should be of equal length ({len(values)} != {len(elem_store)})")
         self.values = values
         self.is_available = is_available
-        if prior_elems:
-            self._elems = prior_elems
-        else:
-            self._elems = [SequenceElem(index, value, is_available) for index, value in enumerate(values)]
-        self._elem_info = {
-            elem.value: elem
-            for elem in self._elems
-        }
-
-    def update_outcome(self, elem: Type, outcome: bool) -> None:
-        self._elem_info[elem].update_outcome(outcome)
+        self.elem_store = ElemStore(len(values)) if elem_store is None else elem_store
+        self.availability_bitmap = None
+        self.availability_bitmap_offset = 0
+
+    def set_availability_bitmap(self, availability_bitmap: AvailabilityBitmap, offset: int = 0) -> None:
+        """
+        Sets the availability bitmap that is used to find available elements, instead of probing their availability
+        one by one.
+
+        :param availability_bitmap: bitmap of the lineage
+        :param offset: index in the bitmap that corresponds with the first element of this strategy
+        """
+        self.availability_bitmap = availability_bitmap
+        self.availability_bitmap_offset = offset
+
+    def set_available(self, value: Type, available: bool) -> None:
+        """
+        Records the availability of the given value, e.g. once its binary is installed or turned out to be unavailable.
+        """
+        index = self.get_index(value)
+        self.elem_store.set_cached_availability(index, available)
+        if self.availability_bitmap is not None:
+            self.availability_bitmap.set_available(self.availability_bitmap_offset + index, available)
+
+    def update_outcome(self, value: Type, outcome: bool) -> None:
+        self.elem_store.update_outcome(self.get_index(value), outcome)
+
+    def get_index(self, value: Type) -> int:
+        return self.values.index(value)
+
+    def is_available_at(self, index: int) -> bool:
+        available = self.elem_store.get_cached_availability(index)
+        if available is None:
+            available = self.is_available(self.values[index])
+            self.elem_store.set_cached_availability(index, available)
+        return available
 
     @abstractmethod
     def next(self) -> Type:
         pass
 
-    def find_closest_available_elem(self, target_index: int) -> SequenceElem:
+    def get_upcoming_indexes(self, k: int) -> List[int]:
+        """
+        Returns the indexes of (at most k) elements that are likely to be evaluated next, without altering the strategy.
+        """
+        return []
+
+    def get_upcoming_values(self, k: int) -> List[Type]:
+        """
+        Returns the values of (at most k) available and unevaluated elements that are likely to be evaluated next.
+        """
+        upcoming_indexes = []
+        for index in self.get_upcoming_indexes(k):
+            try:
+                closest_index = self.find_closest_available_index(index)
+            except AttributeError:
+                continue
+            if self.elem_store.is_initialized(closest_index) and closest_index not in upcoming_indexes:
+                upcoming_indexes.append(closest_index)
+        return [self.values[index] for index in upcoming_indexes]
+
+    def find_closest_available_index(self, target_index: int, lower_index: int = 0, upper_index: int = None) -> int:
+        """
+        Returns the index of the available element closest to target_index within [lower_index, upper_index).
+        """
+        if upper_index is None:
+            upper_index = len(self.elem_store)
+        if lower_index >= upper_index:
+            raise AttributeError(f"Could not find closest available build state for '{target_index}'")
+        target_index = min(max(target_index, lower_index), upper_index - 1)
+        if self.availability_bitmap is not None:
+            offset = self.availability_bitmap_offset
+            closest_index = self.availability_bitmap.find_closest_available_index(
+                offset + target_index, lower_index=offset + lower_index, upper_index=offset + upper_index)
+            if closest_index is None:
+                raise AttributeError(f"Could not find closest available build state for '{target_index}'")
+            return closest_index - offset
         diff = 0
         while True:
             potential_indexes = set(index for index in [
@@ -36,13 +104,13 @@ class SequenceStrategy(Generic[Type]):
                 target_index + diff + 1,
                 target_index - diff,
                 target_index - diff - 1,
-            ] if 0 <= index < len(self._elems))
+            ] if lower_index <= index < upper_index)
 
             if not potential_indexes:
                 raise AttributeError(f"Could not find closest available build state for '{target_index}'")
             threads = []
             for index in potential_indexes:
-                thread = ThreadWithReturnValue(target=lambda x: x if self._elems[x].is_available() else None, args=(index,))
+                thread = ThreadWithReturnValue(target=lambda x: x if self.is_available_at(x) else None, args=(index,))
                 thread.start()
                 threads.append(thread)
 
@@ -54,7 +122,7 @@ class SequenceStrategy(Generic[Type]):
             # If valid results are found, return the one closest to target
             if results:
                 results = sorted(results, key=lambda x: abs(x - target_index))
-                return self._elems[results[0]]
+                return results[0]
             # Otherwise re-iterate
             diff += 2
 
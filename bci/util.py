@@ -51,6 +51,19 @@ def rmtree(src_path):
     return False
 
 
+def get_folder_size(src_path):
+    """
+    Returns the total size in bytes of all files in the folder at given src_path.
+    """
+    size = 0
+    for dir_path, _, file_names in os.walk(src_path):
+        for file_name in file_names:
+            file_path = os.path.join(dir_path, file_name)
+            if not os.path.islink(file_path):
+                size += os.path.getsize(file_path)
+    return size
+
+
 def read_web_report(file_name):
     report_folder = "/reports"
     path = os.path.join(report_folder, file_name)
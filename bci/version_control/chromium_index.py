@@ -0,0 +1,110 @@
+import os
+import re
+import sqlite3
+import logging
+import subprocess
+from contextlib import closing
+
+INDEX_FILE_NAME = "bci_index.sqlite"
+BATCH_SIZE = 10000
+# Branches whose commit positions identify Chromium snapshots
+MAIN_BRANCH_REFS = ("refs/heads/main", "refs/heads/master")
+# Refs that are indexed, in order of preference
+INDEXED_REFS = ("origin/main", "origin/master", "HEAD")
+COMMIT_POSITION_REGEX = re.compile(r"^Cr-Commit-Position: (?P<ref>\S+)@\{#(?P<position>[0-9]+)\}\s*$")
+COMMIT_SEPARATOR = "\x1e"
+
+
+class ChromiumRepoIndex:
+    """
+    SQLite index mapping the commit positions of the Chromium main branch to git hashes, and release versions to the
+    commit position of their branch base. Commit positions are read from the Cr-Commit-Position footers in a single
+    streaming 'git log', which is extended incrementally from the last indexed commit. Branch base positions are
+    written through by whoever resolves them.
+    """
+
+    def __init__(self, repo_path: str) -> None:
+        self.logger = logging.getLogger("bci")
+        self.repo_path = repo_path
+        self.index_path = os.path.join(repo_path, ".git", INDEX_FILE_NAME)
+        self.connection = sqlite3.connect(self.index_path, timeout=60, check_same_thread=False)
+        self.is_refreshed = False
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS commit_positions (position INTEGER PRIMARY KEY, hash TEXT)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS branch_base_positions (version TEXT PRIMARY KEY, position INTEGER)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    @staticmethod
+    def exists_for(repo_path: str) -> bool:
+        return os.path.isdir(os.path.join(repo_path, ".git"))
+
+    def refresh(self):
+        """
+        Indexes the commits added to the indexed ref since the last refresh.
+        """
+        self.is_refreshed = True
+        ref, head_hash = self.get_indexed_ref()
+        last_indexed_hash = self.get_meta("last_indexed_hash")
+        if head_hash == last_indexed_hash:
+            return
+        revision_range = ref if last_indexed_hash is None else f"{last_indexed_hash}..{ref}"
+        self.logger.info(f"Indexing Chromium commit positions of '{revision_range}'")
+        command = ["git", "log", f"--format={COMMIT_SEPARATOR}%H%n%B", revision_range]
+        with subprocess.Popen(command, cwd=self.repo_path, stdout=subprocess.PIPE, text=True,
+                              errors="replace") as process:
+            batch = []
+            commit_hash = None
+            for line in process.stdout:
+                if line.startswith(COMMIT_SEPARATOR):
+                    commit_hash = line[1:].strip()
+                    continue
+                match = COMMIT_POSITION_REGEX.match(line)
+                if match and commit_hash and match.group("ref") in MAIN_BRANCH_REFS:
+                    batch.append((int(match.group("position")), commit_hash))
+                    commit_hash = None
+                    if len(batch) >= BATCH_SIZE:
+                        self.insert_commit_positions(batch)
+                        batch = []
+            self.insert_commit_positions(batch)
+        if process.returncode != 0:
+            raise AttributeError(f"Could not index Chromium repository, git exited with code {process.returncode}")
+        self.set_meta("last_indexed_hash", head_hash)
+
+    def get_indexed_ref(self):
+        for ref in INDEXED_REFS:
+            try:
+                head_hash = subprocess.check_output(
+                    ["git", "rev-parse", "--verify", "--quiet", ref], cwd=self.repo_path, text=True).strip()
+                return ref, head_hash
+            except subprocess.CalledProcessError:
+                continue
+        raise AttributeError(f"None of the refs {', '.join(INDEXED_REFS)} exist in '{self.repo_path}'")
+
+    def insert_commit_positions(self, commit_positions: list):
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO commit_positions VALUES (?, ?)", commit_positions)
+
+    def get_commit_hash(self, commit_pos) -> str:
+        return self.query_value("SELECT hash FROM commit_positions WHERE position = ?", int(commit_pos))
+
+    def get_branch_base_position(self, version: str) -> str:
+        position = self.query_value("SELECT position FROM branch_base_positions WHERE version = ?", version)
+        return None if position is None else str(position)
+
+    def store_branch_base_position(self, version: str, position):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO branch_base_positions VALUES (?, ?)", (version, int(position)))
+
+    def get_meta(self, key: str):
+        return self.query_value("SELECT value FROM meta WHERE key = ?", key)
+
+    def set_meta(self, key: str, value: str):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def query_value(self, query: str, *params):
+        with closing(self.connection.execute(query, params)) as cursor:
+            row = cursor.fetchone()
+        return None if row is None else row[0]
@@ -1,6 +1,8 @@
 import sys
+import logging
 from bci import cli
-from bci.version_control.version_control import RepoState, RepoLineage
+from bci.version_control.chromium_index import ChromiumRepoIndex
+from bci.version_control.version_control import RepoState, RepoLineage, StateIdRange
 
 
 class ChromiumRepo:
@@ -15,6 +17,14 @@ class ChromiumRepo:
             self.os_name = "Linux"
         else:
             raise AttributeError("Your operating system is not supported")
+        self.logger = logging.getLogger("bci")
+        # Commit positions are looked up in the index, which is only refreshed on first use
+        self.index = None
+        if ChromiumRepoIndex.exists_for(path):
+            try:
+                self.index = ChromiumRepoIndex(path)
+            except Exception:
+                self.logger.warning("Could not open Chromium repository index", exc_info=True)
 
     def checkout(self, commit_pos):
         commit_hash = self.get_commit_hash(commit_pos)
@@ -22,8 +32,27 @@ class ChromiumRepo:
         return status
 
     def get_commit_hash(self, commit_pos):
-        output = cli.execute_and_return_output("git crrev-parse %s" % commit_pos, cwd=self.path)
-        return output
+        if self.index is not None:
+            try:
+                if not self.index.is_refreshed:
+                    self.index.refresh()
+                commit_hash = self.index.get_commit_hash(commit_pos)
+                if commit_hash is not None:
+                    return commit_hash
+            except Exception:
+                self.logger.warning("Could not use Chromium repository index, falling back to crrev-parse",
+                                    exc_info=True)
+                self.index = None
+        return cli.execute_and_return_output("git crrev-parse %s" % commit_pos, cwd=self.path)
+
+    def get_branch_base_position(self, version):
+        if self.index is None:
+            return None
+        return self.index.get_branch_base_position(version)
+
+    def store_branch_base_position(self, version, position):
+        if self.index is not None:
+            self.index.store_branch_base_position(version, position)
 
     def get_commit_pos_lineage(self, ancestor_commit_pos, descendant_commit_pos):
         raise NotImplementedError()
@@ -36,25 +65,16 @@ class ChromiumRepo:
 
 
 class ChromiumRepoState(RepoState):
-    pass
+    __slots__ = ()
 
 
 class ChromiumRepoLineage(RepoLineage):
+    state_class = ChromiumRepoState
 
-    def __init__(self, commit_pos_list, evaluation_targets=None):
-        super().__init__()
-        self.commit_pos_list = commit_pos_list
-        self.states = []
-        self.generate_state_lineage(evaluation_targets)
-
-    def generate_state_lineage(self, evaluation_targets):
-        self.states = ChromiumRepoState.create_state_list(evaluation_targets, self.commit_pos_list)
-        self.ancestor_state = self.states[0]
-        self.descendant_state = self.states[len(self.states) - 1]
-
-    @property
-    def length(self):
-        return len(self.commit_pos_list)
+    def __init__(self, commit_positions: range, evaluation_targets=None):
+        if evaluation_targets is not None:
+            evaluation_targets = set(str(commit_pos) for commit_pos in evaluation_targets)
+        super().__init__(StateIdRange(commit_positions), evaluation_targets=evaluation_targets)
 
     @property
     def state_ids_are_sequential(self):
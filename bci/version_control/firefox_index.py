@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import logging
+import subprocess
+from contextlib import closing
+
+INDEX_FILE_NAME = "bci_index.sqlite"
+BATCH_SIZE = 10000
+
+
+class FirefoxRepoIndex:
+    """
+    SQLite index of the revision numbers, changeset ids and tags of a Firefox (Mercurial) repository, so that ids can
+    be translated without spawning hg. The index is stored in the .hg folder of the repository, is built with a single
+    streaming 'hg log' and is extended incrementally from the last indexed revision.
+    """
+
+    def __init__(self, repo_path: str) -> None:
+        self.logger = logging.getLogger("bci")
+        self.repo_path = repo_path
+        self.index_path = os.path.join(repo_path, ".hg", INDEX_FILE_NAME)
+        self.connection = sqlite3.connect(self.index_path, timeout=60, check_same_thread=False)
+        self.is_refreshed = False
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS changesets (rev INTEGER PRIMARY KEY, node TEXT UNIQUE)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS tags (tag TEXT PRIMARY KEY, rev INTEGER)")
+
+    def refresh(self):
+        """
+        Indexes the revisions added since the last refresh, and reloads the tags if there were any.
+        """
+        self.is_refreshed = True
+        last_indexed_rev = self.get_last_indexed_rev()
+        tip_rev = int(self.run_hg(["log", "--rev", "tip", "--template", "{rev}"]).strip())
+        if last_indexed_rev is not None and last_indexed_rev >= tip_rev:
+            return
+        first_rev = 0 if last_indexed_rev is None else last_indexed_rev + 1
+        self.logger.info(f"Indexing Firefox revisions {first_rev} to {tip_rev}")
+        command = ["hg", "log", "--rev", f"{first_rev}:{tip_rev}", "--template", "{rev} {node}\n"]
+        with subprocess.Popen(command, cwd=self.repo_path, stdout=subprocess.PIPE, text=True) as process:
+            batch = []
+            for line in process.stdout:
+                rev, node = line.split()
+                batch.append((int(rev), node))
+                if len(batch) >= BATCH_SIZE:
+                    self.insert_changesets(batch)
+                    batch = []
+            self.insert_changesets(batch)
+        if process.returncode != 0:
+            raise AttributeError(f"Could not index Firefox repository, hg exited with code {process.returncode}")
+        # New revisions can tag older revisions, so all tags are reloaded
+        tags = []
+        for line in self.run_hg(["tags", "--template", "{tag} {rev}\n"]).splitlines():
+            tag, rev = line.rsplit(" ", 1)
+            if tag != "tip":
+                tags.append((tag, int(rev)))
+        with self.connection:
+            self.connection.execute("DELETE FROM tags")
+            self.connection.executemany("INSERT OR REPLACE INTO tags VALUES (?, ?)", tags)
+
+    def insert_changesets(self, changesets: list):
+        with self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO changesets VALUES (?, ?)", changesets)
+
+    def get_last_indexed_rev(self):
+        return self.query_value("SELECT MAX(rev) FROM changesets")
+
+    def get_node(self, rev) -> str:
+        return self.query_value("SELECT node FROM changesets WHERE rev = ?", int(rev))
+
+    def get_rev(self, node: str) -> int:
+        return self.query_value("SELECT rev FROM changesets WHERE node = ?", node)
+
+    def get_tag_rev(self, tag: str) -> int:
+        return self.query_value("SELECT rev FROM tags WHERE tag = ?", tag)
+
+    def get_tag_node(self, tag: str) -> str:
+        return self.query_value(
+            "SELECT node FROM tags JOIN changesets ON tags.rev = changesets.rev WHERE tag = ?", tag)
+
+    def get_tags(self) -> list:
+        with closing(self.connection.execute("SELECT tag FROM tags ORDER BY rev")) as cursor:
+            return [row[0] for row in cursor]
+
+    def get_nodes(self, first_rev: int, last_rev: int) -> list:
+        """
+        Returns the changeset ids of the revisions from first_rev to last_rev (both inclusive), in that order.
+        """
+        order = "ASC" if first_rev <= last_rev else "DESC"
+        with closing(self.connection.execute(
+                f"SELECT node FROM changesets WHERE rev BETWEEN ? AND ? ORDER BY rev {order}",
+                (min(first_rev, last_rev), max(first_rev, last_rev)))) as cursor:
+            return [row[0] for row in cursor]
+
+    def query_value(self, query: str, *params):
+        with closing(self.connection.execute(query, params)) as cursor:
+            row = cursor.fetchone()
+        return None if row is None else row[0]
+
+    def run_hg(self, args: list) -> str:
+        return subprocess.check_output(["hg"] + args, cwd=self.repo_path, text=True)
@@ -1,5 +1,7 @@
+import logging
 from bci import cli
-from bci.version_control.version_control import RepoState, RepoLineage
+from bci.version_control.firefox_index import FirefoxRepoIndex
+from bci.version_control.version_control import RepoState, RepoLineage, PackedStateIds
 
 RELEASE_TAG_REGEX = "FIREFOX_RELEASE_%s_BASE"
 BACKUP_RELEASE_TAG_REGEX = "FIREFOX_RELEASE_%s"
@@ -14,32 +16,74 @@ class FirefoxRepo:
         if not self.is_repo(path):
             raise AttributeError("Invalid Firefox repository: '%s'" % path)
         self.path = path
+        self.logger = logging.getLogger("bci")
+        # Ids and tags are looked up in the index, which is only refreshed on first use, hg is only used for what the
+        # index cannot answer
+        try:
+            self.index = FirefoxRepoIndex(path)
+        except Exception:
+            self.logger.warning("Could not open Firefox repository index, falling back to hg", exc_info=True)
+            self.index = None
+
+    def get_index(self):
+        """
+        Returns the repository index, refreshed on first use, or None if the index cannot be used.
+        """
+        if self.index is not None and not self.index.is_refreshed:
+            try:
+                self.index.refresh()
+            except Exception:
+                self.logger.warning("Could not refresh Firefox repository index, falling back to hg", exc_info=True)
+                self.index = None
+        return self.index
 
     def checkout(self, changeset_id):
         command = "hg update --rev %s" % changeset_id
         return self.execute(command)
 
     def is_tag(self, tag):
+        index = self.get_index()
+        # Tags that are missing from the index might have been added after it was refreshed
+        if index is not None and index.get_tag_rev(tag) is not None:
+            return True
         command = 'hg log --rev tag(%s)' % tag
         status = self.execute_and_return_status(command)
         return status == 0
 
     def get_tag_list(self):
+        index = self.get_index()
+        if index is not None:
+            return index.get_tags()
         command = 'hg log --rev tag() --template "{tags}\n"'
         raw = self.execute_and_return_output(command)
         return list(filter(None, str(raw).replace("\n", " ").split(" ")))
 
     def get_changeset_id(self, tag):
+        index = self.get_index()
+        if index is not None:
+            changeset_id = index.get_tag_node(tag)
+            if changeset_id is not None:
+                return changeset_id
         command = 'hg id --rev tag(%s) --template "{node}\n"' % tag
         raw = self.execute_and_return_output(command)
         return str(raw).replace("\n", "")
 
     def get_changeset_id_from_revision_id(self, revision_id):
+        index = self.get_index()
+        if index is not None and str(revision_id).isdigit():
+            changeset_id = index.get_node(revision_id)
+            if changeset_id is not None:
+                return changeset_id
         command = 'hg id --rev %s --template "{node}\n"' % revision_id
         raw = self.execute_and_return_output(command)
         return str(raw).replace("\n", "")
 
     def get_revision_id(self, changeset_id) -> int:
+        index = self.get_index()
+        if index is not None:
+            revision_id = index.get_rev(changeset_id)
+            if revision_id is not None:
+                return revision_id
         command = 'hg id --rev %s --template "{rev}\n"' % changeset_id
         raw = self.execute_and_return_output(command)
         return int(str(raw).replace("\n", ""))
@@ -63,6 +107,14 @@ class FirefoxRepo:
         #               associated with the ancestor_changeset_id and ending with the one associated with the
         #               descendant_changeset_id. If this has to be changed to a real path from start to ending,
         #               use 'hg log --rev %s::%s --template "{node}\n"' (double colon instead of single).
+        index = self.get_index()
+        if index is not None:
+            ancestor_revision_id = index.get_rev(ancestor_changeset_id)
+            descendant_revision_id = index.get_rev(descendant_changeset_id)
+            if ancestor_revision_id is not None and descendant_revision_id is not None:
+                changeset_lineage = index.get_nodes(ancestor_revision_id, descendant_revision_id)
+                if len(changeset_lineage) == abs(descendant_revision_id - ancestor_revision_id) + 1:
+                    return changeset_lineage
         command = 'hg log --rev %s:%s --template "{node}\n"' % (ancestor_changeset_id, descendant_changeset_id)
         raw = self.execute_and_return_output(command)
         return list(filter(None, str(raw).replace("\n", " ").split(" ")))
@@ -147,6 +199,7 @@ class FirefoxRepo:
 
 
 class FirefoxRepoState(RepoState):
+    __slots__ = ("version", "release_revision_id")
 
     def __init__(self, changeset_id: str, parents=None, children=None, version: int = None):
         super().__init__(changeset_id, parents, children)
@@ -155,22 +208,11 @@ class FirefoxRepoState(RepoState):
 
 
 class FirefoxRepoLineage(RepoLineage):
+    state_class = FirefoxRepoState
 
     def __init__(self, changeset_id_list, evaluation_targets=None):
-        super().__init__()
-        self.changeset_id_list = changeset_id_list
+        super().__init__(PackedStateIds(changeset_id_list), evaluation_targets=evaluation_targets)
         self.nb_of_states_to_be_evaluated = len(evaluation_targets) if evaluation_targets else len(changeset_id_list)
-        self.states = []
-        self.generate_state_lineage(evaluation_targets)
-
-    def generate_state_lineage(self, evaluation_targets):
-        self.states = FirefoxRepoState.create_state_list(evaluation_targets, self.changeset_id_list)
-        self.ancestor_state = self.states[0]
-        self.descendant_state = self.states[len(self.states) - 1]
-
-    @property
-    def length(self):
-        return len(self.changeset_id_list)
 
     @property
     def state_ids_are_sequential(self):
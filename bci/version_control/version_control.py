@@ -1,3 +1,7 @@
+from array import array
+from collections.abc import Sequence
+
+
 class EvaluationResult:
     BuildUnavailable = "build unavailable"
     Error = "error"
@@ -7,6 +11,7 @@ class EvaluationResult:
 
 
 class RepoState:
+    __slots__ = ("id", "parents", "children", "result", "evaluation_target")
 
     def __init__(self, state_id: str, parents=None, children=None):
         self.id: str = state_id
@@ -87,32 +92,189 @@ class RepoState:
         return "%s: %s" % (str(self.id), self.result)
 
 
+class StateIdRange:
+    """
+    Ids of a lineage of consecutively numbered states (e.g. Chromium commit positions), backed by a range.
+    """
+    __slots__ = ("positions",)
+
+    def __init__(self, positions: range) -> None:
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index: int) -> str:
+        return str(self.positions[index])
+
+    def __iter__(self):
+        return (str(position) for position in self.positions)
+
+    def __contains__(self, state_id) -> bool:
+        try:
+            self.index(state_id)
+            return True
+        except ValueError:
+            return False
+
+    def index(self, state_id) -> int:
+        return self.positions.index(int(state_id))
+
+
+class PackedStateIds:
+    """
+    Hexadecimal ids of a lineage of states (e.g. Mercurial changeset ids), packed as raw bytes in a single bytes
+    object. Ids are converted back to strings when accessed, and looked up by binary search over an index array that
+    is only sorted on first lookup.
+    """
+    __slots__ = ("packed_ids", "id_size", "nb_of_ids", "sorted_indexes")
+
+    def __init__(self, state_ids) -> None:
+        packed_ids = [bytes.fromhex(state_id) for state_id in state_ids]
+        self.id_size = len(packed_ids[0]) if packed_ids else 0
+        if any(len(packed_id) != self.id_size for packed_id in packed_ids):
+            raise AttributeError("All state ids of a lineage should be of equal length")
+        self.nb_of_ids = len(packed_ids)
+        self.packed_ids = b"".join(packed_ids)
+        self.sorted_indexes = None
+
+    def __len__(self) -> int:
+        return self.nb_of_ids
+
+    def __getitem__(self, index: int) -> str:
+        return self.get_packed_id(range(self.nb_of_ids)[index]).hex()
+
+    def __iter__(self):
+        return (self.get_packed_id(index).hex() for index in range(self.nb_of_ids))
+
+    def __contains__(self, state_id) -> bool:
+        try:
+            self.index(state_id)
+            return True
+        except ValueError:
+            return False
+
+    def get_packed_id(self, index: int) -> bytes:
+        return self.packed_ids[index * self.id_size:(index + 1) * self.id_size]
+
+    def index(self, state_id) -> int:
+        packed_id = bytes.fromhex(state_id)
+        if self.sorted_indexes is None:
+            self.sorted_indexes = array("L", sorted(range(self.nb_of_ids), key=self.get_packed_id))
+        lower, upper = 0, self.nb_of_ids
+        while lower < upper:
+            middle = (lower + upper) // 2
+            if self.get_packed_id(self.sorted_indexes[middle]) < packed_id:
+                lower = middle + 1
+            else:
+                upper = middle
+        if lower < self.nb_of_ids and self.get_packed_id(self.sorted_indexes[lower]) == packed_id:
+            return self.sorted_indexes[lower]
+        raise ValueError(f"State '{state_id}' is not part of the lineage")
+
+
+class StateSequence(Sequence):
+    """
+    Read-only view on (a slice of) the states of a lineage. States are created by the lineage when they are accessed,
+    slicing a view does not copy anything.
+    """
+    __slots__ = ("lineage", "start", "stop")
+
+    def __init__(self, lineage, start: int, stop: int) -> None:
+        self.lineage = lineage
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return StateSequence(self.lineage, self.start + start, self.start + max(start, stop))
+        return self.lineage.get_state(self.start + range(len(self))[index])
+
+    def __contains__(self, state) -> bool:
+        try:
+            self.index(state)
+            return True
+        except ValueError:
+            return False
+
+    def index(self, state, start: int = 0, stop: int = None) -> int:
+        index = self.lineage.get_index(state.id) - self.start
+        if index not in range(len(self))[start:stop]:
+            raise ValueError(f"State '{state.id}' is not part of the sequence")
+        return index
+
+
 class RepoLineage:
+    """
+    Linear sequence of states from an ancestor state to a descendant state. Only the state ids are stored, in a compact
+    sequence (StateIdRange or PackedStateIds), and state objects are created when they are first accessed. The parent of
+    a state is the state preceding it in the lineage.
+    """
+    state_class = RepoState
+
+    def __init__(self, state_ids, evaluation_targets=None):
+        if len(state_ids) == 0:
+            raise AttributeError("A lineage should contain at least one state")
+        self.state_ids = state_ids
+        self.evaluation_targets = evaluation_targets
+        self.materialized_states = {}
+        self.states = StateSequence(self, 0, len(state_ids))
+
+    def get_state(self, index: int) -> RepoState:
+        state = self.materialized_states.get(index)
+        if state is None:
+            # setdefault keeps the first state object if two threads materialize the same state
+            state = self.materialized_states.setdefault(index, self.create_state(index))
+        return state
 
-    def __init__(self):
-        self.ancestor_state = None
-        self.descendant_state = None
-        self.states = []
+    def create_state(self, index: int) -> RepoState:
+        state_id = self.state_ids[index]
+        state = self.state_class(state_id)
+        is_boundary = index == 0 or index == len(self.state_ids) - 1
+        if not is_boundary and (self.evaluation_targets is None or state_id in self.evaluation_targets):
+            state.set_as_evaluation_target()
+        return state
+
+    def get_index(self, state_id) -> int:
+        return self.state_ids.index(state_id)
+
+    @property
+    def ancestor_state(self) -> RepoState:
+        return self.get_state(0)
+
+    @property
+    def descendant_state(self) -> RepoState:
+        return self.get_state(len(self.state_ids) - 1)
+
+    @property
+    def length(self):
+        return len(self.state_ids)
 
     @property
     def nb_of_states(self):
-        return len(self.states)
+        return len(self.state_ids)
 
     @property
     def nb_of_processed_states(self):
-        return len([state for state in self.states if not state.result_undefined])
+        return len([state for state in list(self.materialized_states.values()) if not state.result_undefined])
 
     @property
-    def lower_state_id(self):
-        return self.states[0].id
+    def materialized_state_list(self):
+        return [self.materialized_states[index] for index in sorted(list(self.materialized_states.keys()))]
 
     @property
-    def upper_state_id(self):
-        return self.states[len(self.states) - 1].id
+    def lower_state_id(self):
+        return self.state_ids[0]
 
     @property
-    def state_id_list(self):
-        return [state.id for state in self.states]
+    def upper_state_id(self):
+        return self.state_ids[len(self.state_ids) - 1]
 
     @property
     def state_ids_are_sequential(self):
@@ -2,7 +2,7 @@ import os
 import logging
 import logging.handlers
 import threading
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, render_template, request, redirect, url_for, jsonify
 from flask_socketio import SocketIO
 from bci import master
 from bci.web_front.log_printer import LogPrinter
@@ -106,6 +106,11 @@ def update_artisanal_meta_data(browser):
     return "Updating started"
 
 
+@app.route("/database/indexes", methods=["get"])
+def database_indexes():
+    return jsonify(master.get_database_index_usage())
+
+
 @app.route("/evaluations/<string:browser>", methods=["get"])
 def evaluations(browser):
     extensions = get_available_extensions(browser)
@@ -25,7 +25,7 @@ function hide(div_id) {
 function search_stategy_click(radio) {
     if (radio.value == "bin_seq") {
         hide("search_stategy_hidden_options");
-    } else if (radio.value == "bin_search" || radio.value == "comp_search") {
+    } else if (radio.value == "bin_search" || radio.value == "comp_search" || radio.value == "multi_search") {
         show("search_stategy_hidden_options");
     }
 }
@@ -1,7 +1,12 @@
+import os
+import time
+import logging
 import click
 from bci.browser_build.browser_build import BrowserBuild
 from bci.config import Config
 from bci.data_storage.mongodb import MongoDB
+from bci.data_storage.job_queue import JobQueue
+from bci.params import WorkerParams
 from bci.version_control.firefox_vc import FirefoxRepoState
 from bci.version_control.chromium_vc import ChromiumRepoState
 from bci.browser_build.firefox_build import FirefoxBuild
@@ -12,6 +17,11 @@ from bci.evaluations.xsleaks.evaluation import XSLeaksEvaluation
 
 logger = None
 
+JOB_POLL_INTERVAL = 1
+
+evaluation_frameworks = {}
+browser_builds = {}
+
 
 @click.command()
 @click.option("--framework-name", "-f")
@@ -24,6 +34,7 @@ logger = None
 @click.option("--extension_file", "-e")
 @click.option("--browser_cli_options", "-o", multiple=True, default=[])
 @click.option("--cookie_name", "-n")
+@click.option("--job_queue", "-q", help="Keep pulling jobs from the given job queue instead of evaluating a single state")
 def run(
     framework_name,
     automation,
@@ -35,26 +46,90 @@ def run(
     extension_file,
     browser_cli_options,
     cookie_name,
+    job_queue,
 ):
     Config.load_config()
     Config.configure_loggers()
     MongoDB.connect()
 
+    if job_queue:
+        try:
+            serve(job_queue)
+        finally:
+            MongoDB.close_data_writer()
+        return
+
     # click passes options with multiple=True as a tuple, so we convert it to a list
     browser_cli_options = list(browser_cli_options)
     evaluation_framework = get_evaluation_framework(framework_name)
     browser_build, repo_state = get_browser_build_and_repo_state(browser, state_id)
 
+    try:
+        evaluation_framework.evaluate(
+            automation,
+            browser_build,
+            repo_state,
+            config,
+            mech_id,
+            mech_groups,
+            extension_file,
+            browser_cli_options,
+            cookie_name=cookie_name,
+        )
+    finally:
+        # The master only reads the results once the container exited, so they need to be written by then
+        MongoDB.close_data_writer()
+
+
+def serve(job_queue_id: str):
+    """
+    Evaluates jobs from the given queue until a stop signal is received. Evaluation frameworks and browser builds are
+    instantiated only once and reused for all jobs.
+    """
+    global logger
+    logger = logging.getLogger("bci")
+    job_queue = JobQueue(job_queue_id)
+    worker_name = os.getenv("HOSTNAME")
+    logger.info(f"Worker '{worker_name}' is serving job queue '{job_queue_id}'")
+    while True:
+        job = job_queue.pop(worker_name)
+        if job is None:
+            time.sleep(JOB_POLL_INTERVAL)
+            continue
+        job_id, params = job
+        if params is None:
+            job_queue.complete(job_id, True)
+            break
+        try:
+            evaluate_job(params)
+            # Results have to be written before the master is notified
+            MongoDB.flush_data()
+            job_queue.complete(job_id, True)
+        except Exception:
+            logger.error(f"Could not evaluate job '{job_id}'", exc_info=True)
+            job_queue.complete(job_id, False)
+    logger.info(f"Worker '{worker_name}' received stop signal")
+
+
+def evaluate_job(params: WorkerParams):
+    if params.evaluation_framework_name not in evaluation_frameworks:
+        evaluation_frameworks[params.evaluation_framework_name] = get_evaluation_framework(params.evaluation_framework_name)
+    evaluation_framework = evaluation_frameworks[params.evaluation_framework_name]
+    if params.browser not in browser_builds:
+        browser_builds[params.browser], _ = get_browser_build_and_repo_state(params.browser, params.state_id)
+    browser_build = browser_builds[params.browser]
+    repo_state = get_repo_state(params.browser, params.state_id)
+
     evaluation_framework.evaluate(
-        automation,
+        params.automation,
         browser_build,
         repo_state,
-        config,
-        mech_id,
-        mech_groups,
-        extension_file,
-        browser_cli_options,
-        cookie_name=cookie_name,
+        params.configuration_option,
+        params.mech_id,
+        list(params.mech_groups),
+        params.extension_name,
+        list(params.additional_cli_options),
+        cookie_name=params.cookie_name,
     )
 
 
@@ -95,6 +170,14 @@ def get_browser_build_and_repo_state(browser: str, state_id: str) -> BrowserBuil
         raise AttributeError(f"Unknown browser '{browser}'")
 
 
+def get_repo_state(browser: str, state_id: str):
+    if browser == "firefox":
+        return FirefoxRepoState(state_id)
+    if browser == "chromium":
+        return ChromiumRepoState(state_id)
+    raise AttributeError(f"Unknown browser '{browser}'")
+
+
 if __name__ == "__main__":
     # pylint: disable=no-value-for-parameter
     run()
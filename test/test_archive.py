@@ -0,0 +1,153 @@
+import io
+import os
+import stat
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import unittest
+from bci.browser_build import archive
+
+
+def create_tar(members: list, compression: str = "gz") -> io.BytesIO:
+    """
+    Creates a tar archive from (name, content) pairs, content is bytes for a file or a TarInfo for other members.
+    """
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=f"w:{compression}") as tar_file:
+        for name, content in members:
+            if isinstance(content, tarfile.TarInfo):
+                tar_file.addfile(content)
+                continue
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mode = 0o644
+            tar_file.addfile(info, io.BytesIO(content))
+    buffer.seek(0)
+    return buffer
+
+
+def create_link(name: str, link_name: str, link_type=tarfile.SYMTYPE) -> tarfile.TarInfo:
+    info = tarfile.TarInfo(name)
+    info.type = link_type
+    info.linkname = link_name
+    return info
+
+
+class TestStripRoot(unittest.TestCase):
+
+    def test_without_root(self):
+        self.assertEqual(archive.strip_root("chrome-linux/chrome", ""), "chrome-linux/chrome")
+        self.assertEqual(archive.strip_root("./chrome", ""), "chrome")
+        self.assertIsNone(archive.strip_root("./", ""))
+
+    def test_with_root(self):
+        self.assertEqual(archive.strip_root("chrome-linux/chrome", "chrome-linux"), "chrome")
+        self.assertEqual(archive.strip_root("./chrome-linux/locales/en.pak", "chrome-linux/"), "locales/en.pak")
+        self.assertIsNone(archive.strip_root("chrome-linux/", "chrome-linux"))
+
+    def test_outside_root(self):
+        self.assertIsNone(archive.strip_root("other/chrome", "chrome-linux"))
+        self.assertIsNone(archive.strip_root("chrome-linux-evil/chrome", "chrome-linux"))
+
+
+class TestGetTargetPath(unittest.TestCase):
+
+    def setUp(self):
+        self.folder_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder_path)
+
+    def test_inside_folder(self):
+        self.assertEqual(
+            archive.get_target_path(self.folder_path, "a/b"),
+            os.path.join(os.path.realpath(self.folder_path), "a", "b"))
+
+    def test_path_escape(self):
+        for relative_path in ["../evil", "a/../../evil", "/etc/passwd", ".", f"../{os.path.basename(self.folder_path)}x/a"]:
+            with self.assertRaises(AttributeError, msg=relative_path):
+                archive.get_target_path(self.folder_path, relative_path)
+
+    def test_escape_through_symlink(self):
+        os.symlink("/tmp", os.path.join(self.folder_path, "link"))
+        with self.assertRaises(AttributeError):
+            archive.get_target_path(self.folder_path, "link/evil")
+
+
+class TestExtraction(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp()
+        self.folder_path = os.path.join(self.tmp_path, "install")
+        os.makedirs(self.folder_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_extract_tar_stream(self):
+        stream = create_tar([
+            ("firefox/firefox", b"binary"),
+            ("firefox/lib/libxul.so", b"library"),
+            ("firefox/libxul-link.so", create_link("firefox/libxul-link.so", "lib/libxul.so")),
+            ("other/file", b"ignored"),
+        ])
+        archive.extract_tar_stream(stream, self.folder_path, "gz", root="firefox", mode_bits=stat.S_IXUSR)
+        with open(os.path.join(self.folder_path, "firefox"), "rb") as file:
+            self.assertEqual(file.read(), b"binary")
+        self.assertTrue(os.stat(os.path.join(self.folder_path, "firefox")).st_mode & stat.S_IXUSR)
+        self.assertEqual(os.readlink(os.path.join(self.folder_path, "libxul-link.so")), "lib/libxul.so")
+        self.assertEqual(sorted(os.listdir(self.folder_path)), ["firefox", "lib", "libxul-link.so"])
+
+    def test_extract_bz2_tar_stream(self):
+        stream = create_tar([("firefox/firefox", b"binary")], compression="bz2")
+        archive.extract_tar_stream(stream, self.folder_path, "bz2", root="firefox",
+                                   bzip2_backend=archive.PythonBzip2Backend())
+        self.assertTrue(os.path.isfile(os.path.join(self.folder_path, "firefox")))
+
+    def test_tar_path_escape(self):
+        stream = create_tar([("../evil", b"evil")])
+        with self.assertRaises(AttributeError):
+            archive.extract_tar_stream(stream, self.folder_path, "gz")
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_path, "evil")))
+
+    def test_tar_escape_through_symlink(self):
+        outside_path = os.path.join(self.tmp_path, "outside")
+        os.makedirs(outside_path)
+        stream = create_tar([
+            ("link", create_link("link", outside_path)),
+            ("link/evil", b"evil"),
+        ])
+        with self.assertRaises(AttributeError):
+            archive.extract_tar_stream(stream, self.folder_path, "gz")
+        self.assertEqual(os.listdir(outside_path), [])
+
+    def test_tar_hard_link_outside_root(self):
+        stream = create_tar([
+            ("firefox/firefox", create_link("firefox/firefox", "other/file", link_type=tarfile.LNKTYPE)),
+        ])
+        with self.assertRaises(AttributeError):
+            archive.extract_tar_stream(stream, self.folder_path, "gz", root="firefox")
+
+    def test_extract_zip(self):
+        archive_path = os.path.join(self.tmp_path, "chrome.zip")
+        with zipfile.ZipFile(archive_path, "w") as zip_file:
+            info = zipfile.ZipInfo("chrome-linux/chrome")
+            info.external_attr = (stat.S_IFREG | 0o755) << 16
+            zip_file.writestr(info, b"binary")
+            zip_file.writestr("chrome-linux/locales/en.pak", b"locale")
+        archive.extract_zip(archive_path, self.folder_path, root="chrome-linux")
+        self.assertTrue(os.access(os.path.join(self.folder_path, "chrome"), os.X_OK))
+        self.assertTrue(os.path.isfile(os.path.join(self.folder_path, "locales", "en.pak")))
+
+    def test_zip_path_escape(self):
+        archive_path = os.path.join(self.tmp_path, "evil.zip")
+        with zipfile.ZipFile(archive_path, "w") as zip_file:
+            zip_file.writestr("../evil", b"evil")
+        with self.assertRaises(AttributeError):
+            archive.extract_zip(archive_path, self.folder_path)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_path, "evil")))
+
+
+if __name__ == '__main__':
+    unittest.main()
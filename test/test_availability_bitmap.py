@@ -0,0 +1,40 @@
+import unittest
+from bci.search_strategy.availability_bitmap import AvailabilityBitmap
+from bci.version_control.version_control import StateIdRange
+
+
+class TestAvailabilityBitmap(unittest.TestCase):
+
+    def test_find_closest_available_index(self):
+        bitmap = AvailabilityBitmap(10, available_indexes=[2, 6])
+        self.assertEqual(bitmap.nb_of_available, 2)
+        self.assertEqual(bitmap.find_closest_available_index(3), 2)
+        self.assertEqual(bitmap.find_closest_available_index(5), 6)
+        # Ties are resolved in favour of the lower index
+        self.assertEqual(bitmap.find_closest_available_index(4), 2)
+        self.assertEqual(bitmap.find_closest_available_index(3, lower_index=3), 6)
+        self.assertIsNone(bitmap.find_closest_available_index(3, lower_index=3, upper_index=6))
+
+    def test_set_available(self):
+        bitmap = AvailabilityBitmap(10, available_indexes=[2, 6])
+        bitmap.set_available(2, False)
+        bitmap.set_available(4, True)
+        self.assertFalse(bitmap.is_available(2))
+        self.assertEqual(bitmap.find_closest_available_index(3), 4)
+
+    def test_from_lineage(self):
+        class Lineage:
+            state_ids = StateIdRange(range(10, 14))
+
+        class Build:
+            @staticmethod
+            def get_available_state_ids(state_ids):
+                return {"11", "13"}
+
+        bitmap = AvailabilityBitmap.from_lineage(Lineage(), Build())
+        self.assertEqual(len(bitmap), 4)
+        self.assertEqual([bitmap.is_available(index) for index in range(4)], [False, True, False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
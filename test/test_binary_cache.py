@@ -0,0 +1,141 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from bci.browser_build.binary_cache import BinaryCache
+
+
+def write_binary(size: int):
+    def install(folder_path: str):
+        with open(os.path.join(folder_path, "binary"), "wb") as file:
+            file.write(b"\0" * size)
+    return install
+
+
+class TestBinaryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder_path = tempfile.mkdtemp()
+        self.cache = BinaryCache(self.folder_path, 250)
+        self.cache.eviction_grace_period = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.folder_path)
+
+    def set_last_access(self, state_id, last_access: float):
+        with self.cache.locked_index() as index:
+            index["entries"][str(state_id)]["last_access"] = last_access
+
+    def test_install(self):
+        self.assertTrue(self.cache.install(1, write_binary(100)))
+        self.assertTrue(self.cache.contains(1))
+        self.assertEqual(self.cache.list_state_ids(), ["1"])
+        self.assertEqual(self.cache.get_size(), 100)
+        # Already installed binaries are not installed again
+        self.assertFalse(self.cache.install(1, write_binary(100)))
+        self.assertEqual(self.cache.get_stats()["misses"], 1)
+
+    def test_failed_install_leaves_no_entry(self):
+        def install(folder_path: str):
+            write_binary(100)(folder_path)
+            raise RuntimeError("Download failed")
+
+        with self.assertRaises(RuntimeError):
+            self.cache.install(1, install)
+        self.assertFalse(self.cache.contains(1))
+        self.assertFalse([name for name in os.listdir(self.folder_path) if name.startswith(".tmp-")])
+
+    def test_concurrent_installs_of_same_state(self):
+        nb_of_installs = []
+
+        def install(folder_path: str):
+            nb_of_installs.append(folder_path)
+            time.sleep(0.2)
+            write_binary(100)(folder_path)
+
+        threads = [threading.Thread(target=self.cache.install, args=(1, install)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(nb_of_installs), 1)
+        self.assertTrue(self.cache.contains(1))
+
+    def test_evicts_least_recently_used(self):
+        for state_id in (1, 2, 3):
+            self.cache.install(state_id, write_binary(100))
+            self.set_last_access(state_id, 1000 + state_id)
+        self.cache.touch(1, is_hit=True)
+        self.cache.evict()
+        self.assertEqual(sorted(self.cache.list_state_ids()), ["1", "3"])
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["evictions"], stats["size"]), (1, 1, 200))
+
+    def test_keeps_protected_binaries(self):
+        for state_id in (1, 2, 3):
+            self.cache.install(state_id, write_binary(100))
+            self.set_last_access(state_id, 1000 + state_id)
+        self.cache.evict(protected_state_ids=[1])
+        self.assertEqual(sorted(self.cache.list_state_ids()), ["1", "3"])
+
+    def test_keeps_binaries_in_use(self):
+        for state_id in (1, 2, 3):
+            self.cache.install(state_id, write_binary(100))
+            self.set_last_access(state_id, 1000 + state_id)
+        self.cache.mark_in_use(1)
+        self.cache.mark_in_use(2)
+        self.cache.evict()
+        self.assertEqual(sorted(self.cache.list_state_ids()), ["1", "2"])
+        self.cache.release(1)
+        self.cache.install(4, write_binary(100))
+        self.set_last_access(4, 2000)
+        self.cache.evict()
+        self.assertEqual(sorted(self.cache.list_state_ids()), ["2", "4"])
+
+    def test_release_after_multiple_dispatches(self):
+        self.cache.mark_in_use(1)
+        self.cache.mark_in_use(1)
+        self.cache.release(1)
+        self.assertIn("1", self.cache.in_use_state_ids)
+        self.cache.release(1)
+        self.assertNotIn("1", self.cache.in_use_state_ids)
+
+    def test_keeps_recently_accessed_binaries(self):
+        self.cache.eviction_grace_period = 60
+        for state_id in (1, 2, 3):
+            self.cache.install(state_id, write_binary(100))
+        self.set_last_access(1, time.time() - 120)
+        self.cache.evict()
+        self.assertEqual(sorted(self.cache.list_state_ids()), ["2", "3"])
+        # The cache exceeds its budget, but all remaining binaries might still be in use
+        self.cache.install(4, write_binary(100))
+        self.cache.evict()
+        self.assertEqual(sorted(self.cache.list_state_ids()), ["2", "3", "4"])
+
+    def test_index_is_reconciled_with_folder(self):
+        self.cache.install(1, write_binary(100))
+        os.makedirs(os.path.join(self.folder_path, "2"))
+        write_binary(50)(os.path.join(self.folder_path, "2"))
+        shutil.rmtree(os.path.join(self.folder_path, "1"))
+        self.assertEqual(self.cache.get_size(), 50)
+
+    def test_read_only(self):
+        self.cache.install(1, write_binary(100))
+        self.cache.install(2, write_binary(100))
+        self.cache.install(3, write_binary(100))
+        read_only_cache = BinaryCache(self.folder_path, 0)
+        read_only_cache.eviction_grace_period = 0
+        # Write access cannot be revoked for root, so the cache is marked read-only directly
+        read_only_cache.read_only = True
+        with self.assertRaises(AttributeError):
+            read_only_cache.install(4, write_binary(100))
+        read_only_cache.touch(1, is_hit=True)
+        read_only_cache.evict()
+        self.assertEqual(sorted(read_only_cache.list_state_ids()), ["1", "2", "3"])
+        self.assertEqual(self.cache.get_stats()["hits"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
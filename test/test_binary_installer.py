@@ -0,0 +1,103 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from bci.browser_build.binary_cache import BinaryCache
+from bci.browser_build.binary_installer import BinaryInstaller
+
+
+class State:
+
+    def __init__(self, state_id) -> None:
+        self.id = state_id
+
+
+class BrowserBuild:
+    """
+    Browser build of which the binaries of the given states can be downloaded.
+    """
+
+    def __init__(self, folder_path: str, online_state_ids: set) -> None:
+        self.binary_cache = BinaryCache(folder_path, 10 ** 6)
+        self.online_state_ids = online_state_ids
+        self.downloaded_state_ids = []
+        self.download_started = threading.Event()
+        self.can_finish_download = threading.Event()
+        self.can_finish_download.set()
+
+    def has_available_snapshot_locally(self, state_id) -> bool:
+        return self.binary_cache.contains(state_id)
+
+    def has_available_snapshot_online(self, state_id) -> bool:
+        return state_id in self.online_state_ids
+
+    def download_snapshot(self, state: State):
+        self.downloaded_state_ids.append(state.id)
+        self.download_started.set()
+        self.can_finish_download.wait()
+
+        def install(folder_path: str):
+            with open(os.path.join(folder_path, "binary"), "wb") as file:
+                file.write(b"binary")
+
+        self.binary_cache.install(state.id, install)
+
+
+class TestBinaryInstaller(unittest.TestCase):
+
+    def setUp(self):
+        self.folder_path = tempfile.mkdtemp()
+        self.browser_build = BrowserBuild(self.folder_path, {1, 2, 3})
+        self.availability = {}
+        self.installer = BinaryInstaller(
+            self.browser_build, 2, availability_cb=lambda state, available: self.availability.update({state.id: available}))
+
+    def tearDown(self):
+        self.browser_build.can_finish_download.set()
+        self.installer.shutdown()
+        shutil.rmtree(self.folder_path)
+
+    def test_install_and_wait(self):
+        self.assertTrue(self.installer.install_and_wait(State(1)))
+        self.assertTrue(self.browser_build.binary_cache.contains(1))
+        # Installed binaries are not downloaded again
+        self.assertTrue(self.installer.install_and_wait(State(1)))
+        self.assertEqual(self.browser_build.downloaded_state_ids, [1])
+        self.assertEqual(self.browser_build.binary_cache.get_stats()["hits"], 1)
+        self.assertEqual(self.availability, {1: True})
+
+    def test_unavailable_binary(self):
+        self.assertFalse(self.installer.install_and_wait(State(4)))
+        self.assertEqual(self.browser_build.downloaded_state_ids, [])
+        self.assertEqual(self.availability, {4: False})
+
+    def test_concurrent_requests_share_download(self):
+        self.browser_build.can_finish_download.clear()
+        future = self.installer.install(State(1))
+        self.browser_build.download_started.wait(timeout=5)
+        self.assertTrue(self.installer.is_installing(State(1)))
+        self.assertIs(self.installer.install(State(1)), future)
+        waiter = threading.Thread(target=self.installer.wait_until_installed, args=(State(1),))
+        waiter.start()
+        time.sleep(0.2)
+        self.assertTrue(waiter.is_alive())
+        self.browser_build.can_finish_download.set()
+        waiter.join(timeout=5)
+        self.assertFalse(waiter.is_alive())
+        self.assertTrue(future.result())
+        self.assertFalse(self.installer.is_installing(State(1)))
+        self.assertEqual(self.browser_build.downloaded_state_ids, [1])
+
+    def test_wait_only_for_own_download(self):
+        self.browser_build.can_finish_download.clear()
+        self.installer.install(State(1))
+        self.browser_build.download_started.wait(timeout=5)
+        # The binary of state 2 is not downloaded yet, so there is nothing to wait for
+        self.installer.wait_until_installed(State(2))
+        self.assertFalse(self.browser_build.binary_cache.contains(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import shutil
+import tempfile
+import unittest
+import subprocess
+from bci.version_control.chromium_index import ChromiumRepoIndex
+
+
+class TestChromiumRepoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = tempfile.mkdtemp()
+        self.git("init", "-q")
+        self.git("config", "user.email", "test@example.com")
+        self.git("config", "user.name", "Test")
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_path)
+
+    def git(self, *args) -> str:
+        return subprocess.check_output(["git", *args], cwd=self.repo_path, text=True).strip()
+
+    def commit(self, message: str) -> str:
+        self.git("commit", "-q", "--allow-empty", "-m", message)
+        return self.git("rev-parse", "HEAD")
+
+    def commit_position(self, position: int, ref="refs/heads/main") -> str:
+        return self.commit(f"Change {position}\n\nBug: 1\nCr-Commit-Position: {ref}@{{#{position}}}")
+
+    def test_indexes_commit_positions(self):
+        hashes = {position: self.commit_position(position) for position in (100, 101, 102)}
+        self.commit("Commit without position")
+        self.commit_position(5000, ref="refs/branch-heads/4044")
+        index = ChromiumRepoIndex(self.repo_path)
+        index.refresh()
+        for position, commit_hash in hashes.items():
+            self.assertEqual(index.get_commit_hash(position), commit_hash)
+            self.assertEqual(index.get_commit_hash(str(position)), commit_hash)
+        # Only positions of the main branch are indexed
+        self.assertIsNone(index.get_commit_hash(5000))
+        self.assertIsNone(index.get_commit_hash(103))
+
+    def test_refresh_is_incremental(self):
+        self.commit_position(100)
+        index = ChromiumRepoIndex(self.repo_path)
+        index.refresh()
+        new_hash = self.commit_position(101, ref="refs/heads/master")
+        # The index is persistent, a new instance continues from the last indexed commit
+        index = ChromiumRepoIndex(self.repo_path)
+        self.assertIsNone(index.get_commit_hash(101))
+        index.refresh()
+        self.assertEqual(index.get_commit_hash(101), new_hash)
+        self.assertIsNotNone(index.get_commit_hash(100))
+        self.assertEqual(index.get_meta("last_indexed_hash"), new_hash)
+
+    def test_branch_base_positions(self):
+        index = ChromiumRepoIndex(self.repo_path)
+        self.assertIsNone(index.get_branch_base_position("90"))
+        index.store_branch_base_position("90", 857950)
+        self.assertEqual(ChromiumRepoIndex(self.repo_path).get_branch_base_position("90"), "857950")
+
+    def test_repo_without_commits(self):
+        index = ChromiumRepoIndex(self.repo_path)
+        self.assertTrue(ChromiumRepoIndex.exists_for(self.repo_path))
+        with self.assertRaises(AttributeError):
+            index.refresh()
+
+
+if __name__ == '__main__':
+    unittest.main()
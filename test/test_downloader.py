@@ -0,0 +1,142 @@
+import os
+import base64
+import hashlib
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bci.browser_build.downloader import Downloader, DownloadError
+
+DATA = os.urandom(300 * 1024)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves DATA, and drops the connection halfway the body for the configured number of requests (other than the
+    probe for the first byte).
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        first, last = 0, len(DATA) - 1
+        range_header = self.headers.get("Range")
+        ignores_range = self.server.only_probe_supports_ranges and range_header != "bytes=0-0"
+        if range_header and self.server.supports_ranges and not ignores_range:
+            first_string, last_string = range_header[len("bytes="):].split("-")
+            first = int(first_string)
+            last = int(last_string) if last_string else last
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {first}-{last}/{len(DATA)}")
+        else:
+            self.send_response(200)
+        body = DATA[first:last + 1]
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("x-goog-hash", "md5=" + base64.b64encode(hashlib.md5(self.server.served_data).digest()).decode())
+        self.end_headers()
+        with self.server.lock:
+            should_drop = range_header != "bytes=0-0" and self.server.nb_of_drops > 0
+            if should_drop:
+                self.server.nb_of_drops -= 1
+        if should_drop:
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *_):
+        pass
+
+
+class TestDownloader(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        self.server.supports_ranges = True
+        self.server.only_probe_supports_ranges = False
+        self.server.nb_of_drops = 0
+        self.server.served_data = DATA
+        self.server.lock = threading.Lock()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/chrome.zip"
+        self.folder_path = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.folder_path, "chrome.zip")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.folder_path)
+
+    def create_downloader(self, **kwargs) -> Downloader:
+        downloader = Downloader(timeout=5, **kwargs)
+        self.addCleanup(downloader.session.close)
+        return downloader
+
+    def read_file(self) -> bytes:
+        with open(self.file_path, "rb") as file:
+            return file.read()
+
+    def test_download(self):
+        metrics = self.create_downloader().download(self.url, self.file_path)
+        self.assertEqual(self.read_file(), DATA)
+        self.assertEqual((metrics["size"], metrics["resumes"], metrics["segments"]), (len(DATA), 0, 1))
+
+    def test_download_in_segments(self):
+        metrics = self.create_downloader(segment_threshold=1024).download(self.url, self.file_path)
+        self.assertEqual(self.read_file(), DATA)
+        self.assertEqual(metrics["segments"], 4)
+
+    def test_download_resumes(self):
+        self.server.nb_of_drops = 2
+        metrics = self.create_downloader().download(self.url, self.file_path)
+        self.assertEqual(self.read_file(), DATA)
+        self.assertEqual(metrics["resumes"], 2)
+
+    def test_download_gives_up_after_max_resumes(self):
+        self.server.nb_of_drops = 10
+        with self.assertRaises(DownloadError):
+            self.create_downloader(max_resumes=2).download(self.url, self.file_path)
+
+    def test_download_without_range_support(self):
+        self.server.supports_ranges = False
+        self.server.nb_of_drops = 1
+        with self.assertRaises(DownloadError):
+            self.create_downloader().download(self.url, self.file_path)
+
+    def test_download_with_ignored_range(self):
+        self.server.only_probe_supports_ranges = True
+        with self.assertRaises(DownloadError):
+            self.create_downloader().download(self.url, self.file_path)
+
+    def test_download_verifies_md5(self):
+        self.server.served_data = DATA[::-1]
+        with self.assertRaises(DownloadError):
+            self.create_downloader().download(self.url, self.file_path)
+
+    def test_stream_resumes(self):
+        self.server.nb_of_drops = 2
+        with self.create_downloader().open_stream(self.url) as stream:
+            data = b""
+            while True:
+                chunk = stream.read(64 * 1024)
+                if not chunk:
+                    break
+                data += chunk
+        self.assertEqual(data, DATA)
+        self.assertEqual(stream.resumes, 2)
+        self.assertTrue(stream.is_verified)
+
+    def test_stream_does_not_resume_with_ignored_range(self):
+        self.server.nb_of_drops = 1
+        self.server.only_probe_supports_ranges = True
+        with self.create_downloader().open_stream(self.url) as stream:
+            with self.assertRaises(DownloadError):
+                while stream.read(64 * 1024):
+                    pass
+        self.assertEqual(stream.resumes, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
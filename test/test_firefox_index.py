@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from bci.version_control.firefox_index import FirefoxRepoIndex
+from bci.version_control.firefox_vc import FirefoxRepo
+
+# Answers the hg commands used by the index and the repository from the changesets and tags in repo.json, and logs
+# every command to commands.log
+FAKE_HG = """#!%s
+import os
+import sys
+import json
+
+args = sys.argv[1:]
+cwd = os.getcwd()
+if args[0] == "--cwd":
+    cwd = args[1]
+    args = args[2:]
+with open(os.path.join(cwd, "commands.log"), "a") as file:
+    file.write(" ".join(args) + "\\n")
+with open(os.path.join(cwd, "repo.json")) as file:
+    repo = json.load(file)
+nodes, tags = repo["nodes"], repo["tags"]
+if args[0] == "root":
+    sys.exit(0)
+if args[0] == "tags":
+    for tag, rev in list(tags.items()) + [("tip", len(nodes) - 1)]:
+        print(tag, rev)
+    sys.exit(0)
+rev_set = args[2]
+if rev_set == "tip":
+    print(len(nodes) - 1, end="")
+elif rev_set.startswith("tag("):
+    sys.exit(0 if rev_set[4:-1] in tags else 255)
+else:
+    first_rev, last_rev = map(int, rev_set.split(":"))
+    for rev in range(first_rev, last_rev + 1):
+        print(rev, nodes[rev])
+"""
+
+
+class FakeHgTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp()
+        self.repo_path = os.path.join(self.tmp_path, "repo")
+        os.makedirs(os.path.join(self.repo_path, ".hg"))
+        bin_path = os.path.join(self.tmp_path, "bin")
+        os.makedirs(bin_path)
+        with open(os.path.join(bin_path, "hg"), "w") as file:
+            file.write(FAKE_HG % sys.executable)
+        os.chmod(os.path.join(bin_path, "hg"), 0o755)
+        patcher = patch.dict(os.environ, {"PATH": bin_path + os.pathsep + os.environ["PATH"]})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.nodes = []
+        self.tags = {}
+        self.add_revisions(5)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def add_revisions(self, nb_of_revisions: int):
+        for _ in range(nb_of_revisions):
+            self.nodes.append("%040x" % (0xabc << 140 | len(self.nodes)))
+        self.write_repo()
+
+    def add_tag(self, tag: str, rev: int):
+        self.tags[tag] = rev
+        self.write_repo()
+
+    def write_repo(self):
+        with open(os.path.join(self.repo_path, "repo.json"), "w") as file:
+            json.dump({"nodes": self.nodes, "tags": self.tags}, file)
+
+    def get_commands(self) -> list:
+        commands_path = os.path.join(self.repo_path, "commands.log")
+        if not os.path.isfile(commands_path):
+            return []
+        with open(commands_path) as file:
+            return file.read().splitlines()
+
+    def clear_commands(self):
+        os.remove(os.path.join(self.repo_path, "commands.log"))
+
+
+class TestFirefoxRepoIndex(FakeHgTestCase):
+
+    def test_indexes_revisions_and_tags(self):
+        self.add_tag("FIREFOX_RELEASE_90_BASE", 3)
+        self.add_tag("FIREFOX_RELEASE_89_BASE", 1)
+        index = FirefoxRepoIndex(self.repo_path)
+        index.refresh()
+        self.assertEqual(index.get_node(2), self.nodes[2])
+        self.assertEqual(index.get_node("2"), self.nodes[2])
+        self.assertEqual(index.get_rev(self.nodes[4]), 4)
+        self.assertIsNone(index.get_rev("f" * 40))
+        self.assertEqual(index.get_tag_rev("FIREFOX_RELEASE_90_BASE"), 3)
+        self.assertEqual(index.get_tag_node("FIREFOX_RELEASE_90_BASE"), self.nodes[3])
+        self.assertIsNone(index.get_tag_rev("tip"))
+        self.assertEqual(index.get_tags(), ["FIREFOX_RELEASE_89_BASE", "FIREFOX_RELEASE_90_BASE"])
+
+    def test_get_nodes(self):
+        index = FirefoxRepoIndex(self.repo_path)
+        index.refresh()
+        self.assertEqual(index.get_nodes(1, 3), self.nodes[1:4])
+        self.assertEqual(index.get_nodes(3, 1), self.nodes[3:0:-1])
+
+    def test_refresh_is_incremental(self):
+        FirefoxRepoIndex(self.repo_path).refresh()
+        self.add_revisions(3)
+        self.add_tag("FIREFOX_RELEASE_91_BASE", 6)
+        self.clear_commands()
+        # The index is persistent, a new instance continues from the last indexed revision
+        index = FirefoxRepoIndex(self.repo_path)
+        self.assertIsNone(index.get_node(5))
+        index.refresh()
+        self.assertIn("log --rev 5:7 --template {rev} {node}", self.get_commands())
+        self.assertEqual(index.get_node(7), self.nodes[7])
+        self.assertEqual(index.get_tag_node("FIREFOX_RELEASE_91_BASE"), self.nodes[6])
+
+    def test_refresh_without_new_revisions(self):
+        FirefoxRepoIndex(self.repo_path).refresh()
+        self.clear_commands()
+        FirefoxRepoIndex(self.repo_path).refresh()
+        self.assertEqual(self.get_commands(), ["log --rev tip --template {rev}"])
+
+
+class TestFirefoxRepo(FakeHgTestCase):
+
+    def test_index_is_refreshed_on_first_use(self):
+        self.add_tag("FIREFOX_RELEASE_90_BASE", 3)
+        repo = FirefoxRepo(self.repo_path)
+        self.assertFalse(any(command.startswith("log") for command in self.get_commands()))
+        self.assertEqual(repo.get_changeset_id("FIREFOX_RELEASE_90_BASE"), self.nodes[3])
+        self.assertTrue(repo.index.is_refreshed)
+
+    def test_is_tag_falls_back_to_hg(self):
+        self.add_tag("FIREFOX_RELEASE_90_BASE", 3)
+        repo = FirefoxRepo(self.repo_path)
+        self.assertTrue(repo.is_tag("FIREFOX_RELEASE_90_BASE"))
+        # Tags added after the index was refreshed are found by hg
+        self.add_tag("FIREFOX_RELEASE_91_BASE", 4)
+        self.assertTrue(repo.is_tag("FIREFOX_RELEASE_91_BASE"))
+        self.assertFalse(repo.is_tag("FIREFOX_RELEASE_92_BASE"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+import os
+import time
+import threading
+import unittest
+import importlib.util
+from types import SimpleNamespace
+from unittest.mock import patch
+from bci import worker
+from bci.data_storage import mongodb
+from bci.data_storage.job_queue import JobQueue
+from bci.params import WorkerParams
+
+
+class Collection:
+    """
+    In-memory collection that supports the subset of queries and updates used by the job queue.
+    """
+
+    def __init__(self) -> None:
+        self.documents = []
+        self.next_id = 0
+        self.lock = threading.Lock()
+
+    def create_index(self, keys):
+        pass
+
+    @staticmethod
+    def matches(document: dict, query: dict) -> bool:
+        for key, condition in query.items():
+            value = document.get(key)
+            if isinstance(condition, dict):
+                if "$ne" in condition and value == condition["$ne"]:
+                    return False
+                if "$in" in condition and value not in condition["$in"]:
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    def insert_one(self, document: dict):
+        with self.lock:
+            document = dict(document, _id=self.next_id)
+            self.next_id += 1
+            self.documents.append(document)
+            return SimpleNamespace(inserted_id=document["_id"])
+
+    def insert_many(self, documents: list):
+        for document in documents:
+            self.insert_one(document)
+
+    def find(self, query: dict, projection: dict = None) -> list:
+        with self.lock:
+            return [dict(document) for document in self.documents if self.matches(document, query)]
+
+    def find_one_and_update(self, query: dict, update: dict, sort=None, return_document=None):
+        with self.lock:
+            for document in self.documents:
+                if self.matches(document, query):
+                    document.update(update["$set"])
+                    return dict(document)
+            return None
+
+    def update_one(self, query: dict, update: dict):
+        with self.lock:
+            for document in self.documents:
+                if self.matches(document, query):
+                    document.update(update["$set"])
+                    return
+
+    def update_many(self, query: dict, update: dict):
+        with self.lock:
+            for document in self.documents:
+                if self.matches(document, query):
+                    document.update(update["$set"])
+
+    def delete_many(self, query: dict):
+        with self.lock:
+            self.documents = [document for document in self.documents if not self.matches(document, query)]
+
+    def get_status(self, job_id) -> str:
+        return next(document["status"] for document in self.documents if document["_id"] == job_id)
+
+
+def create_params(state_id: str) -> WorkerParams:
+    return WorkerParams.from_dict({
+        "evaluation_framework_name": "custom",
+        "automation": "selenium",
+        "browser": "chromium",
+        "state_id": state_id,
+        "configuration_option": "default",
+        "mech_id": None,
+        "mech_groups": ["group"],
+        "extension_name": None,
+        "additional_cli_options": [],
+        "cookie_name": None,
+    })
+
+
+class JobQueueTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = Collection()
+        patcher = patch.object(mongodb, "DB", {JobQueue.collection_name: self.collection})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.job_queue = JobQueue("queue")
+
+
+class TestJobQueue(JobQueueTestCase):
+
+    def test_pop_in_order(self):
+        first_job_id = self.job_queue.push(create_params("1"))
+        self.job_queue.push(create_params("2"))
+        job_id, params = self.job_queue.pop("worker")
+        self.assertEqual((job_id, params.state_id), (first_job_id, "1"))
+        self.assertEqual(self.collection.get_status(job_id), JobQueue.RUNNING)
+        self.assertEqual(self.job_queue.pop("worker")[1].state_id, "2")
+        self.assertIsNone(self.job_queue.pop("worker"))
+
+    def test_queues_are_separate(self):
+        self.job_queue.push(create_params("1"))
+        self.assertIsNone(JobQueue("other_queue").pop("worker"))
+
+    def test_stop_signals_follow_pending_jobs(self):
+        self.job_queue.push(create_params("1"))
+        self.job_queue.push_stop_signals(2)
+        self.assertIsNotNone(self.job_queue.pop("worker")[1])
+        self.assertIsNone(self.job_queue.pop("worker")[1])
+        self.assertIsNone(self.job_queue.pop("worker")[1])
+        self.assertIsNone(self.job_queue.pop("worker"))
+
+    def test_finished_jobs_are_collected_once(self):
+        for state_id in ("1", "2", "3"):
+            self.job_queue.push(create_params(state_id))
+        first_job_id, _ = self.job_queue.pop("worker")
+        second_job_id, _ = self.job_queue.pop("worker")
+        self.job_queue.complete(first_job_id, True)
+        self.job_queue.complete(second_job_id, False)
+        self.assertEqual(self.collection.get_status(second_job_id), JobQueue.FAILED)
+        self.assertEqual(sorted(self.job_queue.collect_finished()), [(first_job_id, True), (second_job_id, False)])
+        self.assertEqual(self.collection.get_status(first_job_id), JobQueue.COLLECTED)
+        self.assertEqual(self.job_queue.collect_finished(), [])
+
+    def test_fail_running_jobs_of_worker(self):
+        self.job_queue.push(create_params("1"))
+        self.job_queue.push(create_params("2"))
+        self.job_queue.push_stop_signals(1)
+        first_job_id, _ = self.job_queue.pop("worker")
+        second_job_id, _ = self.job_queue.pop("other_worker")
+        stop_signal_id, _ = self.job_queue.pop("worker")
+        self.job_queue.fail_running_jobs("worker")
+        self.assertEqual(self.collection.get_status(first_job_id), JobQueue.FAILED)
+        self.assertEqual(self.collection.get_status(second_job_id), JobQueue.RUNNING)
+        # Stop signals are never reported as failed jobs
+        self.assertEqual(self.collection.get_status(stop_signal_id), JobQueue.RUNNING)
+
+    def test_fail_and_cancel_pending_jobs(self):
+        job_id = self.job_queue.push(create_params("1"))
+        self.job_queue.push_stop_signals(1)
+        self.job_queue.fail_pending_jobs()
+        self.assertEqual(self.collection.get_status(job_id), JobQueue.FAILED)
+        self.assertEqual(len(self.collection.find({"status": JobQueue.PENDING})), 1)
+        self.job_queue.cancel_pending_jobs()
+        self.assertEqual(self.collection.find({"status": JobQueue.PENDING}), [])
+        self.job_queue.remove()
+        self.assertEqual(self.collection.documents, [])
+
+
+class TestServe(JobQueueTestCase):
+
+    def test_serve_until_stop_signal(self):
+        successful_job_id = self.job_queue.push(create_params("1"))
+        failing_job_id = self.job_queue.push(create_params("2"))
+        self.job_queue.push_stop_signals(1)
+        remaining_job_id = self.job_queue.push(create_params("3"))
+        evaluated_state_ids = []
+
+        def evaluate_job(params: WorkerParams):
+            evaluated_state_ids.append(params.state_id)
+            if params.state_id == "2":
+                raise RuntimeError("Evaluation failed")
+
+        with patch.object(worker, "evaluate_job", evaluate_job), \
+                patch.object(mongodb.MongoDB, "flush_data") as flush_data, \
+                patch.dict(os.environ, {"HOSTNAME": "worker"}):
+            worker.serve("queue")
+        self.assertEqual(evaluated_state_ids, ["1", "2"])
+        self.assertEqual(flush_data.call_count, 1)
+        self.assertEqual(self.collection.get_status(successful_job_id), JobQueue.DONE)
+        self.assertEqual(self.collection.get_status(failing_job_id), JobQueue.FAILED)
+        self.assertEqual(self.collection.get_status(remaining_job_id), JobQueue.PENDING)
+
+
+@unittest.skipUnless(importlib.util.find_spec("docker"), "the worker pool requires the docker package")
+class TestWorkerPoolManager(JobQueueTestCase):
+
+    def create_manager(self, evaluate):
+        from bci.distribution.worker_pool import WorkerPoolManager
+
+        class ThreadWorkerPoolManager(WorkerPoolManager):
+            """
+            Worker pool of which the workers are threads that serve the job queue, instead of containers.
+            """
+            collect_interval = 0.05
+
+            def run_persistent_worker(self, container_name: str, command: list):
+                while True:
+                    job = self.job_queue.pop(container_name)
+                    if job is None:
+                        time.sleep(0.01)
+                        continue
+                    job_id, params = job
+                    self.job_queue.complete(job_id, params is None or evaluate(params))
+                    if params is None:
+                        return
+
+        with patch("docker.from_env"):
+            return ThreadWorkerPoolManager(2)
+
+    def test_callbacks_are_called_with_outcome(self):
+        manager = self.create_manager(lambda params: params.state_id != "2")
+        outcomes = {}
+        for state_id in ("1", "2", "3"):
+            manager.start_container(
+                create_params(state_id), lambda success, state_id=state_id: outcomes.update({state_id: success}))
+        manager.wait_until_all_containers_are_done()
+        self.assertEqual(outcomes, {"1": True, "2": False, "3": True})
+        self.assertFalse(manager.collector_thread.is_alive())
+
+    def test_failing_callback_does_not_stop_collection(self):
+        manager = self.create_manager(lambda params: True)
+        outcomes = []
+
+        def failing_cb(success: bool):
+            raise RuntimeError("Callback failed")
+
+        manager.start_container(create_params("1"), failing_cb)
+        manager.start_container(create_params("2"), outcomes.append)
+        manager.wait_until_all_containers_are_done()
+        self.assertEqual(outcomes, [True])
+        # Both slots are released again
+        self.assertEqual(manager.container_id_pool.qsize(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from pymongo.errors import CollectionInvalid
+from bci.data_storage import mongodb
+from bci.data_storage.index_manager import IndexManager
+from bci.data_storage.mongodb import MongoDB
+from bci.params import DatabaseParams
+from bci.version_control.version_control import PackedStateIds, StateIdRange
+
+
+class Collection:
+    """
+    Data collection that records the aggregations and answers them from a set of fully evaluated state ids.
+    """
+
+    def __init__(self, evaluated_state_ids: set) -> None:
+        self.evaluated_state_ids = evaluated_state_ids
+        self.queries = []
+
+    def aggregate(self, pipeline: list, allowDiskUse=False):
+        query = pipeline[0]["$match"]
+        self.queries.append(query)
+        state_id_condition = query["state_id"]
+        if "$in" in state_id_condition:
+            state_ids = state_id_condition["$in"]
+        else:
+            state_ids = range(state_id_condition["$gte"], state_id_condition["$lte"] + 1)
+        return iter([
+            {"_id": state_id, "nb_of_documents": 1, "results": [{"mech": "true"}]}
+            for state_id in state_ids if state_id in self.evaluated_state_ids
+        ])
+
+
+class Database:
+    """
+    Database that keeps track of its collections by name.
+    """
+
+    def __init__(self, collection_names: set) -> None:
+        self.collection_names = set(collection_names)
+        self.created_collection_names = []
+
+    def list_collection_names(self) -> list:
+        return list(self.collection_names)
+
+    def create_collection(self, name: str):
+        if name in self.collection_names:
+            raise CollectionInvalid("collection %s already exists" % name)
+        self.collection_names.add(name)
+        self.created_collection_names.append(name)
+
+    def __getitem__(self, name: str):
+        return Collection(set())
+
+
+class ResultsDB(MongoDB):
+    data_collection_names = {"chromium": "results"}
+
+
+class TestGetResultsPerState(unittest.TestCase):
+
+    def setUp(self):
+        self.db = ResultsDB()
+        self.db.result_lookup_chunk_size = 3
+        eval_params = SimpleNamespace(
+            automation="selenium", browser="chromium", configuration_option="default", extension_name=None,
+            additional_cli_arguments=[], mech_groups=["group"], mech_id="mech", cookie_name=None)
+        self.params = DatabaseParams(None, eval_params)
+
+    def get_outcomes(self, collection: Collection, state_ids) -> dict:
+        with patch.object(MongoDB, "get_collection", return_value=collection):
+            return self.db.get_all_data_with_params(self.params, state_ids)
+
+    def test_lookup_in_chunks(self):
+        collection = Collection({101, 104, 107})
+        outcomes = self.get_outcomes(collection, (str(state_id) for state_id in range(100, 108)))
+        self.assertEqual(outcomes, {"101": True, "104": True, "107": True})
+        self.assertEqual(
+            [query["state_id"]["$in"] for query in collection.queries],
+            [[100, 101, 102], [103, 104, 105], [106, 107]])
+
+    def test_lookup_of_packed_state_ids(self):
+        state_ids = ["%040x" % (0xabc << 140 | index) for index in range(7)]
+        collection = Collection({state_ids[0], state_ids[6]})
+        outcomes = self.get_outcomes(collection, PackedStateIds(state_ids))
+        self.assertEqual(outcomes, {state_ids[0]: True, state_ids[6]: True})
+        self.assertEqual(len(collection.queries), 3)
+
+    def test_lookup_of_state_id_range(self):
+        collection = Collection({100, 5000})
+        outcomes = self.get_outcomes(collection, StateIdRange(range(100, 10000)))
+        self.assertEqual(outcomes, {"100": True, "5000": True})
+        self.assertEqual([query["state_id"] for query in collection.queries], [{"$gte": 100, "$lte": 9999}])
+
+    def test_lookup_of_no_states(self):
+        collection = Collection(set())
+        self.assertEqual(self.get_outcomes(collection, []), {})
+        self.assertEqual(collection.queries, [])
+
+
+class TestGetCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.db = Database({"results"})
+        for patcher in [
+                patch.object(mongodb, "DB", self.db),
+                patch.object(mongodb, "COLLECTIONS", {}),
+                patch.object(mongodb, "COLLECTION_NAMES", set()),
+                patch.object(IndexManager, "ensure_indexes")]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_existing_collection(self):
+        collection = MongoDB.get_collection("results")
+        self.assertIs(MongoDB.get_collection("results"), collection)
+        self.assertEqual(IndexManager.ensure_indexes.call_count, 1)
+        self.assertEqual(self.db.created_collection_names, [])
+
+    def test_missing_collection_is_created(self):
+        MongoDB.get_collection("new_results")
+        self.assertEqual(self.db.created_collection_names, ["new_results"])
+        IndexManager.ensure_indexes.assert_called_once()
+
+    def test_collection_created_by_other_process(self):
+        # The collection is created after the collection names were listed
+        mongodb.COLLECTION_NAMES.update(self.db.list_collection_names())
+        self.db.list_collection_names = lambda: ["results"]
+        self.db.collection_names.add("new_results")
+        MongoDB.get_collection("new_results")
+        IndexManager.ensure_indexes.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import threading
+import unittest
+from bci.search_strategy.sequence_elem import ElemState
+from bci.search_strategy.sequence_strategy import SequenceFinished
+from bci.search_strategy.multi_target_search import MultiTargetSearch
+
+SHIFTS = {"a": 30, "b": 70, "c": 71}
+
+
+def get_outcomes(value: int) -> dict:
+    # Mechanisms with a negative outcome are left out, like in the results stored by the workers
+    outcomes = {mech_id: True for mech_id, shift in SHIFTS.items() if value >= shift}
+    outcomes["constant"] = True
+    return outcomes
+
+
+def evaluate_all(search: MultiTargetSearch, failing_values=()) -> list:
+    evaluated = []
+    while True:
+        try:
+            value = search.next()
+        except SequenceFinished:
+            return evaluated
+        evaluated.append(value)
+        search.update_outcome(value, None if value in failing_values else get_outcomes(value))
+
+
+class TestMultiTargetSearch(unittest.TestCase):
+
+    def create_search(self, values, is_available=lambda _: True, mech_ids=None):
+        # A short pending time makes a test fail instead of hang if an outcome is not taken into account
+        return MultiTargetSearch(values, is_available, mech_ids=mech_ids, max_pending_time=5)
+
+    def test_evaluates_boundaries_first(self):
+        search = self.create_search(list(range(100)))
+        self.assertEqual(evaluate_all(search)[:2], [0, 99])
+
+    def test_localizes_all_targets(self):
+        search = self.create_search(list(range(100)))
+        evaluated = evaluate_all(search)
+        bounds = search.get_target_bounds()
+        self.assertEqual(bounds, {"a": (29, 30), "b": (69, 70), "c": (70, 71)})
+        # Targets share evaluations, so localizing three targets takes fewer evaluations than three binary searches
+        self.assertLess(len(evaluated), 3 * 9)
+
+    def test_only_localizes_given_mechanisms(self):
+        search = self.create_search(list(range(100)), mech_ids=["b"])
+        evaluate_all(search)
+        self.assertEqual(search.get_target_bounds(), {"b": (69, 70)})
+
+    def test_bounds_skip_unavailable_values(self):
+        search = self.create_search(list(range(100)), is_available=lambda value: value % 10 == 0 or value == 99)
+        evaluated = evaluate_all(search)
+        self.assertTrue(all(value % 10 == 0 or value == 99 for value in evaluated))
+        self.assertEqual(search.get_target_bounds()["a"], (20, 30))
+
+    def test_failed_evaluations_are_skipped(self):
+        search = self.create_search(list(range(100)))
+        evaluate_all(search, failing_values={29, 69})
+        self.assertEqual(search.get_target_bounds()["a"], (28, 30))
+        self.assertEqual(search.elem_store.get_state(29), ElemState.ERROR)
+
+    def test_failed_boundary_ends_search(self):
+        search = self.create_search(list(range(100)))
+        self.assertEqual(evaluate_all(search, failing_values={0}), [0, 99])
+        self.assertEqual(search.get_target_bounds(), {})
+
+    def test_next_waits_for_outcomes_in_progress(self):
+        search = self.create_search(list(range(100)))
+        lower = search.next()
+        upper = search.next()
+        result = []
+
+        def next_value():
+            try:
+                result.append(search.next())
+            except SequenceFinished:
+                result.append(None)
+
+        thread = threading.Thread(target=next_value)
+        thread.start()
+        # Without the outcomes of the boundaries, no other value is worth evaluating
+        thread.join(timeout=0.5)
+        self.assertTrue(thread.is_alive())
+        search.update_outcome(lower, get_outcomes(lower))
+        search.update_outcome(upper, None)
+        thread.join(timeout=2)
+        self.assertFalse(thread.is_alive())
+        # The failed evaluation is reported, so the search finishes instead of waiting for it
+        self.assertEqual(result, [None])
+
+    def test_stop_ends_waiting_next(self):
+        search = self.create_search(list(range(100)))
+        search.next()
+        search.next()
+        result = []
+
+        def next_value():
+            try:
+                result.append(search.next())
+            except SequenceFinished:
+                result.append(None)
+
+        thread = threading.Thread(target=next_value)
+        thread.start()
+        thread.join(timeout=0.5)
+        self.assertTrue(thread.is_alive())
+        search.stop()
+        thread.join(timeout=2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result, [None])
+        with self.assertRaises(SequenceFinished):
+            search.next()
+
+    def test_parallel_evaluations_are_split(self):
+        search = self.create_search(list(range(1000)))
+        for value in (search.next(), search.next()):
+            search.update_outcome(value, get_outcomes(value))
+        in_progress = [search.next() for _ in range(4)]
+        self.assertEqual(len(set(in_progress)), 4)
+        for value in in_progress:
+            search.update_outcome(value, get_outcomes(value))
+        evaluate_all(search)
+        self.assertEqual(search.get_target_bounds()["a"], (29, 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
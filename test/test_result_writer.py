@@ -0,0 +1,79 @@
+import time
+import threading
+import unittest
+from bci.data_storage.result_writer import ResultWriter
+
+
+class Collection:
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.inserted_documents = []
+        self.lock = threading.Lock()
+
+    def with_options(self, write_concern=None):
+        return self
+
+    def insert_many(self, documents: list, ordered=True):
+        with self.lock:
+            self.inserted_documents.extend(documents)
+
+
+class TestResultWriter(unittest.TestCase):
+
+    def tearDown(self):
+        if ResultWriter.instance is not None:
+            ResultWriter.instance.close()
+
+    def test_documents_are_written_in_batches(self):
+        writer = ResultWriter(flush_interval=60, max_batch_size=3)
+        collection = Collection("results")
+        for i in range(3):
+            writer.add(collection, {"i": i})
+        # The full batch is flushed by the background thread, long before the flush interval expires
+        deadline = time.time() + 5
+        while len(collection.inserted_documents) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(collection.inserted_documents, [{"i": 0}, {"i": 1}, {"i": 2}])
+        self.assertEqual(writer.get_metrics()["nb_of_flushed_documents"], 3)
+        writer.close()
+
+    def test_close_writes_buffered_documents(self):
+        writer = ResultWriter.get_instance()
+        writer.flush_interval = 60
+        collections = [Collection("results"), Collection("other_results")]
+        for i in range(4):
+            writer.add(collections[i % 2], {"i": i})
+        self.assertEqual(collections[0].inserted_documents, [])
+        writer.close()
+        self.assertEqual(collections[0].inserted_documents, [{"i": 0}, {"i": 2}])
+        self.assertEqual(collections[1].inserted_documents, [{"i": 1}, {"i": 3}])
+        self.assertEqual(writer.queue_depth, 0)
+        self.assertIsNone(ResultWriter.instance)
+
+    def test_close_keeps_newer_instance(self):
+        writer = ResultWriter.get_instance()
+        ResultWriter.instance = None
+        new_writer = ResultWriter.get_instance()
+        writer.close()
+        self.assertIs(ResultWriter.instance, new_writer)
+
+    def test_failed_flush_keeps_documents(self):
+        writer = ResultWriter(flush_interval=60)
+        collection = Collection("results")
+
+        def insert_many(documents: list, ordered=True):
+            raise ConnectionError("Database not reachable")
+
+        collection.insert_many = insert_many
+        writer.add(collection, {"i": 0})
+        with self.assertRaises(ConnectionError):
+            writer.flush()
+        self.assertEqual(writer.queue_depth, 1)
+        del collection.insert_many
+        writer.close()
+        self.assertEqual(collection.inserted_documents, [{"i": 0}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import unittest
+from bci.search_strategy.elem_store import ElemStore
+from bci.search_strategy.sequence_elem import ElemState
+from bci.search_strategy.n_ary_sequence import NArySequence, SequenceFinished
+from bci.search_strategy.n_ary_search import NArySearch
+from bci.search_strategy.composite_search import CompositeSearch
+from bci.search_strategy.availability_bitmap import AvailabilityBitmap
+
+
+def evaluate_all(search_strategy, shift: int) -> list:
+    """
+    Evaluates the elements of the given strategy one by one, the outcome is positive from the shift onwards.
+    """
+    evaluated = []
+    while True:
+        try:
+            value = search_strategy.next()
+        except SequenceFinished:
+            return evaluated
+        evaluated.append(value)
+        search_strategy.update_outcome(value, value >= shift)
+
+
+class TestElemStore(unittest.TestCase):
+
+    def test_update_outcome(self):
+        store = ElemStore(3)
+        self.assertTrue(store.is_initialized(0))
+        store.update_outcome(0, True)
+        store.update_outcome(1, False)
+        store.update_outcome(2, None)
+        self.assertEqual(store.get_state(0), ElemState.DONE)
+        self.assertTrue(store.get_outcome(0))
+        self.assertFalse(store.get_outcome(1))
+        self.assertEqual(store.get_state(2), ElemState.ERROR)
+        self.assertIsNone(store.get_outcome(2))
+        self.assertEqual(list(store.iter_evaluated_indexes()), [0, 1])
+
+    def test_update_outcome_twice(self):
+        store = ElemStore(1)
+        store.update_outcome(0, True)
+        with self.assertRaises(AttributeError):
+            store.update_outcome(0, False)
+
+    def test_slice_shares_elements(self):
+        store = ElemStore(10)
+        view = store.get_slice(4, 8)
+        self.assertEqual(len(view), 4)
+        view.update_outcome(1, True)
+        self.assertTrue(store.get_outcome(5))
+        store.set_cached_availability(7, False)
+        self.assertFalse(view.get_cached_availability(3))
+        nested_view = view.get_slice(1, 3)
+        self.assertTrue(nested_view.get_outcome(0))
+
+    def test_slice_out_of_bounds(self):
+        store = ElemStore(10)
+        with self.assertRaises(AttributeError):
+            store.get_slice(5, 11)
+        with self.assertRaises(AttributeError):
+            store.get_slice(6, 5)
+
+
+class TestNArySequence(unittest.TestCase):
+
+    def test_evaluates_every_element_once(self):
+        values = list(range(20))
+        sequence = NArySequence(values, lambda _: True, 3)
+        evaluated = evaluate_all(sequence, 10)
+        self.assertEqual(evaluated[:2], [0, 19])
+        self.assertEqual(sorted(evaluated), values)
+
+    def test_limit(self):
+        sequence = NArySequence(list(range(100)), lambda _: True, 4, limit=6)
+        self.assertEqual(len(evaluate_all(sequence, 50)), 6)
+
+    def test_skips_unavailable_elements(self):
+        values = list(range(20))
+        sequence = NArySequence(values, lambda value: value % 2 == 0, 2)
+        evaluated = evaluate_all(sequence, 10)
+        self.assertEqual(sorted(evaluated), list(range(0, 20, 2)))
+
+
+class TestNArySearch(unittest.TestCase):
+
+    def test_finds_shift(self):
+        for n in (2, 3, 8):
+            for shift in (1, 37, 99):
+                search = NArySearch(list(range(100)), lambda _: True, n)
+                evaluated = evaluate_all(search, shift)
+                self.assertIn(shift - 1, evaluated)
+                self.assertIn(shift, evaluated)
+                self.assertLess(len(evaluated), 40)
+
+    def test_finds_shift_between_available_elements(self):
+        available_values = {0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 99}
+        search = NArySearch(list(range(100)), lambda value: value in available_values, 2)
+        evaluated = evaluate_all(search, 45)
+        self.assertIn(40, evaluated)
+        self.assertIn(50, evaluated)
+        self.assertTrue(set(evaluated) <= available_values)
+
+    def test_uses_outcomes_in_shared_store(self):
+        store = ElemStore(100)
+        store.update_outcome(0, False)
+        store.update_outcome(60, True)
+        store.update_outcome(99, True)
+        search = NArySearch(list(range(100)), lambda _: True, 2, elem_store=store)
+        self.assertEqual((search.lower_bound, search.upper_bound), (0, 60))
+        evaluated = evaluate_all(search, 30)
+        self.assertTrue(all(value < 60 for value in evaluated))
+        self.assertIn(29, evaluated)
+        self.assertIn(30, evaluated)
+
+
+class TestCompositeSearch(unittest.TestCase):
+
+    def create_composite_search(self, values, is_available, bitmap=None):
+        search = CompositeSearch(values, is_available, 4, 10, NArySequence, NArySearch)
+        if bitmap is not None:
+            search.set_availability_bitmap(bitmap)
+        return search
+
+    def test_finds_shift(self):
+        values = list(range(1000))
+        search = self.create_composite_search(values, lambda _: True)
+        evaluated = evaluate_all(search, 421)
+        self.assertIn(420, evaluated)
+        self.assertIn(421, evaluated)
+        self.assertEqual(len(evaluated), len(set(evaluated)))
+        self.assertLess(len(evaluated), 40)
+
+    def test_sub_searches_share_the_store(self):
+        values = list(range(1000))
+        search = self.create_composite_search(values, lambda _: True)
+        evaluated = evaluate_all(search, 421)
+        for value in evaluated:
+            self.assertEqual(search.elem_store.get_state(value), ElemState.DONE)
+            self.assertEqual(search.elem_store.get_outcome(value), value >= 421)
+
+    def test_uses_availability_bitmap(self):
+        values = list(range(1000))
+        available_indexes = range(0, 1000, 7)
+        bitmap = AvailabilityBitmap(len(values), available_indexes=available_indexes)
+
+        def is_available(_):
+            raise AssertionError("Availability should be looked up in the bitmap")
+
+        search = self.create_composite_search(values, is_available, bitmap=bitmap)
+        evaluated = evaluate_all(search, 500)
+        self.assertTrue(set(evaluated) <= set(available_indexes))
+        self.assertIn(497, evaluated)
+        self.assertIn(504, evaluated)
+
+    def test_set_available_updates_bitmap(self):
+        values = list(range(100))
+        bitmap = AvailabilityBitmap(len(values), available_indexes=range(100))
+        search = self.create_composite_search(values, lambda _: True, bitmap=bitmap)
+        search.set_available(50, False)
+        self.assertFalse(bitmap.is_available(50))
+        self.assertFalse(search.elem_store.get_cached_availability(50))
+        self.assertNotEqual(search.find_closest_available_index(50), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
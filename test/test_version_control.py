@@ -0,0 +1,96 @@
+import unittest
+from bci.version_control.version_control import PackedStateIds, RepoLineage, RepoState, StateIdRange
+
+
+class TestStateIdRange(unittest.TestCase):
+
+    def test_access(self):
+        state_ids = StateIdRange(range(100, 110))
+        self.assertEqual(len(state_ids), 10)
+        self.assertEqual(state_ids[0], "100")
+        self.assertEqual(state_ids[-1], "109")
+        self.assertEqual(list(state_ids)[:3], ["100", "101", "102"])
+
+    def test_lookup(self):
+        state_ids = StateIdRange(range(100, 110))
+        self.assertEqual(state_ids.index("105"), 5)
+        self.assertEqual(state_ids.index(105), 5)
+        self.assertIn("109", state_ids)
+        self.assertNotIn("110", state_ids)
+        with self.assertRaises(ValueError):
+            state_ids.index("99")
+
+
+class TestPackedStateIds(unittest.TestCase):
+
+    def setUp(self):
+        self.ids = ["f" * 40, "0" * 40, "a1" * 20, "0123456789abcdef" * 2 + "01234567"]
+        self.state_ids = PackedStateIds(self.ids)
+
+    def test_access(self):
+        self.assertEqual(len(self.state_ids), 4)
+        self.assertEqual(self.state_ids.packed_ids, b"".join(bytes.fromhex(state_id) for state_id in self.ids))
+        self.assertEqual([self.state_ids[index] for index in range(4)], self.ids)
+        self.assertEqual(self.state_ids[-1], self.ids[-1])
+        self.assertEqual(list(self.state_ids), self.ids)
+        with self.assertRaises(IndexError):
+            self.state_ids[4]
+
+    def test_lookup(self):
+        self.assertIsNone(self.state_ids.sorted_indexes)
+        for index, state_id in enumerate(self.ids):
+            self.assertEqual(self.state_ids.index(state_id), index)
+        self.assertNotIn("b" * 40, self.state_ids)
+        with self.assertRaises(ValueError):
+            self.state_ids.index("b" * 40)
+
+    def test_ids_of_different_length(self):
+        with self.assertRaises(AttributeError):
+            PackedStateIds(["ab" * 20, "ab" * 6])
+
+
+class TestRepoLineage(unittest.TestCase):
+
+    def setUp(self):
+        self.lineage = RepoLineage(StateIdRange(range(100, 110)), evaluation_targets={"103", "109"})
+
+    def test_states_are_created_on_access(self):
+        self.assertEqual(self.lineage.materialized_states, {})
+        state = self.lineage.states[3]
+        self.assertIsInstance(state, RepoState)
+        self.assertEqual(state.id, "103")
+        self.assertEqual(list(self.lineage.materialized_states.keys()), [3])
+        # A state is created only once
+        self.assertIs(self.lineage.states[3], state)
+        self.assertIs(self.lineage.get_state(self.lineage.get_index("103")), state)
+
+    def test_evaluation_targets(self):
+        self.assertTrue(self.lineage.states[3].is_evaluation_target())
+        self.assertFalse(self.lineage.states[4].is_evaluation_target())
+        # The boundaries of the lineage are never evaluation targets
+        self.assertFalse(self.lineage.descendant_state.is_evaluation_target())
+        self.assertEqual((self.lineage.lower_state_id, self.lineage.upper_state_id), ("100", "109"))
+
+    def test_state_sequence(self):
+        states = self.lineage.states
+        self.assertEqual(len(states), 10)
+        self.assertEqual(states[-1].id, "109")
+        sub_states = states[2:6]
+        self.assertEqual(len(sub_states), 4)
+        self.assertEqual([state.id for state in sub_states], ["102", "103", "104", "105"])
+        self.assertEqual(sub_states[1:][0].id, "103")
+        self.assertEqual(len(states[6:2]), 0)
+        self.assertEqual([state.id for state in states[::4]], ["100", "104", "108"])
+        self.assertEqual(sub_states.index(states[4]), 2)
+        self.assertIn(states[5], sub_states)
+        self.assertNotIn(states[6], sub_states)
+        # Slicing a view does not create the states in it
+        self.assertNotIn(7, self.lineage.materialized_states)
+
+    def test_empty_lineage(self):
+        with self.assertRaises(AttributeError):
+            RepoLineage(StateIdRange(range(0)))
+
+
+if __name__ == '__main__':
+    unittest.main()